@@ -135,5 +135,5 @@ class ActiveFeedbackLoop:
         if len(self.feedback_history) > 1000:
             self.feedback_history = self.feedback_history[-1000:]
         
-        logger.debug(f"Recorded feedback for event {event_id}")
+        logger.debug("Recorded feedback for event %s", event_id)
 
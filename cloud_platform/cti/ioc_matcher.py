@@ -55,7 +55,7 @@ class IOCHandler:
                 'description': ioc_data.get('description', ''),
                 'mitre_id': ioc_data.get('mitre_id', [])
             })
-            logger.info(f"IOC match for source IP: {uer.source_ip}")
+            logger.info("IOC match for source IP: %s", uer.source_ip)
         
         # Check destination IP
         if uer.destination_ip in self.ip_iocs:
@@ -68,7 +68,7 @@ class IOCHandler:
                 'description': ioc_data.get('description', ''),
                 'mitre_id': ioc_data.get('mitre_id', [])
             })
-            logger.info(f"IOC match for destination IP: {uer.destination_ip}")
+            logger.info("IOC match for destination IP: %s", uer.destination_ip)
         
         return matches
     
@@ -137,7 +137,7 @@ class CTIModule:
         uer: UnifiedEventReport
     ) -> Dict[str, Any]:
         """Check UER against CTI feeds"""
-        logger.debug(f"Checking CTI for UER {uer.event_id}")
+        logger.debug("Checking CTI for UER %s", uer.event_id)
         
         # Check IOC matches
         ioc_matches = self.ioc_handler.check_ioc_match(uer)
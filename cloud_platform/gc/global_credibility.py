@@ -6,9 +6,10 @@ import numpy as np
 
 from shared.models.uer_schema import UnifiedEventReport, CloudProcessingResult
 from shared.config.constants import BAYESIAN_PRIOR, DEMPSTER_CONFLICT_THRESHOLD
-from shared.utils.logger import get_logger
+from shared.utils.logger import get_event_logger, get_logger
 
 logger = get_logger(__name__, "global_credibility.log")
+event_logger = get_event_logger(__name__, "global_credibility.log")
 
 
 class BayesianFusion:
@@ -125,13 +126,13 @@ class GlobalCredibility:
         new_trust = alpha * current_trust + (1 - alpha) * np.mean(history[-10:])
         
         self.agent_trust_scores[agent_id] = new_trust
-        logger.debug(f"Updated trust for agent {agent_id}: {new_trust:.3f}")
+        logger.debug("Updated trust for agent %s: %.3f", agent_id, new_trust)
     
     async def process_uer(self, uer: UnifiedEventReport) -> Dict[str, Any]:
         """
         Process UER through Global Credibility analysis
         """
-        logger.info(f"Processing UER {uer.event_id} through Global Credibility")
+        event_logger.info("Processing UER %s through Global Credibility", uer.event_id)
         
         # Get agent trust score
         agent_trust = self.get_agent_trust_score(uer.agent_id)
@@ -163,8 +164,8 @@ class GlobalCredibility:
         posterior = self.bayesian_fusion.calculate_posterior(belief)
         
         logger.debug(
-            f"UER {uer.event_id}: belief={belief:.3f}, "
-            f"plausibility={plausibility:.3f}, posterior={posterior:.3f}"
+            "UER %s: belief=%.3f, plausibility=%.3f, posterior=%.3f",
+            uer.event_id, belief, plausibility, posterior
         )
         
         return {
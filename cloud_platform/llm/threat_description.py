@@ -34,7 +34,7 @@ class LLMThreatDescriptionEngine:
         「來自 10.0.0.5 的 MQTT 流量平均封包大小 142 byte，間隔為 22ms，
         可能為 T1041 資料外洩通道。模型評分為 0.88，置信度 0.91。」
         """
-        logger.debug(f"Generating threat description for UER {uer.event_id}")
+        logger.debug("Generating threat description for UER %s", uer.event_id)
         
         # Extract key information
         protocol = uer.protocol_info.protocol_type
@@ -1,7 +1,8 @@
 """
 UER Gateway - Receives and validates UERs from Edge Agents
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Union
+import json
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Form, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 import uvicorn
@@ -9,7 +10,9 @@ import os
 from starlette.middleware.sessions import SessionMiddleware
 
 from shared.models.uer_schema import UnifiedEventReport
-from shared.utils.logger import get_logger
+from shared.models.uer_wire import UER_PROTOBUF_CONTENT_TYPE, UERTooLargeError, decode_uer_batch
+from google.protobuf.message import DecodeError
+from shared.utils.logger import get_event_logger, get_logger
 from sqlalchemy.orm import Session
 from shared.utils.db import get_db
 from shared.utils.user_store_db import (
@@ -21,6 +24,7 @@ from shared.utils.user_store_db import (
 )
 
 logger = get_logger(__name__, "uer_gateway.log")
+event_logger = get_event_logger(__name__, "uer_gateway.log")
 
 app = FastAPI(title="CoMIDF UER Gateway")
 
@@ -80,17 +84,17 @@ class UERGateway:
         self.received_count = 0
         self.error_count = 0
     
-    async def receive_uer(self, uer_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Receive and process a UER"""
+    async def receive_uer(self, uer_data: Union[Dict[str, Any], UnifiedEventReport]) -> Dict[str, Any]:
+        """Receive and process a UER (raw dict, or a model already decoded from protobuf)"""
         try:
             # Validate UER
-            uer = UnifiedEventReport(**uer_data)
+            uer = uer_data if isinstance(uer_data, UnifiedEventReport) else UnifiedEventReport(**uer_data)
             
             # Forward to Global Credibility module
             result = await self.gc_client.process_uer(uer)
             
             self.received_count += 1
-            logger.info(f"Processed UER {uer.event_id} from agent {uer.agent_id}")
+            event_logger.info("Processed UER %s from agent %s", uer.event_id, uer.agent_id)
             
             return {
                 "status": "success",
@@ -99,8 +103,25 @@ class UERGateway:
             }
         except Exception as e:
             self.error_count += 1
-            logger.error(f"Failed to process UER: {e}")
+            event_logger.error("Failed to process UER: %s", e)
             raise HTTPException(status_code=400, detail=str(e))
+    
+    async def receive_batch(self, uers: Sequence[Union[Dict[str, Any], UnifiedEventReport]]) -> Dict[str, Any]:
+        """Receive a batch of UERs; invalid entries are rejected individually"""
+        accepted = 0
+        rejected = []
+        for index, uer_data in enumerate(uers):
+            try:
+                await self.receive_uer(uer_data)
+                accepted += 1
+            except HTTPException as e:
+                rejected.append({"index": index, "detail": e.detail})
+        
+        return {
+            "status": "success" if not rejected else "partial",
+            "accepted": accepted,
+            "rejected": rejected
+        }
 
 
 # Global gateway instance (would be initialized properly in production)
@@ -119,6 +140,31 @@ async def receive_unified_event_report(
     return await gateway.receive_uer(uer_data)
 
 
+@app.post("/api/v1/uer/batch")
+async def receive_unified_event_report_batch(request: Request):
+    """Receive a batch of UERs (protobuf UERBatch or JSON) from an Edge Agent"""
+    if not gateway:
+        raise HTTPException(status_code=503, detail="Gateway not initialized")
+    
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith(UER_PROTOBUF_CONTENT_TYPE):
+        try:
+            uers = decode_uer_batch(body)
+        except UERTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except (DecodeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid UERBatch: {e}")
+    else:
+        try:
+            uers = json.loads(body).get("uers")
+        except (ValueError, AttributeError):
+            uers = None
+        if not isinstance(uers, list):
+            raise HTTPException(status_code=400, detail="Batch must contain a 'uers' list")
+    
+    return await gateway.receive_batch(uers)
+
+
 @app.get("/api/v1/uer/stats")
 async def get_gateway_stats():
     """Get gateway statistics"""
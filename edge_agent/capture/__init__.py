@@ -0,0 +1,15 @@
+"""Packet capture package"""
+from edge_agent.capture.packet import CapturedPacket, decode_frame, decode_link_frame
+from edge_agent.capture.pcap import PcapReader
+from edge_agent.capture.replay import ReplayReport, StageTimer
+from edge_agent.capture.tpacket import TPacketV3Capture
+
+__all__ = [
+    'CapturedPacket',
+    'decode_frame',
+    'decode_link_frame',
+    'PcapReader',
+    'ReplayReport',
+    'StageTimer',
+    'TPacketV3Capture'
+]
@@ -0,0 +1,173 @@
+"""
+Captured Packet - L2/L3/L4 decoding of raw link-layer frames
+"""
+from typing import NamedTuple, Optional
+import socket
+import struct
+
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+
+ETH_P_IP = 0x0800
+ETH_P_IPV6 = 0x86DD
+ETH_P_8021Q = 0x8100
+ETH_P_8021AD = 0x88A8
+
+# pcap/pcapng link-layer types
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+ETH_HEADER_LEN = 14
+SLL_HEADER_LEN = 16
+SLL2_HEADER_LEN = 20
+NULL_HEADER_LEN = 4
+VLAN_HEADER_LEN = 4
+UDP_HEADER_LEN = 8
+
+# IPv6 extension headers that can be skipped with the generic (next, len) layout
+_IPV6_EXT_HEADERS = {0, 43, 60}
+_IPV6_FRAGMENT = 44
+
+_U16 = struct.Struct('!H')
+_PORTS = struct.Struct('!HH')
+
+
+class CapturedPacket(NamedTuple):
+    """Decoded packet handed from capture backends to the edge pipeline"""
+    payload: memoryview  # L4 payload, a view into the capture buffer
+    src_ip: str
+    dst_ip: str
+    src_port: int
+    dst_port: int
+    ip_proto: int  # IPPROTO_TCP or IPPROTO_UDP
+    timestamp: float
+
+
+def decode_frame(frame: memoryview, timestamp: float) -> Optional[CapturedPacket]:
+    """
+    Decode an Ethernet frame down to its TCP/UDP payload
+
+    Args:
+        frame: Link-layer frame starting at the Ethernet header
+        timestamp: Capture timestamp in seconds
+
+    Returns:
+        CapturedPacket whose payload is a zero-copy view into ``frame``,
+        or None for non-IP, non-TCP/UDP or truncated frames
+    """
+    frame_len = len(frame)
+    if frame_len < ETH_HEADER_LEN:
+        return None
+
+    ethertype = _U16.unpack_from(frame, 12)[0]
+    offset = ETH_HEADER_LEN
+    while ethertype in (ETH_P_8021Q, ETH_P_8021AD):
+        if frame_len < offset + VLAN_HEADER_LEN:
+            return None
+        ethertype = _U16.unpack_from(frame, offset + 2)[0]
+        offset += VLAN_HEADER_LEN
+
+    return decode_ip(frame, offset, timestamp, ethertype)
+
+
+def decode_link_frame(
+    frame: memoryview,
+    timestamp: float,
+    linktype: int = LINKTYPE_ETHERNET
+) -> Optional[CapturedPacket]:
+    """Decode a frame of the given pcap link-layer type down to its TCP/UDP payload"""
+    if linktype == LINKTYPE_ETHERNET:
+        return decode_frame(frame, timestamp)
+    if linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        return decode_ip(frame, 0, timestamp)
+    if linktype == LINKTYPE_LINUX_SLL:
+        if len(frame) < SLL_HEADER_LEN:
+            return None
+        return decode_ip(frame, SLL_HEADER_LEN, timestamp, _U16.unpack_from(frame, 14)[0])
+    if linktype == LINKTYPE_LINUX_SLL2:
+        if len(frame) < SLL2_HEADER_LEN:
+            return None
+        return decode_ip(frame, SLL2_HEADER_LEN, timestamp, _U16.unpack_from(frame, 0)[0])
+    if linktype == LINKTYPE_NULL:
+        # Address family is in host byte order of the capturing machine
+        return decode_ip(frame, NULL_HEADER_LEN, timestamp)
+    return None
+
+
+def decode_ip(
+    frame: memoryview,
+    offset: int,
+    timestamp: float,
+    ethertype: Optional[int] = None
+) -> Optional[CapturedPacket]:
+    """Decode an IPv4/IPv6 packet starting at ``offset`` down to its L4 payload"""
+    frame_len = len(frame)
+    if offset >= frame_len:
+        return None
+
+    version = frame[offset] >> 4
+    if ethertype is None:
+        ethertype = ETH_P_IP if version == 4 else ETH_P_IPV6
+
+    if ethertype == ETH_P_IP and version == 4:
+        ihl = (frame[offset] & 0x0F) * 4
+        if ihl < 20 or frame_len < offset + ihl:
+            return None
+        # Non-first fragments carry no L4 header
+        if _U16.unpack_from(frame, offset + 6)[0] & 0x1FFF:
+            return None
+        ip_end = min(offset + _U16.unpack_from(frame, offset + 2)[0], frame_len)
+        ip_proto = frame[offset + 9]
+        src_ip = socket.inet_ntop(socket.AF_INET, frame[offset + 12:offset + 16])
+        dst_ip = socket.inet_ntop(socket.AF_INET, frame[offset + 16:offset + 20])
+        l4_offset = offset + ihl
+    elif ethertype == ETH_P_IPV6 and version == 6:
+        if frame_len < offset + 40:
+            return None
+        ip_end = min(offset + 40 + _U16.unpack_from(frame, offset + 4)[0], frame_len)
+        ip_proto = frame[offset + 6]
+        src_ip = socket.inet_ntop(socket.AF_INET6, frame[offset + 8:offset + 24])
+        dst_ip = socket.inet_ntop(socket.AF_INET6, frame[offset + 24:offset + 40])
+        l4_offset = offset + 40
+        while ip_proto in _IPV6_EXT_HEADERS or ip_proto == _IPV6_FRAGMENT:
+            if ip_end < l4_offset + 8:
+                return None
+            next_header = frame[l4_offset]
+            if ip_proto == _IPV6_FRAGMENT:
+                if _U16.unpack_from(frame, l4_offset + 2)[0] & 0xFFF8:
+                    return None
+                l4_offset += 8
+            else:
+                l4_offset += (frame[l4_offset + 1] + 1) * 8
+            ip_proto = next_header
+    else:
+        return None
+
+    if ip_proto == IPPROTO_TCP:
+        if ip_end < l4_offset + 20:
+            return None
+        header_len = (frame[l4_offset + 12] >> 4) * 4
+    elif ip_proto == IPPROTO_UDP:
+        header_len = UDP_HEADER_LEN
+    else:
+        return None
+
+    payload_offset = l4_offset + header_len
+    if ip_end < payload_offset:
+        return None
+
+    src_port, dst_port = _PORTS.unpack_from(frame, l4_offset)
+    return CapturedPacket(
+        frame[payload_offset:ip_end],
+        src_ip,
+        dst_ip,
+        src_port,
+        dst_port,
+        ip_proto,
+        timestamp
+    )
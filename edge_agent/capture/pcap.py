@@ -0,0 +1,203 @@
+"""
+Pcap Reader - Memory-mapped reader for classic pcap and pcapng capture files
+"""
+from typing import Dict, Iterator, List, Tuple
+import mmap
+import struct
+
+from edge_agent.capture.packet import LINKTYPE_ETHERNET
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PCAP_MAGIC_USEC = 0xA1B2C3D4
+PCAP_MAGIC_NSEC = 0xA1B23C4D
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+
+# pcapng block types
+_IDB = 0x00000001
+_SPB = 0x00000003
+_EPB = 0x00000006
+
+# pcapng interface option carrying timestamp resolution
+_IF_TSRESOL = 9
+
+Record = Tuple[memoryview, float, int]
+Frame = Tuple[memoryview, float]
+
+
+def _release(frame: memoryview) -> None:
+    try:
+        frame.release()
+    except BufferError:
+        # Still exported by the consumer
+        pass
+
+
+class PcapReader:
+    """
+    Iterate over the frames of a pcap or pcapng file without copying them
+
+    Yields (frame, timestamp, linktype) tuples where ``frame`` is a
+    ``memoryview`` into the memory-mapped file, valid until the next record.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._map = None
+        self._view = None
+
+    def open(self) -> None:
+        """Memory-map the capture file"""
+        self._file = open(self.path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file cannot be mapped
+            self._file.close()
+            self._file = None
+            raise ValueError(f"Empty capture file: {self.path}")
+        self._view = memoryview(self._map)
+
+    def close(self) -> None:
+        """Unmap and close the capture file"""
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                logger.warning("Capture file still referenced, deferring unmap")
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'PcapReader':
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[Record]:
+        for record in self._records():
+            try:
+                yield record
+            finally:
+                _release(record[0])
+
+    def batches(self, batch_size: int = 256) -> Iterator[Tuple[List[Frame], int]]:
+        """
+        Yield (frames, linktype) batches of up to ``batch_size`` records
+
+        A batch never mixes link types; its frame views are released when the
+        consumer advances to the next batch.
+        """
+        frames: List[Frame] = []
+        batch_linktype = None
+        records = self._records()
+        while True:
+            record = next(records, None)
+            if frames and (record is None or record[2] != batch_linktype or len(frames) >= batch_size):
+                try:
+                    yield frames, batch_linktype
+                finally:
+                    for frame, _ in frames:
+                        _release(frame)
+                frames = []
+            if record is None:
+                return
+            frames.append((record[0], record[1]))
+            batch_linktype = record[2]
+
+    def _records(self) -> Iterator[Record]:
+        if self._view is None:
+            raise RuntimeError("Capture file is not open")
+        if len(self._view) < 24:
+            raise ValueError(f"Not a pcap/pcapng file: {self.path}")
+
+        magic = struct.unpack_from('<I', self._view, 0)[0]
+        if magic == PCAPNG_SHB:
+            return self._iter_pcapng()
+
+        for endian in ('<', '>'):
+            magic = struct.unpack_from(endian + 'I', self._view, 0)[0]
+            if magic in (PCAP_MAGIC_USEC, PCAP_MAGIC_NSEC):
+                return self._iter_pcap(endian, 1e-9 if magic == PCAP_MAGIC_NSEC else 1e-6)
+
+        raise ValueError(f"Not a pcap/pcapng file: {self.path}")
+
+    def _iter_pcap(self, endian: str, ts_scale: float) -> Iterator[Record]:
+        view = self._view
+        linktype = struct.unpack_from(endian + 'I', view, 20)[0] & 0x0FFFFFFF
+        record_header = struct.Struct(endian + 'IIII')
+        end = len(view)
+        offset = 24
+
+        while offset + record_header.size <= end:
+            ts_sec, ts_frac, caplen, _ = record_header.unpack_from(view, offset)
+            offset += record_header.size
+            if offset + caplen > end:
+                logger.warning(f"Truncated record at offset {offset} in {self.path}")
+                return
+            yield view[offset:offset + caplen], ts_sec + ts_frac * ts_scale, linktype
+            offset += caplen
+
+    def _iter_pcapng(self) -> Iterator[Record]:
+        view = self._view
+        end = len(view)
+        offset = 0
+        endian = '<'
+        # Per-section interface table: (linktype, seconds per timestamp unit)
+        interfaces: Dict[int, Tuple[int, float]] = {}
+
+        while offset + 12 <= end:
+            block_type = struct.unpack_from(endian + 'I', view, offset)[0]
+            if block_type == PCAPNG_SHB:
+                bom = struct.unpack_from('<I', view, offset + 8)[0]
+                endian = '<' if bom == PCAPNG_BYTE_ORDER_MAGIC else '>'
+                interfaces = {}
+
+            block_len = struct.unpack_from(endian + 'I', view, offset + 4)[0]
+            if block_len < 12 or offset + block_len > end:
+                logger.warning(f"Truncated block at offset {offset} in {self.path}")
+                return
+            body = offset + 8
+
+            if block_type == _IDB:
+                linktype = struct.unpack_from(endian + 'H', view, body)[0]
+                ts_unit = self._parse_tsresol(view, body + 8, offset + block_len - 4, endian)
+                interfaces[len(interfaces)] = (linktype, ts_unit)
+            elif block_type == _EPB:
+                if_id, ts_high, ts_low, caplen, _ = struct.unpack_from(endian + 'IIIII', view, body)
+                linktype, ts_unit = interfaces.get(if_id, (LINKTYPE_ETHERNET, 1e-6))
+                data = body + 20
+                timestamp = ((ts_high << 32) | ts_low) * ts_unit
+                yield view[data:data + caplen], timestamp, linktype
+            elif block_type == _SPB:
+                orig_len = struct.unpack_from(endian + 'I', view, body)[0]
+                linktype, _ = interfaces.get(0, (LINKTYPE_ETHERNET, 1e-6))
+                caplen = min(orig_len, block_len - 16)
+                data = body + 4
+                yield view[data:data + caplen], 0.0, linktype
+
+            offset += block_len
+
+    @staticmethod
+    def _parse_tsresol(view: memoryview, offset: int, end: int, endian: str) -> float:
+        """Read if_tsresol from IDB options, defaulting to microseconds"""
+        while offset + 4 <= end:
+            code, length = struct.unpack_from(endian + 'HH', view, offset)
+            if code == 0:
+                break
+            if code == _IF_TSRESOL and length >= 1:
+                resol = view[offset + 4]
+                if resol & 0x80:
+                    return 2.0 ** -(resol & 0x7F)
+                return 10.0 ** -resol
+            offset += 4 + ((length + 3) & ~3)
+        return 1e-6
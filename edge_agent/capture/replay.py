@@ -0,0 +1,88 @@
+"""
+Offline Replay - Stage timing and throughput reporting for pcap replays
+"""
+from typing import Dict, List
+import time
+
+
+class StageTimer:
+    """Accumulates per-stage latency of the packet pipeline"""
+
+    def __init__(self):
+        self.totals_ns: Dict[str, int] = {}
+        self.counts: Dict[str, int] = {}
+        self.max_ns: Dict[str, int] = {}
+        self._last = 0
+
+    def start(self) -> None:
+        """Mark the beginning of a packet"""
+        self._last = time.perf_counter_ns()
+
+    def lap(self, stage: str, count: int = 1) -> None:
+        """Attribute the time since the previous mark to ``count`` packets of ``stage``"""
+        now = time.perf_counter_ns()
+        elapsed = now - self._last
+        self._last = now
+        self.totals_ns[stage] = self.totals_ns.get(stage, 0) + elapsed
+        self.counts[stage] = self.counts.get(stage, 0) + count
+        per_packet = elapsed // count if count > 1 else elapsed
+        if per_packet > self.max_ns.get(stage, 0):
+            self.max_ns[stage] = per_packet
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Mean/max latency in microseconds per stage"""
+        return {
+            stage: {
+                'count': self.counts[stage],
+                'mean_us': self.totals_ns[stage] / self.counts[stage] / 1000,
+                'max_us': self.max_ns[stage] / 1000
+            }
+            for stage in self.totals_ns
+        }
+
+
+class ReplayReport:
+    """Throughput summary for one replay run"""
+
+    def __init__(self, path: str, speed: str):
+        self.path = path
+        self.speed = speed
+        self.frame_count = 0
+        self.packet_count = 0  # frames that reached a protocol agent
+        self.uer_count = 0
+        self.elapsed_s = 0.0
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def to_dict(self) -> Dict[str, float]:
+        """Report as a plain dict"""
+        elapsed = self.elapsed_s or 1e-9
+        return {
+            'path': self.path,
+            'speed': self.speed,
+            'frames': self.frame_count,
+            'packets': self.packet_count,
+            'uers': self.uer_count,
+            'elapsed_s': self.elapsed_s,
+            'frames_per_s': self.frame_count / elapsed,
+            'packets_per_s': self.packet_count / elapsed,
+            'uers_per_s': self.uer_count / elapsed,
+            'stages': self.stages
+        }
+
+    def format(self) -> str:
+        """Human-readable report"""
+        data = self.to_dict()
+        lines: List[str] = [
+            f"Replay of {self.path} ({self.speed})",
+            f"  frames:   {data['frames']:>12d}  {data['frames_per_s']:>14.1f} /s",
+            f"  packets:  {data['packets']:>12d}  {data['packets_per_s']:>14.1f} /s",
+            f"  uers:     {data['uers']:>12d}  {data['uers_per_s']:>14.1f} /s",
+            f"  elapsed:  {self.elapsed_s:>12.3f} s",
+            "  stage latency (us):"
+        ]
+        for stage, stats in self.stages.items():
+            lines.append(
+                f"    {stage:<10s} n={stats['count']:<10d} "
+                f"mean={stats['mean_us']:<10.2f} max={stats['max_us']:.2f}"
+            )
+        return "\n".join(lines)
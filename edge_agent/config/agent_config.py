@@ -21,6 +21,7 @@ class AgentConfig(BaseModel):
     # Cloud Platform connection
     cloud_endpoint: str
     cloud_port: int = 443
+    cloud_pool_size: int = 2  # keep-alive mTLS connections to the Cloud Platform
     
     # Protocol agents to enable
     enabled_protocols: List[str] = [
@@ -30,6 +31,18 @@ class AgentConfig(BaseModel):
     # Detection thresholds
     risk_threshold: float = 0.7
     anomaly_threshold: float = 0.5
+    risk_model_path: Optional[str] = None  # JSON risk model; None uses the built-in rules
+    risk_model_reload_s: float = 5.0  # how often the model file is checked for changes
+    uer_coalesce_window_s: float = 10.0  # repeated alerts on a flow fold into one UER; 0 disables
+    uer_batch_size: int = 256  # UERs per request to the Cloud Platform
+    uer_flush_interval_ms: int = 50  # longest a queued UER waits for its batch to fill
+    uer_queue_size: int = 10000  # UERs beyond this are dropped instead of blocking
+    
+    # Store-and-forward spool for batches sent while the cloud is unreachable
+    spool_dir: Optional[str] = "/var/lib/comidf/spool"  # None disables spooling
+    spool_max_bytes: int = 256 * 1024 * 1024  # oldest segments are evicted beyond this
+    spool_segment_bytes: int = 8 * 1024 * 1024
+    spool_replay_bytes_per_s: int = 256 * 1024  # replay rate once the cloud is back
     
     # Certificate paths (mTLS)
     cert_path: Optional[str] = None
@@ -42,10 +55,25 @@ class AgentConfig(BaseModel):
     # Feature aggregation
     feature_aggregation_window: int = 60  # seconds
     flow_cache_timeout: int = 600  # seconds
+    max_flows: int = 100000  # least recently used flows are evicted beyond this
+    
+    # Packet capture (TPACKET_V3 ring on sniff_interface)
+    capture_block_size: int = 1 << 20  # bytes, multiple of the page size
+    capture_block_count: int = 64
+    capture_block_timeout_ms: int = 10
     
     # Performance settings
-    max_packet_buffer_size: int = 1000
-    max_uer_size_bytes: int = 10240
+    runtime: str = "asyncio"  # "asyncio" event loop, or "threaded" blocking capture loop
+    stats_interval_s: float = 60.0  # how often the asyncio runtime logs pipeline stats
+    worker_processes: int = 1  # >1 shards packets over processes by flow hash
+    max_packet_buffer_size: int = 1000  # backlog above this triggers load shedding
+    overload_latency_budget_ms: int = 200  # capture-to-done latency that triggers shedding
+    low_value_protocols: List[str] = ["HTTP", "QUIC"]  # sampled first under overload
+    max_uer_size_bytes: int = 10240  # encoded size; larger UERs lose their packet sample
+    uer_wire_format: str = "protobuf"  # "protobuf" (UERBatch envelope) or "json"
+    
+    # Monitoring
+    metrics_port: int = 9102  # Prometheus /metrics on the management interface; 0 disables
     
     # Additional settings
     debug_mode: bool = False
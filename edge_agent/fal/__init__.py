@@ -1,5 +1,22 @@
 """Feature Aggregation Layer package"""
-from edge_agent.fal.feature_aggregator import FeatureAggregationLayer, FlowStatistics
+from edge_agent.fal.dns_tunnel import DNSTunnelTracker
+from edge_agent.fal.entropy import batch_entropy, byte_entropy
+from edge_agent.fal.feature_aggregator import FeatureAggregationLayer
+from edge_agent.fal.flow_table import FlowTable, flow_hash, format_flow_key, pack_flow_key
+from edge_agent.fal.sketches import CountMinSketch, HyperLogLogBank
+from edge_agent.fal.windows import FlowWindows
 
-__all__ = ['FeatureAggregationLayer', 'FlowStatistics']
+__all__ = [
+    'CountMinSketch',
+    'DNSTunnelTracker',
+    'FeatureAggregationLayer',
+    'FlowTable',
+    'FlowWindows',
+    'HyperLogLogBank',
+    'batch_entropy',
+    'byte_entropy',
+    'flow_hash',
+    'format_flow_key',
+    'pack_flow_key'
+]
 
@@ -0,0 +1,81 @@
+"""
+DNS Tunnel Features - Per-client DNS tunneling indicators in fixed memory
+"""
+from typing import Any, Dict, Optional
+import time
+
+import numpy as np
+
+from edge_agent.fal.sketches import CountMinSketch, HyperLogLogBank
+
+# Counters kept per client in the count-min sketch
+_QUERIES, _QNAME_LENGTH, _LABEL_ENTROPY, _RESPONSES, _NXDOMAIN = range(5)
+
+NXDOMAIN = 3
+
+
+class DNSTunnelTracker:
+    """
+    Incremental per-client DNS tunneling features
+
+    Tunnels encode data into many long, high-entropy, never-repeated
+    subdomains of one registered domain, and the resolver answers most of
+    them with NXDOMAIN. Per client (the querying address) a count-min sketch
+    keeps query count, summed QNAME length, summed subdomain label entropy,
+    response count and NXDOMAIN count; a HyperLogLog bank counts distinct
+    query names per registered domain. Neither grows with the number of
+    clients or names, so a random-subdomain flood costs no extra memory.
+
+    Every ``window_s`` seconds the per-client totals are halved and the
+    distinct counts restart, so the features follow current behaviour.
+    """
+
+    def __init__(
+        self,
+        window_s: float = 300.0,
+        client_width: int = 4096,
+        domain_counters: int = 1024,
+        depth: int = 4,
+        precision: int = 8
+    ):
+        self.window_s = window_s
+        self.clients = CountMinSketch(width=client_width, depth=depth, counters=5)
+        self.domains = HyperLogLogBank(counters=domain_counters, precision=precision, depth=2)
+        self._next_window = time.monotonic() + window_s
+
+    def _roll(self) -> None:
+        now = time.monotonic()
+        if now >= self._next_window:
+            self.clients.decay(0.5)
+            self.domains.reset()
+            self._next_window = now + self.window_s
+
+    def query(self, client: str, registered_domain: str, qname: str,
+              qname_length: int, label_entropy: float) -> Dict[str, Any]:
+        """Count a query from ``client`` and return its current features"""
+        self._roll()
+        totals = self.clients.add(client, np.array((1.0, qname_length, label_entropy, 0.0, 0.0)))
+        distinct = self.domains.add(registered_domain, qname) if registered_domain else 0.0
+        return self._features(totals, distinct)
+
+    def response(self, client: str, registered_domain: Optional[str], rcode: int) -> Dict[str, Any]:
+        """Count a response to ``client`` and return its current features"""
+        self._roll()
+        totals = self.clients.add(client, np.array((0.0, 0.0, 0.0, 1.0, 1.0 if rcode == NXDOMAIN else 0.0)))
+        distinct = self.domains.estimate(registered_domain) if registered_domain else 0.0
+        return self._features(totals, distinct)
+
+    @staticmethod
+    def _features(totals: np.ndarray, distinct: float) -> Dict[str, Any]:
+        queries = totals[_QUERIES]
+        responses = totals[_RESPONSES]
+        return {
+            'client_mean_qname_length': float(totals[_QNAME_LENGTH] / queries) if queries else 0.0,
+            'client_mean_label_entropy': float(totals[_LABEL_ENTROPY] / queries) if queries else 0.0,
+            'client_nxdomain_rate': float(min(totals[_NXDOMAIN] / responses, 1.0)) if responses else 0.0,
+            'distinct_subdomains': round(distinct)
+        }
+
+    def memory_bytes(self) -> int:
+        """Fixed footprint of the sketches"""
+        return self.clients.nbytes + self.domains.nbytes
@@ -0,0 +1,49 @@
+"""
+Byte Entropy - Vectorized Shannon entropy of payload bytes
+"""
+from typing import Sequence, Union
+
+import numpy as np
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Entropy of uniformly random bytes; the upper bound of every value returned here
+MAX_BYTE_ENTROPY = 8.0
+
+
+def _entropy_from_counts(counts: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    """Shannon entropy in bits per byte for each row of a (n, 256) count matrix"""
+    totals = totals.astype(np.float64)
+    probs = counts / np.where(totals > 0, totals, 1.0)[:, None]
+    logs = np.log2(probs, out=np.zeros_like(probs), where=counts > 0)
+    return 0.0 - (probs * logs).sum(axis=1)
+
+
+def byte_entropy(data: Buffer) -> float:
+    """Shannon entropy of a single payload, in bits per byte (0.0 - 8.0)"""
+    if not len(data):
+        return 0.0
+    counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+    return float(_entropy_from_counts(counts[None, :], np.array([counts.sum()]))[0])
+
+
+def batch_entropy(payloads: Sequence[Buffer]) -> np.ndarray:
+    """
+    Shannon entropy of many payloads in one pass
+
+    All payloads are concatenated once and counted with a single
+    ``np.bincount`` keyed by (payload index, byte value).
+
+    Returns:
+        float64 array with one entropy value per payload
+    """
+    count = len(payloads)
+    if count == 0:
+        return np.zeros(0)
+
+    lengths = np.fromiter((len(payload) for payload in payloads), dtype=np.int64, count=count)
+    data = np.frombuffer(b''.join(payloads), dtype=np.uint8)
+    rows = np.repeat(np.arange(count, dtype=np.int64), lengths)
+    counts = np.bincount((rows << 8) | data, minlength=count * 256).reshape(count, 256)
+    return _entropy_from_counts(counts, lengths)
+
@@ -2,186 +2,133 @@
 Feature Aggregation Layer (FAL) - Aggregates features from multiple protocol agents
 """
 from typing import Dict, List, Any, Optional
-from collections import defaultdict
-import statistics
 import time
 
+from edge_agent.fal.entropy import byte_entropy
+from edge_agent.fal.flow_table import (
+    FlowEndCallback, FlowTable, flow_key_and_direction, pack_flow_key
+)
+from edge_agent.fal.windows import FlowWindows
 from shared.models.uer_schema import UnifiedEventReport
 from shared.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
-class FlowStatistics:
-    """Tracks flow statistics for aggregation"""
-    
-    def __init__(self):
-        self.packet_lengths: List[int] = []
-        self.inter_arrival_times: List[float] = []
-        self.packet_timestamps: List[float] = []
-        self.total_bytes = 0
-        self.packet_count = 0
-        self.direction = 'unknown'
-        self.flow_key = None
-    
-    def add_packet(self, length: int, timestamp: Optional[float] = None):
-        """Add packet to flow statistics"""
-        self.packet_lengths.append(length)
-        self.total_bytes += length
-        self.packet_count += 1
-        
-        if timestamp:
-            self.packet_timestamps.append(timestamp)
-            if len(self.packet_timestamps) > 1:
-                iat = timestamp - self.packet_timestamps[-2]
-                self.inter_arrival_times.append(iat)
-    
-    def get_mean_packet_length(self) -> float:
-        """Calculate mean packet length"""
-        if not self.packet_lengths:
-            return 0.0
-        return statistics.mean(self.packet_lengths)
-    
-    def get_mean_inter_arrival_time(self) -> float:
-        """Calculate mean inter-arrival time"""
-        if not self.inter_arrival_times:
-            return 0.0
-        return statistics.mean(self.inter_arrival_times) * 1000  # Convert to ms
-    
-    def get_duration(self) -> float:
-        """Get total flow duration"""
-        if len(self.packet_timestamps) < 2:
-            return 0.0
-        return (self.packet_timestamps[-1] - self.packet_timestamps[0]) * 1000  # ms
-    
-    def calculate_entropy(self) -> float:
-        """Calculate packet length entropy"""
-        if not self.packet_lengths:
-            return 0.0
-        
-        # Discretize packet lengths into bins
-        bins = defaultdict(int)
-        for length in self.packet_lengths:
-            bins[length // 10] += 1  # 10-byte bins
-        
-        total = len(self.packet_lengths)
-        entropy = 0.0
-        
-        for count in bins.values():
-            prob = count / total
-            if prob > 0:
-                entropy -= prob * (prob.bit_length() - 1)
-        
-        return entropy
-
-
 class FeatureAggregationLayer:
-    """Aggregates features and creates UERs for multiple protocols"""
+    """
+    Aggregates features and creates UERs for multiple protocols
     
-    def __init__(self, config: Dict[str, Any]):
+    Flows live in a preallocated :class:`FlowTable`: idle flows expire after
+    ``flow_cache_timeout`` seconds, and inserting beyond ``max_flows`` evicts
+    the least recently used flow. Each flow also gets tumbling/sliding windows
+    of ``feature_aggregation_window`` seconds.
+    """
+    
+    def __init__(self, config: Dict[str, Any], on_flow_end: Optional[FlowEndCallback] = None):
         self.config = config
-        self.flow_cache: Dict[str, FlowStatistics] = {}
         self.cache_timeout = config.get('flow_cache_timeout', 600)  # 10 minutes
-        self.last_cleanup = time.time()
+        self.max_flows = config.get('max_flows', 100000)
+        self.on_flow_end = on_flow_end
+        self.flow_table = FlowTable(
+            capacity=self.max_flows,
+            timeout=self.cache_timeout,
+            on_flow_end=on_flow_end
+        )
+        self.window_seconds = config.get('feature_aggregation_window', 60)
+        self.windows = FlowWindows(self.max_flows, window_s=self.window_seconds)
     
-    def create_flow_key(self, src_ip: str, dst_ip: str, src_port: int, dst_port: int) -> str:
+    @staticmethod
+    def create_flow_key(src_ip: str, dst_ip: str, src_port: int, dst_port: int) -> int:
         """Create a unique key for flow identification"""
-        # Normalize: use smaller IP first
-        ips = sorted([src_ip, dst_ip])
-        ports = sorted([src_port, dst_port])
-        return f"{ips[0]}:{ports[0]}-{ips[1]}:{ports[1]}"
+        # Normalized (address, port) endpoints packed into one integer
+        return pack_flow_key(src_ip, dst_ip, src_port, dst_port)
     
-    def get_or_create_flow(
+    def update_packet(
         self,
-        flow_key: str,
         src_ip: str,
         dst_ip: str,
         src_port: int,
-        dst_port: int
-    ) -> FlowStatistics:
-        """Get existing flow or create new one"""
-        if flow_key not in self.flow_cache:
-            flow_stats = FlowStatistics()
-            flow_stats.flow_key = flow_key
-            # Determine direction based on IP
-            flow_stats.direction = 'outbound' if src_ip != dst_ip else 'bidirectional'
-            self.flow_cache[flow_key] = flow_stats
+        dst_port: int,
+        length: int,
+        timestamp: Optional[float] = None,
+        ip_proto: int = 0,
+        entropy: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Add one packet to its flow and return the flow's feature snapshot
+        
+        Args:
+            length: L4 payload length
+            timestamp: Capture time; the current time when not given
+            ip_proto: IP protocol number, part of the flow identity
+            entropy: Payload byte entropy, averaged over the flow
+        
+        Returns:
+            Feature dict in the ``aggregate_features`` layout plus the
+            ``window_*``/``tumbling_*`` features, suitable as the
+            ``flow_stats`` argument of ``extract_flow_features``
+        """
+        if not timestamp:
+            timestamp = time.time()
+        key, reverse = flow_key_and_direction(src_ip, dst_ip, src_port, dst_port, ip_proto)
+        table = self.flow_table
+        row = table.get_or_create(key)
+        table.update(row, length, timestamp, reverse, entropy)
         
-        return self.flow_cache[flow_key]
+        features = table.features(row)
+        if features['packet_count'] == 1:
+            self.windows.reset(row)
+        self.windows.add(row, timestamp, length, entropy)
+        features.update(self.windows.features(row, timestamp))
+        return features
     
     def aggregate_features(
         self,
         packets: List[Dict[str, Any]],
         protocol_agent
     ) -> Dict[str, Any]:
-        """Aggregate features from multiple packets in a flow"""
-        if not packets:
-            return {}
+        """
+        Add packet dicts to their flows and return the features per flow
         
-        # Group packets by flow
-        flows: Dict[str, List[Dict]] = defaultdict(list)
+        Packets carry ``src_ip``, ``dst_ip``, ``src_port``, ``dst_port`` and
+        optionally ``data``, ``timestamp`` and ``ip_proto``. Each flow's
+        entry is the snapshot after its last packet in ``packets``.
+        """
+        aggregated_features = {}
         for packet in packets:
-            flow_key = self.create_flow_key(
+            data = packet.get('data', b'')
+            ip_proto = packet.get('ip_proto', 0)
+            flow_key, _ = flow_key_and_direction(
+                packet['src_ip'], packet['dst_ip'], packet['src_port'], packet['dst_port'], ip_proto
+            )
+            aggregated_features[flow_key] = self.update_packet(
                 packet['src_ip'],
                 packet['dst_ip'],
                 packet['src_port'],
-                packet['dst_port']
+                packet['dst_port'],
+                len(data),
+                packet.get('timestamp'),
+                ip_proto,
+                byte_entropy(data) if data else None
             )
-            flows[flow_key].append(packet)
         
-        # Aggregate statistics for each flow
-        aggregated_features = {}
-        for flow_key, flow_packets in flows.items():
-            if not flow_packets:
-                continue
-            
-            # Get or create flow statistics
-            flow_stats = self.get_or_create_flow(
-                flow_key,
-                flow_packets[0]['src_ip'],
-                flow_packets[0]['dst_ip'],
-                flow_packets[0]['src_port'],
-                flow_packets[0]['dst_port']
-            )
-            
-            # Add all packets to statistics
-            for packet in flow_packets:
-                flow_stats.add_packet(
-                    len(packet.get('data', b'')),
-                    packet.get('timestamp', time.time())
-                )
-            
-            # Calculate aggregated features
-            aggregated_features[flow_key] = {
-                'packet_count': flow_stats.packet_count,
-                'byte_count': flow_stats.total_bytes,
-                'duration_ms': flow_stats.get_duration(),
-                'mean_packet_length': flow_stats.get_mean_packet_length(),
-                'mean_inter_arrival_time': flow_stats.get_mean_inter_arrival_time(),
-                'entropy': flow_stats.calculate_entropy(),
-                'direction': flow_stats.direction
-            }
-        
-        self.cleanup_old_flows()
         return aggregated_features
     
-    def cleanup_old_flows(self):
-        """Remove flows that haven't been updated recently"""
-        current_time = time.time()
-        if current_time - self.last_cleanup < self.cache_timeout:
-            return
-        
-        # Remove flows older than timeout
-        flows_to_remove = []
-        for flow_key, flow_stats in self.flow_cache.items():
-            if flow_stats.packet_timestamps:
-                last_packet_time = flow_stats.packet_timestamps[-1]
-                if current_time - last_packet_time > self.cache_timeout:
-                    flows_to_remove.append(flow_key)
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Remove flows that haven't been updated within the cache timeout
         
-        for key in flows_to_remove:
-            del self.flow_cache[key]
-        
-        self.last_cleanup = current_time
-        logger.debug(f"Cleaned up {len(flows_to_remove)} old flows")
-
+        Returns:
+            Number of flows expired
+        """
+        expired = self.flow_table.expire(now)
+        if expired:
+            logger.debug(f"Cleaned up {expired} old flows")
+        return expired
+    
+    def stats(self) -> Dict[str, int]:
+        """Flow table occupancy, expiry and eviction counters"""
+        stats = self.flow_table.stats()
+        stats['window_slots'] = self.windows.slot_count
+        return stats
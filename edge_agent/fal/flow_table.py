@@ -0,0 +1,375 @@
+"""
+Flow Table - Packed integer flow keys and a preallocated NumPy flow state table
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+import socket
+import time
+
+import numpy as np
+
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# An endpoint packs as (address << 16 | port); bit 128 of the address marks IPv6
+# so that IPv4 addresses never collide with IPv4-compatible IPv6 addresses.
+_IPV6_FLAG = 1 << 128
+_ENDPOINT_BITS = 129 + 16
+_KEY_WORDS = 5  # 2 endpoints + 8-bit protocol fit in 5 x 64 bits
+_WORD_MASK = (1 << 64) - 1
+
+# Per-flow running statistics; keys and hashes live in parallel arrays
+FLOW_DTYPE = np.dtype([
+    ('packet_count', '<u4'),
+    ('directions', 'u1'),  # bit 0: seen low -> high endpoint, bit 1: high -> low
+    ('total_bytes', '<u8'),
+    ('min_length', '<u4'),
+    ('max_length', '<u4'),
+    ('mean_length', '<f8'),
+    ('m2_length', '<f8'),
+    ('first_timestamp', '<f8'),
+    ('last_timestamp', '<f8'),
+    ('iat_count', '<u4'),
+    ('mean_iat', '<f8'),
+    ('m2_iat', '<f8'),
+    ('mean_entropy', '<f4'),
+    ('entropy_count', '<u4'),  # packets that carried an entropy sample
+    ('last_seen', '<f8'),
+])
+
+# Called with (flow key, final features, reason) when a flow leaves the table
+FlowEndCallback = Callable[[int, Dict[str, Any], str], None]
+
+
+def ip_to_int(ip: str) -> int:
+    """IPv4/IPv6 text address as an integer, IPv6 flagged above bit 127"""
+    if ':' in ip:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big') | _IPV6_FLAG
+    return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+
+
+def int_to_ip(value: int) -> str:
+    """Inverse of :func:`ip_to_int`"""
+    if value & _IPV6_FLAG:
+        return socket.inet_ntop(socket.AF_INET6, (value ^ _IPV6_FLAG).to_bytes(16, 'big'))
+    return socket.inet_ntop(socket.AF_INET, value.to_bytes(4, 'big'))
+
+
+def flow_key_and_direction(
+    src_ip: str,
+    dst_ip: str,
+    src_port: int,
+    dst_port: int,
+    ip_proto: int = 0
+) -> Tuple[int, bool]:
+    """
+    Pack the normalized 5-tuple into one integer
+
+    Endpoints are ordered as (address, port) pairs, so both directions of a
+    flow share a key while A:1->B:2 and A:2->B:1 stay distinct.
+
+    Returns:
+        (key, True if the packet travels from the higher to the lower endpoint)
+    """
+    src = (ip_to_int(src_ip) << 16) | src_port
+    dst = (ip_to_int(dst_ip) << 16) | dst_port
+    reverse = src > dst
+    low, high = (dst, src) if reverse else (src, dst)
+    return (((low << _ENDPOINT_BITS) | high) << 8) | ip_proto, reverse
+
+
+def pack_flow_key(
+    src_ip: str,
+    dst_ip: str,
+    src_port: int,
+    dst_port: int,
+    ip_proto: int = 0
+) -> int:
+    """Direction-independent integer flow key"""
+    return flow_key_and_direction(src_ip, dst_ip, src_port, dst_port, ip_proto)[0]
+
+
+def format_flow_key(key: int) -> str:
+    """Readable ``ip:port-ip:port`` form of a packed flow key, for logs"""
+    high = (key >> 8) & ((1 << _ENDPOINT_BITS) - 1)
+    low = key >> (8 + _ENDPOINT_BITS)
+    return f"{int_to_ip(low >> 16)}:{low & 0xFFFF}-{int_to_ip(high >> 16)}:{high & 0xFFFF}"
+
+
+def flow_hash(key: int) -> int:
+    """
+    Stable 64-bit hash of a packed flow key
+
+    Folds the key words and applies the splitmix64 finalizer; unlike ``hash()``
+    on str it is identical in every process.
+    """
+    h = 0
+    while key:
+        h ^= key & _WORD_MASK
+        key >>= 64
+        h = (h * 0x9E3779B97F4A7C15) & _WORD_MASK
+    h ^= h >> 30
+    h = (h * 0xBF58476D1CE4E5B9) & _WORD_MASK
+    h ^= h >> 27
+    h = (h * 0x94D049BB133111EB) & _WORD_MASK
+    return h ^ (h >> 31)
+
+
+def _key_words(key: int) -> Tuple[int, ...]:
+    return tuple((key >> (64 * i)) & _WORD_MASK for i in range(_KEY_WORDS))
+
+
+class FlowTable:
+    """
+    Preallocated flow state table
+
+    Per-flow state is one row of a NumPy structured array (``FLOW_DTYPE``),
+    located through an open-addressing index with linear probing and
+    backward-shift deletion. Rows are kept on an array-based LRU list: idle
+    flows expire from its head, and a full table evicts the least recently
+    used flow. Updates read and write a row as one tuple, since per-field
+    access on NumPy scalars would dominate the cost.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 100000,
+        timeout: float = 600.0,
+        on_flow_end: Optional[FlowEndCallback] = None
+    ):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.capacity = capacity
+        self.timeout = timeout
+        self.on_flow_end = on_flow_end
+
+        self.flows = np.zeros(capacity, dtype=FLOW_DTYPE)
+        self._empty_row = self.flows[0].item()
+        self._last_seen = self.flows['last_seen']
+        self._keys = np.zeros((capacity, _KEY_WORDS), dtype=np.uint64)
+        self._hashes = np.zeros(capacity, dtype=np.uint64)
+
+        index_size = 1 << max(capacity * 2 - 1, 1).bit_length()
+        self._index = np.full(index_size, -1, dtype=np.int32)
+        self._mask = index_size - 1
+
+        self._prev = np.full(capacity, -1, dtype=np.int32)
+        self._next = np.full(capacity, -1, dtype=np.int32)
+        self._head = -1  # least recently used
+        self._tail = -1
+        self._free = list(range(capacity - 1, -1, -1))
+
+        self.expired_count = 0
+        self.evicted_count = 0
+
+    def __len__(self) -> int:
+        return self.capacity - len(self._free)
+
+    def _find(self, key_hash: int, words: Tuple[int, ...]) -> Tuple[int, int]:
+        """Return (row, index position); row is -1 with the free position if absent"""
+        index = self._index
+        pos = key_hash & self._mask
+        while True:
+            row = int(index[pos])
+            if row < 0:
+                return -1, pos
+            if self._hashes[row] == key_hash and tuple(self._keys[row].tolist()) == words:
+                return row, pos
+            pos = (pos + 1) & self._mask
+
+    def lookup(self, key: int) -> int:
+        """Row of a flow, or -1 if it is not tracked"""
+        return self._find(flow_hash(key), _key_words(key))[0]
+
+    def get_or_create(self, key: int, now: Optional[float] = None) -> int:
+        """Row for a flow, inserting it if needed; marks it most recently used"""
+        if now is None:
+            now = time.time()
+        key_hash = flow_hash(key)
+        words = _key_words(key)
+        row, pos = self._find(key_hash, words)
+
+        if row < 0:
+            removed = self.expire(now)
+            if not self._free:
+                self._remove(self._head, 'evicted')
+                self.evicted_count += 1
+                removed += 1
+            if removed:
+                # Backward shifts may have moved the free position
+                _, pos = self._find(key_hash, words)
+            row = self._free.pop()
+            self.flows[row] = self._empty_row
+            self._keys[row] = words
+            self._hashes[row] = key_hash
+            self._index[pos] = row
+            self._append(row)
+        elif row != self._tail:
+            self._unlink(row)
+            self._append(row)
+
+        self._last_seen[row] = now
+        return row
+
+    def update(
+        self,
+        row: int,
+        length: int,
+        timestamp: Optional[float] = None,
+        reverse: bool = False,
+        entropy: Optional[float] = None
+    ) -> None:
+        """
+        Add one packet to a flow's running statistics
+
+        ``entropy`` is None for packets without payload; the flow's entropy is
+        the mean over the packets that had one.
+        """
+        flows = self.flows
+        (count, directions, total_bytes, min_length, max_length, mean_length, m2_length,
+         first_ts, last_ts, iat_count, mean_iat, m2_iat, mean_entropy, entropy_count,
+         last_seen) = flows[row].item()
+
+        count += 1
+        directions |= 2 if reverse else 1
+        total_bytes += length
+        if count == 1:
+            min_length = max_length = length
+        elif length < min_length:
+            min_length = length
+        elif length > max_length:
+            max_length = length
+
+        delta = length - mean_length
+        mean_length += delta / count
+        m2_length += delta * (length - mean_length)
+
+        # Packets without payload carry no entropy sample and do not dilute the mean
+        if entropy is not None:
+            entropy_count += 1
+            mean_entropy += (entropy - mean_entropy) / entropy_count
+
+        if timestamp:
+            if last_ts == 0.0:
+                first_ts = timestamp
+            else:
+                iat = timestamp - last_ts
+                iat_count += 1
+                delta = iat - mean_iat
+                mean_iat += delta / iat_count
+                m2_iat += delta * (iat - mean_iat)
+            last_ts = timestamp
+
+        flows[row] = (count, directions, total_bytes, min_length, max_length, mean_length, m2_length,
+                      first_ts, last_ts, iat_count, mean_iat, m2_iat, mean_entropy, entropy_count,
+                      last_seen)
+
+    def features(self, row: int) -> Dict[str, Any]:
+        """Aggregated features of a flow, in the FAL feature dict layout"""
+        (count, directions, total_bytes, _, _, mean_length, m2_length,
+         first_ts, last_ts, iat_count, mean_iat, _, mean_entropy, _, _) = self.flows[row].item()
+        return {
+            'packet_count': count,
+            'byte_count': total_bytes,
+            'duration_ms': (last_ts - first_ts) * 1000 if iat_count else 0.0,
+            'mean_packet_length': mean_length,
+            'packet_length_variance': m2_length / (count - 1) if count > 1 else 0.0,
+            'mean_inter_arrival_time': mean_iat * 1000 if iat_count else 0.0,
+            'entropy': mean_entropy,
+            'direction': 'bidirectional' if directions == 3 else 'outbound'
+        }
+
+    def key_of(self, row: int) -> int:
+        """Packed flow key stored in a row"""
+        key = 0
+        for i, word in enumerate(self._keys[row].tolist()):
+            key |= word << (64 * i)
+        return key
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Remove flows idle for longer than the timeout
+
+        Only the head of the LRU list is examined, so the cost is proportional
+        to the number of flows expired.
+        """
+        if now is None:
+            now = time.time()
+        deadline = now - self.timeout
+        expired = 0
+        while self._head >= 0 and self._last_seen[self._head] <= deadline:
+            self._remove(self._head, 'expired')
+            expired += 1
+        self.expired_count += expired
+        return expired
+
+    def remove(self, key: int) -> bool:
+        """Stop tracking a flow without reporting it"""
+        row = self.lookup(key)
+        if row < 0:
+            return False
+        self._remove(row, None)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Occupancy, expiry and eviction counters"""
+        return {
+            'active_flows': len(self),
+            'max_flows': self.capacity,
+            'expired': self.expired_count,
+            'evicted': self.evicted_count
+        }
+
+    def _remove(self, row: int, reason: Optional[str]) -> None:
+        if reason is not None and self.on_flow_end is not None:
+            key = self.key_of(row)
+            try:
+                self.on_flow_end(key, self.features(row), reason)
+            except Exception as e:
+                logger.error(f"Flow end callback failed for {format_flow_key(key)}: {e}")
+
+        self._unlink(row)
+        self._free.append(row)
+
+        # Backward-shift deletion keeps probe sequences intact without tombstones
+        index = self._index
+        mask = self._mask
+        pos = int(self._hashes[row]) & mask
+        while index[pos] != row:
+            pos = (pos + 1) & mask
+        index[pos] = -1
+        probe = pos
+        while True:
+            probe = (probe + 1) & mask
+            other = int(index[probe])
+            if other < 0:
+                break
+            home = int(self._hashes[other]) & mask
+            # Move the entry back unless its home lies cyclically in (pos, probe]
+            if (probe - home) & mask >= (probe - pos) & mask:
+                index[pos] = other
+                index[probe] = -1
+                pos = probe
+
+    def _append(self, row: int) -> None:
+        self._prev[row] = self._tail
+        self._next[row] = -1
+        if self._tail >= 0:
+            self._next[self._tail] = row
+        else:
+            self._head = row
+        self._tail = row
+
+    def _unlink(self, row: int) -> None:
+        prev = int(self._prev[row])
+        nxt = int(self._next[row])
+        if prev >= 0:
+            self._next[prev] = nxt
+        else:
+            self._head = nxt
+        if nxt >= 0:
+            self._prev[nxt] = prev
+        else:
+            self._tail = prev
+        self._prev[row] = self._next[row] = -1
@@ -0,0 +1,136 @@
+"""
+Sketches - Fixed-memory count-min and HyperLogLog summaries keyed by string
+"""
+from typing import Hashable, List
+import math
+
+import numpy as np
+
+_MASK64 = (1 << 64) - 1
+
+
+def _hash64(key: Hashable) -> int:
+    # SipHash for str/bytes; stable within a process, which is all a sketch needs
+    return hash(key) & _MASK64
+
+
+def _cells(key: Hashable, depth: int, width: int) -> List[int]:
+    """One column per row from a single hash (Kirsch-Mitzenmacher double hashing)"""
+    h = _hash64(key)
+    h1 = h & 0xFFFFFFFF
+    h2 = (h >> 32) | 1
+    return [(h1 + row * h2) % width for row in range(depth)]
+
+
+class CountMinSketch:
+    """
+    Count-min sketch of small counter vectors
+
+    Every key maps to one cell per row; each cell holds ``counters`` float
+    counters, so several related per-key totals share one hash. Updates are
+    conservative (a cell only grows to the new minimum estimate), which
+    keeps overestimates from colliding keys low. Memory is
+    ``depth * width * counters`` floats however many keys are seen.
+    """
+
+    def __init__(self, width: int = 4096, depth: int = 4, counters: int = 1):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width, counters), dtype=np.float64)
+        self._rows = np.arange(depth)
+
+    def add(self, key: Hashable, values) -> np.ndarray:
+        """
+        Add ``values`` (one per counter) to ``key``
+
+        Returns:
+            The key's estimated totals after the update
+        """
+        columns = _cells(key, self.depth, self.width)
+        cells = self.table[self._rows, columns]
+        estimate = cells.min(axis=0) + values
+        self.table[self._rows, columns] = np.maximum(cells, estimate)
+        return estimate
+
+    def estimate(self, key: Hashable) -> np.ndarray:
+        """Estimated totals for ``key``; never below the true totals"""
+        return self.table[self._rows, _cells(key, self.depth, self.width)].min(axis=0)
+
+    def decay(self, factor: float = 0.5) -> None:
+        """Scale every counter, turning totals into exponentially decaying ones"""
+        self.table *= factor
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+
+class HyperLogLogBank:
+    """
+    Fixed pool of HyperLogLog distinct counters addressed by key
+
+    ``counters`` HLLs of ``2 ** precision`` registers each, in ``depth``
+    rows. A key hashes to one HLL per row and its estimate is the smallest
+    of them: keys sharing an HLL can only inflate each other's counts, so a
+    flood of distinct items under one key is never hidden, while memory
+    stays ``depth * counters * 2 ** precision`` bytes. The running sum of
+    ``2 ** -register`` and the count of empty registers are kept per HLL,
+    so adding an item and reading an estimate are O(depth).
+    """
+
+    def __init__(self, counters: int = 1024, precision: int = 8, depth: int = 2):
+        if not 7 <= precision <= 16:
+            raise ValueError(f"HyperLogLog precision must be 7-16, got {precision}")
+        self.counters = counters
+        self.depth = depth
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = np.zeros((depth, counters, self.m), dtype=np.uint8)
+        self.inverse_sums = np.full((depth, counters), float(self.m))
+        self.empty = np.full((depth, counters), self.m, dtype=np.int64)
+        # Bias correction constant for m >= 128 (Flajolet et al.)
+        self.alpha = 0.7213 / (1 + 1.079 / self.m)
+
+    def add(self, key: Hashable, item: Hashable) -> float:
+        """
+        Count ``item`` under ``key``
+
+        Returns:
+            The key's estimated number of distinct items after the update
+        """
+        h = _hash64(item)
+        register = h >> (64 - self.precision)
+        rest = (h << self.precision) & _MASK64
+        rank = 64 - self.precision + 1 if rest == 0 else 65 - rest.bit_length()
+
+        registers = self.registers
+        for row, counter in enumerate(_cells(key, self.depth, self.counters)):
+            old = int(registers[row, counter, register])
+            if rank > old:
+                registers[row, counter, register] = rank
+                self.inverse_sums[row, counter] += 2.0 ** -rank - 2.0 ** -old
+                if old == 0:
+                    self.empty[row, counter] -= 1
+        return self.estimate(key)
+
+    def estimate(self, key: Hashable) -> float:
+        """Estimated distinct items counted under ``key``"""
+        m = self.m
+        best = math.inf
+        for row, counter in enumerate(_cells(key, self.depth, self.counters)):
+            estimate = self.alpha * m * m / self.inverse_sums[row, counter]
+            empty = int(self.empty[row, counter])
+            if estimate <= 2.5 * m and empty:
+                # Linear counting is more accurate for small cardinalities
+                estimate = m * math.log(m / empty)
+            best = min(best, estimate)
+        return best
+
+    def reset(self) -> None:
+        self.registers.fill(0)
+        self.inverse_sums.fill(float(self.m))
+        self.empty.fill(self.m)
+
+    @property
+    def nbytes(self) -> int:
+        return self.registers.nbytes + self.inverse_sums.nbytes + self.empty.nbytes
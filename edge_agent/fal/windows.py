@@ -0,0 +1,270 @@
+"""
+Flow Windows - Tumbling and sliding window aggregates kept as per-flow ring buffers
+"""
+from typing import Any, Dict, List, Optional
+import math
+
+import numpy as np
+
+# One sub-aggregate per bucket; IATs are summed in ms so that the window
+# variance follows from (n, sum, sum of squares) of the combined buckets.
+BUCKET_DTYPE = np.dtype([
+    ('epoch', '<i8'),
+    ('packets', '<u4'),
+    ('bytes', '<u8'),
+    ('iat_count', '<u4'),
+    ('iat_sum', '<f8'),
+    ('iat_sq', '<f8'),
+    ('entropy_sum', '<f8'),
+    ('entropy_count', '<u4'),  # packets with payload; entropy is averaged over these
+])
+
+_EMPTY_BUCKET = (-1, 0, 0, 0, 0.0, 0.0, 0.0, 0)
+
+# Sub-aggregate totals per slot, the bucket fields after the epoch
+_TOTALS = len(BUCKET_DTYPE.names) - 1
+
+# A flow's first packet, kept per row until the flow earns a window slot
+FIRST_PACKET_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('length', '<u4'),
+    ('entropy', '<f4'),  # NaN when the packet had no payload
+])
+
+_MIN_SLOTS = 1024
+
+
+class FlowWindows:
+    """
+    Windowed flow aggregation over ``window_s`` seconds
+
+    Each flow slot owns a ring of ``2 * buckets`` sub-aggregates, each
+    covering ``window_s / buckets`` seconds of capture time. The sliding
+    window is the combination of the newest ``buckets`` sub-aggregates; the
+    tumbling window is the last completed, aligned ``window_s`` interval,
+    which the second half of the ring keeps intact.
+
+    Sliding totals are maintained incrementally: packets are added as they
+    arrive and a bucket's totals are subtracted once when it slides out. The
+    tumbling totals are merged once per window boundary. Reading either
+    window is therefore O(1) per packet and never rescans packets.
+
+    Most flows in a full table are single packets (scans, lone DNS queries),
+    so a flow row only records its first packet (16 bytes). The ring and
+    totals live in slots that are taken from a free list when the flow's
+    second packet arrives, and returned when the row is reset; the slot
+    arrays grow by doubling up to ``capacity``.
+    """
+
+    def __init__(self, capacity: int, window_s: float = 60.0, buckets: int = 6):
+        if window_s <= 0 or buckets < 1:
+            raise ValueError("window_s and buckets must be positive")
+
+        self.capacity = capacity
+        self.window_s = float(window_s)
+        self.buckets = buckets
+        self.bucket_width = self.window_s / buckets
+        self._ring_size = 2 * buckets
+
+        self._first = np.zeros(capacity, dtype=FIRST_PACKET_DTYPE)
+        self._slot = np.full(capacity, -1, dtype=np.int32)
+        self._free: List[int] = []
+        self._epoch = np.zeros(0, dtype=np.int64)
+        self._allocate_slots(min(capacity, _MIN_SLOTS))
+
+    def _allocate_slots(self, count: int) -> None:
+        """Create the slot arrays, or grow them to ``count`` slots"""
+        old = len(self._epoch)
+        ring = np.zeros((count, self._ring_size), dtype=BUCKET_DTYPE)
+        ring['epoch'] = -1
+        # Merged (packets, bytes, iat_count, iat_sum, iat_sq, entropy_sum, entropy_count) per slot
+        sliding = np.zeros((count, _TOTALS), dtype=np.float64)
+        tumbling = np.zeros((count, _TOTALS), dtype=np.float64)
+        epoch = np.full(count, -1, dtype=np.int64)
+        last_timestamp = np.zeros(count, dtype=np.float64)
+        if old:
+            ring[:old] = self.ring
+            sliding[:old] = self._sliding
+            tumbling[:old] = self._tumbling
+            epoch[:old] = self._epoch
+            last_timestamp[:old] = self._last_timestamp
+        self.ring = ring
+        self._sliding = sliding
+        self._tumbling = tumbling
+        self._epoch = epoch
+        self._last_timestamp = last_timestamp
+        self._free.extend(range(count - 1, old - 1, -1))
+
+    def _take_slot(self) -> int:
+        if not self._free:
+            size = len(self._epoch)
+            if size >= self.capacity:
+                raise RuntimeError("No free flow window slots")
+            self._allocate_slots(min(size * 2, self.capacity))
+        slot = self._free.pop()
+        self.ring[slot] = _EMPTY_BUCKET
+        self._sliding[slot] = 0.0
+        self._tumbling[slot] = 0.0
+        self._epoch[slot] = -1
+        self._last_timestamp[slot] = 0.0
+        return slot
+
+    @property
+    def slot_count(self) -> int:
+        """Flows currently holding a window slot"""
+        return len(self._epoch) - len(self._free)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self._first.nbytes + self._slot.nbytes + self.ring.nbytes + self._sliding.nbytes
+            + self._tumbling.nbytes + self._epoch.nbytes + self._last_timestamp.nbytes
+        )
+
+    def reset(self, row: int) -> None:
+        """Clear a row before it is reused for a new flow"""
+        slot = int(self._slot[row])
+        if slot >= 0:
+            self._free.append(slot)
+            self._slot[row] = -1
+        self._first[row] = (0.0, 0, 0.0)
+
+    def add(self, row: int, timestamp: float, length: int, entropy: Optional[float] = None) -> None:
+        """Account one packet to the bucket covering ``timestamp``"""
+        slot = int(self._slot[row])
+        if slot < 0:
+            first_timestamp, first_length, first_entropy = self._first[row].item()
+            if not first_timestamp:
+                self._first[row] = (timestamp, length, math.nan if entropy is None else entropy)
+                return
+            slot = self._take_slot()
+            self._slot[row] = slot
+            self._add(slot, first_timestamp, first_length,
+                      None if math.isnan(first_entropy) else first_entropy)
+        self._add(slot, timestamp, length, entropy)
+
+    def _add(self, slot: int, timestamp: float, length: int, entropy: Optional[float]) -> None:
+        epoch = int(timestamp // self.bucket_width)
+        current = self._advance(slot, epoch)
+
+        buckets = self.ring[slot]
+        bucket_slot = epoch % self._ring_size
+        (bucket_epoch, packets, total, iat_count, iat_sum, iat_sq,
+         entropy_sum, entropy_count) = buckets[bucket_slot].item()
+        if bucket_epoch != epoch:
+            if epoch <= current - self._ring_size:
+                return  # older than anything the ring still covers
+            packets = total = iat_count = entropy_count = 0
+            iat_sum = iat_sq = entropy_sum = 0.0
+
+        iat = iat_sq_delta = 0.0
+        iat_delta = 0
+        last = float(self._last_timestamp[slot])
+        if last:
+            iat = (timestamp - last) * 1000
+            iat_sq_delta = iat * iat
+            iat_delta = 1
+        if timestamp > last:
+            self._last_timestamp[slot] = timestamp
+
+        # Packets without payload carry no entropy sample
+        entropy_delta = 0 if entropy is None else 1
+        entropy = entropy or 0.0
+        buckets[bucket_slot] = (
+            epoch, packets + 1, total + length, iat_count + iat_delta,
+            iat_sum + iat, iat_sq + iat_sq_delta, entropy_sum + entropy, entropy_count + entropy_delta
+        )
+
+        if epoch > current - self.buckets:
+            self._sliding[slot] += (1, length, iat_delta, iat, iat_sq_delta, entropy, entropy_delta)
+
+    def features(self, row: int, timestamp: float) -> Dict[str, Any]:
+        """
+        Sliding and tumbling window features as of ``timestamp``
+
+        Keys are prefixed ``window_`` (sliding, last ``window_s`` seconds) and
+        ``tumbling_`` (last completed aligned window).
+        """
+        epoch = int(timestamp // self.bucket_width)
+        slot = int(self._slot[row])
+        if slot < 0:
+            return self._first_packet_features(row, epoch)
+
+        self._advance(slot, epoch)
+        features = self._window_features(self._sliding[slot].tolist(), 'window_')
+        features.update(self._window_features(self._tumbling[slot].tolist(), 'tumbling_'))
+        return features
+
+    def _first_packet_features(self, row: int, epoch: int) -> Dict[str, Any]:
+        """Window features of a flow that has seen at most one packet"""
+        first_timestamp, length, entropy = self._first[row].item()
+        sliding = tumbling = [0.0] * _TOTALS
+        if first_timestamp:
+            first_epoch = int(first_timestamp // self.bucket_width)
+            if math.isnan(entropy):
+                totals = [1.0, float(length), 0.0, 0.0, 0.0, 0.0, 0.0]
+            else:
+                totals = [1.0, float(length), 0.0, 0.0, 0.0, entropy, 1.0]
+            if first_epoch > epoch - self.buckets:
+                sliding = totals
+            window_start = epoch - epoch % self.buckets
+            if window_start - self.buckets <= first_epoch < window_start:
+                tumbling = totals
+        features = self._window_features(sliding, 'window_')
+        features.update(self._window_features(tumbling, 'tumbling_'))
+        return features
+
+    def _advance(self, slot: int, epoch: int) -> int:
+        """Move a slot's windows forward to ``epoch``; returns the slot's current epoch"""
+        previous = int(self._epoch[slot])
+        if epoch <= previous:
+            return previous
+        self._epoch[slot] = epoch
+        if previous < 0:
+            return epoch
+
+        # Subtract the buckets that slid out of the window
+        buckets = self.buckets
+        ring = self.ring[slot]
+        first = previous - buckets + 1
+        last = min(epoch - buckets, previous)
+        if last >= first:
+            sliding = self._sliding[slot]
+            for expired in range(first, last + 1):
+                bucket = ring[expired % self._ring_size].item()
+                if bucket[0] == expired:
+                    sliding -= bucket[1:]
+            if epoch - buckets >= previous:
+                sliding[:] = 0.0  # the whole window slid past; drop rounding residue
+
+        # Merge the completed tumbling window once per boundary
+        window_start = epoch - epoch % buckets
+        if window_start > previous - previous % buckets:
+            totals = [0.0] * _TOTALS
+            for bucket in ring.tolist():
+                if window_start - buckets <= bucket[0] < window_start:
+                    for i in range(_TOTALS):
+                        totals[i] += bucket[i + 1]
+            self._tumbling[slot] = totals
+
+        return epoch
+
+    def _window_features(self, totals: List[float], prefix: str) -> Dict[str, Any]:
+        """Rate, IAT and entropy features from merged sub-aggregate totals"""
+        packets, total, iat_count, iat_sum, iat_sq, entropy_sum, entropy_count = totals
+        window_s = self.window_s
+
+        iat_mean = iat_sum / iat_count if iat_count >= 1 else 0.0
+        iat_variance = 0.0
+        if iat_count > 1:
+            iat_variance = max((iat_sq - iat_sum * iat_mean) / (iat_count - 1), 0.0)
+
+        return {
+            f'{prefix}packets': int(round(packets)),
+            f'{prefix}bytes': int(round(total)),
+            f'{prefix}pps': packets / window_s,
+            f'{prefix}bytes_per_s': total / window_s,
+            f'{prefix}mean_iat': iat_mean,
+            f'{prefix}iat_variance': iat_variance,
+            f'{prefix}entropy': entropy_sum / entropy_count if entropy_count >= 1 else 0.0
+        }
@@ -1,30 +1,69 @@
 """
 Edge Agent Main Application - Packet capture, analysis, and reporting
 """
+import asyncio
 import time
+from time import perf_counter
 import sys
 import signal
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence
 from datetime import datetime
 import uuid
 
+import numpy as np
+
+from edge_agent.capture import CapturedPacket, TPacketV3Capture, decode_link_frame
+from edge_agent.capture.packet import LINKTYPE_ETHERNET
+from edge_agent.capture.pcap import PcapReader
+from edge_agent.capture.replay import ReplayReport, StageTimer
 from edge_agent.config.agent_config import AgentConfig
 from edge_agent.protocol_agents.mqtt_agent import MQTTAgent
 from edge_agent.protocol_agents.http_agent import HTTPAgent
+from edge_agent.protocol_agents.dns_agent import DNSAgent
+from edge_agent.protocol_agents.quic_agent import QUICAgent
+from edge_agent.protocol_agents.modbus_agent import ModbusTCPAgent
+from edge_agent.protocol_agents.coap_agent import CoAPAgent
+from edge_agent.protocol_agents.demux import ProtocolDemultiplexer
+from edge_agent.pipeline.coalescer import UERCoalescer
+from edge_agent.pipeline.metrics import EdgeMetrics
+from edge_agent.pipeline.overload import OverloadController
+from edge_agent.pipeline.runtime import AsyncEdgeRuntime
+from edge_agent.pipeline.sharded import ShardedPipeline
+from edge_agent.fal.entropy import batch_entropy, byte_entropy
 from edge_agent.fal.feature_aggregator import FeatureAggregationLayer
+from edge_agent.fal.flow_table import pack_flow_key
+from edge_agent.scoring import RiskScorer, RuleScorer, ScorerWatcher, feature_row
 from edge_agent.secure_connector.connector import SecureConnector, ReverseProxyConnector
-from shared.utils.logger import get_logger
+from edge_agent.secure_connector.sender import UERBatchSender
+from edge_agent.secure_connector.spool import UERSpool
+from shared.models.uer_schema import UnifiedEventReport
+from shared.utils.logger import get_event_logger, get_logger
+from shared.utils.network_utils import get_interface_ip
 
 logger = get_logger(__name__, "edge_agent.log")
+event_logger = get_event_logger(__name__, "edge_agent.log")
+
+# Protocol name -> agent implementation
+AGENT_CLASSES = {
+    "MQTT": MQTTAgent,
+    "HTTP": HTTPAgent,
+    "DNS": DNSAgent,
+    "QUIC": QUICAgent,
+    "Modbus": ModbusTCPAgent,
+    "CoAP": CoAPAgent,
+}
 
 
 class EdgeAgent:
     """Main Edge Agent application"""
     
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, config: Optional[AgentConfig] = None,
+                 uplink: bool = True):
         # Load configuration
         try:
-            if config_path:
+            if config is not None:
+                self.config = config
+            elif config_path:
                 with open(config_path, 'r') as f:
                     import yaml
                     config_dict = yaml.safe_load(f)
@@ -42,46 +81,161 @@ class EdgeAgent:
         # Initialize protocol agents
         self.protocol_agents = self._initialize_protocol_agents()
         
+        # Per-stage counters and latency histograms, scraped from /metrics
+        self.metrics = EdgeMetrics()
+        
         # Initialize Feature Aggregation Layer
         fal_config = {
             'flow_cache_timeout': self.config.flow_cache_timeout,
+            'max_flows': self.config.max_flows,
             'feature_aggregation_window': self.config.feature_aggregation_window
         }
         self.feature_aggregator = FeatureAggregationLayer(fal_config)
         
-        # Initialize secure connector
-        self.connector = ReverseProxyConnector(
-            agent_id=self.agent_id,
-            tenant_id=self.tenant_id,
-            cloud_endpoint=self.config.cloud_endpoint,
-            cert_path=self.config.cert_path,
-            key_path=self.config.key_path,
-            ca_cert_path=self.config.ca_cert_path
+        # Batched risk scoring; a configured model file is swapped in when it changes
+        self.scorer: RiskScorer = RuleScorer()
+        self.scorer_watcher: Optional[ScorerWatcher] = None
+        if self.config.risk_model_path:
+            self.scorer_watcher = ScorerWatcher(
+                self.config.risk_model_path, self.config.risk_model_reload_s
+            )
+            self.reload_scorer(force=True)
+        
+        # Cloud uplink; shard workers hand UERs to the parent's sender instead
+        self.connector: Optional[ReverseProxyConnector] = None
+        self.spool: Optional[UERSpool] = None
+        self.sender: Optional[UERBatchSender] = None
+        self.uer_sink = None
+        if uplink:
+            # Initialize secure connector
+            self.connector = ReverseProxyConnector(
+                agent_id=self.agent_id,
+                tenant_id=self.tenant_id,
+                cloud_endpoint=self.config.cloud_endpoint,
+                cert_path=self.config.cert_path,
+                key_path=self.config.key_path,
+                ca_cert_path=self.config.ca_cert_path,
+                cloud_port=self.config.cloud_port,
+                wire_format=self.config.uer_wire_format,
+                max_uer_size=self.config.max_uer_size_bytes,
+                pool_size=self.config.cloud_pool_size
+            )
+            
+            # Batches the cloud could not take are kept on disk and replayed later
+            self.spool = self._open_spool()
+            
+            # UERs are batched onto the connector's persistent channel off the packet path
+            self.sender = UERBatchSender(
+                self.connector,
+                max_queue=self.config.uer_queue_size,
+                batch_size=self.config.uer_batch_size,
+                flush_interval_s=self.config.uer_flush_interval_ms / 1000,
+                spool=self.spool,
+                replay_bytes_per_s=self.config.spool_replay_bytes_per_s,
+                metrics=self.metrics
+            )
+            # Where _emit_uer queues UERs; the asyncio runtime points this at its own sender
+            self.uer_sink = self.sender
+        self._register_gauges()
+        
+        # Classifies payloads to agents before any parsing
+        self.demux = ProtocolDemultiplexer(self.protocol_agents.keys())
+        
+        # Flow-consistent sampling when live capture falls behind
+        self.overload = OverloadController(
+            max_backlog=self.config.max_packet_buffer_size,
+            latency_budget_s=self.config.overload_latency_budget_ms / 1000,
+            low_value_protocols=self.config.low_value_protocols
         )
         
+        # Repeated alerts on one flow are folded before they reach the connector
+        self.coalescer = UERCoalescer(self._emit_uer, window_s=self.config.uer_coalesce_window_s)
+        
         # Running state
         self.running = False
         self.packet_count = 0
+        self.uer_count = 0
+        self.forward_uers = True
+        
+        # Per-stage latency accounting, enabled for replays
+        self.stage_timer: Optional[StageTimer] = None
+        
+        # Multi-process pipeline, created on start when worker_processes > 1
+        self.pipeline: Optional[ShardedPipeline] = None
+        
+    def _register_gauges(self) -> None:
+        """Gauges read when /metrics is scraped, never on the packet path"""
+        metrics = self.metrics
+        metrics.gauge('flow_table_size', "Flows tracked by the Feature Aggregation Layer",
+                      lambda: len(self.feature_aggregator.flow_table))
+        if self.uer_sink is not None:
+            metrics.gauge('uer_queue_depth', "UERs waiting for the next batch",
+                          lambda: self.uer_sink.queue_depth())
+        if self.spool is not None:
+            metrics.gauge('spool_bytes', "Disk space held by spool segments",
+                          self.spool.disk_bytes)
+        metrics.gauge('overload_level', "Load shedding level, 0 when not shedding",
+                      lambda: self.overload.level)
+    
+    def start_metrics(self) -> None:
+        """Serve /metrics on the management interface when metrics_port is set"""
+        if not self.config.metrics_port:
+            return
+        address = get_interface_ip(self.config.management_interface)
+        if not address:
+            logger.warning(f"No address on {self.config.management_interface}, serving metrics on loopback")
+            address = "127.0.0.1"
+        self.metrics.serve(address, self.config.metrics_port)
+    
+    def _open_spool(self) -> Optional[UERSpool]:
+        """Open the store-and-forward spool, or run without one if it is unavailable"""
+        if not self.config.spool_dir:
+            return None
+        try:
+            return UERSpool(
+                self.config.spool_dir,
+                max_bytes=self.config.spool_max_bytes,
+                segment_bytes=self.config.spool_segment_bytes
+            )
+        except OSError as e:
+            logger.error(f"Failed to open UER spool at {self.config.spool_dir}, spooling disabled: {e}")
+            return None
+    
+    def reload_scorer(self, force: bool = False) -> bool:
+        """
+        Swap in the risk model file if it changed since the last check
         
+        Checks at most every risk_model_reload_s unless ``force`` is set. The
+        swap is a single attribute assignment, so a batch being scored keeps
+        the scorer it started with; a model that fails to load leaves the
+        current scorer in place.
+        
+        Returns:
+            True if a new scorer was installed
+        """
+        if self.scorer_watcher is None:
+            return False
+        scorer = self.scorer_watcher.poll(force)
+        if scorer is None:
+            return False
+        self.scorer = scorer
+        return True
+    
     def _initialize_protocol_agents(self) -> dict:
         """Initialize protocol-specific agents"""
         agents = {}
         
         for protocol in self.config.enabled_protocols:
+            agent_class = AGENT_CLASSES.get(protocol)
+            if agent_class is None:
+                logger.warning(f"No agent implementation for {protocol}, skipping")
+                continue
             try:
-                if protocol == "MQTT":
-                    agents["MQTT"] = MQTTAgent(
-                        agent_id=self.agent_id,
-                        tenant_id=self.tenant_id,
-                        interface=self.config.sniff_interface
-                    )
-                elif protocol == "HTTP":
-                    agents["HTTP"] = HTTPAgent(
-                        agent_id=self.agent_id,
-                        tenant_id=self.tenant_id,
-                        interface=self.config.sniff_interface
-                    )
-                # Add more protocol agents here
+                agents[protocol] = agent_class(
+                    agent_id=self.agent_id,
+                    tenant_id=self.tenant_id,
+                    interface=self.config.sniff_interface
+                )
                 logger.info(f"Initialized {protocol} agent")
             except Exception as e:
                 logger.error(f"Failed to initialize {protocol} agent: {e}")
@@ -102,7 +256,18 @@ class EdgeAgent:
             logger.error("Failed to connect to Cloud Platform proxy")
             sys.exit(1)
         
+        self.start_metrics()
+        
+        if self.config.runtime == "asyncio":
+            logger.info("Edge Agent started successfully")
+            asyncio.run(AsyncEdgeRuntime(
+                self,
+                stats_interval_s=self.config.stats_interval_s
+            ).run())
+            return
+        
         self.running = True
+        self.sender.start()
         
         # Set up signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -118,104 +283,353 @@ class EdgeAgent:
         finally:
             self.stop()
     
+    def open_capture(self) -> TPacketV3Capture:
+        """Capture ring on the sniff interface, not yet opened"""
+        return TPacketV3Capture(
+            self.config.sniff_interface,
+            block_size=self.config.capture_block_size,
+            block_count=self.config.capture_block_count,
+            block_timeout_ms=self.config.capture_block_timeout_ms
+        )
+    
+    def start_pipeline(self) -> bool:
+        """
+        Start the shard workers when worker_processes > 1
+        
+        Returns:
+            True if packets are dispatched to shard workers
+        """
+        if self.config.worker_processes > 1:
+            self.pipeline = ShardedPipeline(
+                self.config, self._emit_uer, self.config.worker_processes, metrics=self.metrics
+            )
+            self.pipeline.start()
+        return self.pipeline is not None
+    
     def _event_loop(self):
-        """Main event processing loop"""
-        while self.running:
+        """Main event processing loop (threaded runtime)"""
+        capture = self.open_capture()
+        self.start_pipeline()
+        
+        with capture:
+            while self.running:
+                try:
+                    for frames in capture.batches(timeout_ms=100):
+                        self.process_frames(frames)
+                        if frames and self.pipeline is None:
+                            # Shard workers observe their own backlog
+                            self.overload.observe(capture.backlog(), time.time() - frames[0][1])
+                        self.coalescer.flush_expired()
+                        if not self.running:
+                            break
+                    self.coalescer.flush_expired()
+                    self.reload_scorer()
+                except Exception as e:
+                    logger.error(f"Error in event loop: {e}")
+    
+    def process_frames(self, frames: list, linktype: int = LINKTYPE_ETHERNET) -> int:
+        """
+        Decode a block of captured frames and run them through the pipeline
+        
+        Returns:
+            Number of frames dispatched to a protocol agent
+        """
+        packets = []
+        for frame, timestamp in frames:
+            packet = decode_link_frame(frame, timestamp, linktype)
+            if packet is not None:
+                packets.append(packet)
+        
+        self.packet_count += len(frames)
+        if self.pipeline is not None:
+            for packet in packets:
+                self.pipeline.dispatch(packet)
+            return len(packets)
+        
+        classified_before = self.demux.classified_count
+        self.process_packets(packets)
+        return self.demux.classified_count - classified_before
+    
+    def process_packets(self, batch: Sequence[CapturedPacket]) -> List[UnifiedEventReport]:
+        """
+        Process a batch of decoded packets and create UERs
+        
+        Packets are classified, grouped per protocol agent, parsed with one
+        ``parse_packets`` call and scored with one scorer call per agent, so
+        dispatch and exception handling are paid per batch rather than per
+        packet. Under overload, flows not
+        sampled by the overload controller are dropped before parsing.
+        
+        Returns:
+            UERs created for the batch
+        """
+        groups: Dict[str, List[CapturedPacket]] = {}
+        classify = self.demux.classify
+        admit = self.overload.admit
+        for packet in batch:
+            protocol = classify(packet.payload, packet.src_port, packet.dst_port, packet.ip_proto,
+                                packet.src_ip, packet.dst_ip)
+            if protocol is None or protocol not in self.protocol_agents:
+                continue
+            if admit(protocol, packet.src_ip, packet.dst_ip, packet.src_port,
+                     packet.dst_port, packet.ip_proto):
+                groups.setdefault(protocol, []).append(packet)
+        
+        timer = self.stage_timer
+        metrics = self.metrics
+        update_flow = self.feature_aggregator.update_packet
+        uers: List[UnifiedEventReport] = []
+        for protocol, packets in groups.items():
+            agent = self.protocol_agents[protocol]
+            sampling_rate = self.overload.sampling_rate(protocol)
             try:
-                # In production, this would capture real packets using libpcap
-                # For now, simulate packet capture
-                self._simulate_packet_capture()
+                if timer is not None:
+                    timer.start()
+                payloads = [packet.payload for packet in packets]
+                messages = payloads
+                if agent.transport_framed:
+                    unframe = agent.unframe
+                    messages = [unframe(packet.payload, packet.ip_proto) for packet in packets]
+                started = perf_counter()
+                parsed_batch = agent.parse_packets(messages)
+                metrics.observe('parse', (perf_counter() - started) / len(packets), len(packets))
+                parsed_count = len(parsed_batch) - parsed_batch.count(None)
+                metrics.inc('packets_parsed', protocol, parsed_count)
+                metrics.inc('parse_failures', protocol, len(packets) - parsed_count)
+                if timer is not None:
+                    timer.lap('parse', len(packets))
+                entropies = batch_entropy(payloads).tolist()
+                if timer is not None:
+                    timer.lap('entropy', len(packets))
                 
-                time.sleep(0.1)  # Small delay to prevent CPU spinning
+                candidates = []
+                for packet, parsed, entropy in zip(packets, parsed_batch, entropies):
+                    length = len(packet.payload)
+                    # Empty payloads (bare ACKs) have no entropy sample
+                    flow_stats = update_flow(
+                        packet.src_ip, packet.dst_ip, packet.src_port, packet.dst_port,
+                        length, packet.timestamp, packet.ip_proto, entropy if length else None
+                    )
+                    if timer is not None:
+                        timer.lap('flow')
+                    if parsed:
+                        candidates.append((
+                            parsed, packet.payload, packet.src_ip, packet.dst_ip,
+                            packet.src_port, packet.dst_port, flow_stats
+                        ))
+                if candidates:
+                    uers.extend(self._analyze_packets(agent, candidates, sampling_rate))
             except Exception as e:
-                logger.error(f"Error in event loop: {e}")
-    
-    def _simulate_packet_capture(self):
-        """Simulate packet capture for demonstration"""
-        # This is a placeholder - in production, use libpcap or similar
-        self.packet_count += 1
+                event_logger.error("Failed to process %s batch of %d packets: %s", protocol, len(packets), e)
         
-        if self.packet_count % 100 == 0:
-            logger.debug(f"Processed {self.packet_count} packets")
+        return uers
     
     def process_packet(self, packet_data: bytes, src_ip: str, dst_ip: str, 
-                       src_port: int, dst_port: int, protocol: str) -> Optional[UnifiedEventReport]:
-        """Process a captured packet and create UER"""
+                       src_port: int, dst_port: int,
+                       protocol: Optional[str] = None,
+                       ip_proto: Optional[int] = None,
+                       timestamp: Optional[float] = None) -> Optional[UnifiedEventReport]:
+        """
+        Process a captured packet and create a UER if it is high risk
+        
+        ``packet_data`` may be a memoryview into the capture ring; it is only
+        valid for the duration of this call and is copied only for the UER sample.
+        When ``protocol`` is not given the payload is classified by the demux.
+        ``ip_proto`` is part of the flow identity and should be given whenever
+        it is known, so the packet joins the same flow :meth:`process_packets`
+        would put it in; ``timestamp`` is the capture time (now when not given).
+        
+        Returns:
+            The UER created for the packet, or None if it was below the risk
+            threshold or folded into an earlier UER of the same flow
+        """
+        timer = self.stage_timer
         try:
+            if protocol is None:
+                protocol = self.demux.classify(packet_data, src_port, dst_port, ip_proto, src_ip, dst_ip)
+                if protocol is None:
+                    return None
+            
             # Select appropriate protocol agent
             agent = self.protocol_agents.get(protocol)
             if not agent:
-                logger.debug(f"No agent for protocol {protocol}")
+                logger.debug("No agent for protocol %s", protocol)
                 return None
             
-            # Parse and analyze packet
-            parsed = agent.parse_packet(packet_data)
-            if not parsed:
+            sampling_rate = self.overload.admit(protocol, src_ip, dst_ip, src_port, dst_port, ip_proto or 0)
+            if not sampling_rate:
                 return None
             
-            # Extract features
-            flow_features = agent.extract_flow_features(parsed, {})
-            protocol_features = agent.extract_protocol_features(parsed)
-            
-            # Calculate risk score (simplified for demo)
-            risk_score = self._calculate_risk_score(parsed, flow_features, protocol_features)
-            anomaly_flags = self._detect_anomalies(parsed, flow_features, protocol_features)
+            if timer is not None:
+                timer.start()
             
-            # Create UER
-            uer = agent.create_uer(
-                packet_data=packet_data,
-                src_ip=src_ip,
-                dst_ip=dst_ip,
-                src_port=src_port,
-                dst_port=dst_port,
-                risk_score=risk_score,
-                anomaly_flags=anomaly_flags
+            # Parse and analyze packet
+            started = perf_counter()
+            message = packet_data
+            if agent.transport_framed and ip_proto is not None:
+                message = agent.unframe(packet_data, ip_proto)
+            parsed = agent.parse_packet(message)
+            self.metrics.observe('parse', perf_counter() - started)
+            self.metrics.inc('packets_parsed' if parsed else 'parse_failures', protocol)
+            if timer is not None:
+                timer.lap('parse')
+            flow_stats = self.feature_aggregator.update_packet(
+                src_ip, dst_ip, src_port, dst_port, len(packet_data),
+                timestamp, ip_proto or 0, byte_entropy(packet_data) if len(packet_data) else None
             )
+            if timer is not None:
+                timer.lap('flow')
+            if not parsed:
+                return None
             
-            # Send to Cloud Platform
-            if risk_score >= self.config.risk_threshold:
-                self.connector.send_uer(uer)
-                logger.info(f"Sent UER for high-risk event: {risk_score:.2f}")
-            
-            return uer
+            uers = self._analyze_packets(agent, [(
+                parsed, packet_data, src_ip, dst_ip, src_port, dst_port, flow_stats
+            )], sampling_rate)
+            return uers[0] if uers else None
         except Exception as e:
-            logger.error(f"Failed to process packet: {e}")
+            event_logger.error("Failed to process packet: %s", e)
             return None
     
-    def _calculate_risk_score(self, parsed: dict, flow_features, protocol_features) -> float:
-        """Calculate risk score for packet"""
-        # Simplified risk scoring
-        score = 0.0
+    def _analyze_packets(self, agent, candidates: list,
+                         sampling_rate: float = 1.0) -> List[UnifiedEventReport]:
+        """
+        Features, risk scoring and UER creation for parsed packets of one agent
         
-        # Protocol-specific risks
-        if protocol_features.mqtt_command_type:
-            if protocol_features.mqtt_command_type in ['PUBLISH', 'SUBSCRIBE']:
-                score += 0.2
+        ``candidates`` holds ``(parsed, packet_data, src_ip, dst_ip, src_port,
+        dst_port, flow_stats)`` tuples. Agents that track endpoints observe
+        each packet first; then its features are extracted once into a row
+        of one feature matrix, which the scorer turns into
+        risk scores and anomaly flags in a single call. The UER (event id,
+        timestamp, payload sample) is only built for packets at or above the
+        risk threshold. The flow sampling rate in effect is recorded in the
+        UER metadata so the cloud can scale volumes back up.
         
-        # Flow-based risks
-        if flow_features.entropy > 7.0:  # High entropy might indicate encryption or exfiltration
-            score += 0.3
+        Forwarded UERs go through the coalescer: a hit on a flow that already
+        has a UER held with the same anomaly flags is only counted.
+        """
+        timer = self.stage_timer
+        metrics = self.metrics
+        # A reload during the batch takes effect from the next one
+        scorer = self.scorer
+        count = len(candidates)
         
-        if flow_features.mean_packet_length > 1000:  # Large packets
-            score += 0.2
+        # Extract features from the flow snapshots maintained by the FAL
+        started = perf_counter()
+        observe = agent.observe if agent.tracks_endpoints else None
+        extracted = []
+        rows = []
+        for parsed, packet_data, src_ip, dst_ip, _, _, flow_stats in candidates:
+            if observe is not None:
+                observe(parsed, src_ip, dst_ip)
+            flow_stats = flow_stats or {}
+            flow_features = agent.extract_flow_features(parsed, flow_stats)
+            protocol_features = agent.extract_protocol_features(parsed)
+            extracted.append((flow_features, protocol_features))
+            rows.append(feature_row(flow_stats, protocol_features, len(packet_data)))
+        featured = perf_counter()
+        metrics.observe('feature', (featured - started) / count, count)
+        if timer is not None:
+            timer.lap('features', count)
         
-        # Add random variation for demo
-        import random
-        score += random.random() * 0.2
+        scores, flags = scorer.score(np.array(rows, dtype=np.float64))
+        metrics.observe('score', (perf_counter() - featured) / count, count)
+        if timer is not None:
+            timer.lap('score', count)
         
-        return min(score, 1.0)
+        uers: List[UnifiedEventReport] = []
+        for index in np.flatnonzero(scores >= self.config.risk_threshold).tolist():
+            parsed, packet_data, src_ip, dst_ip, src_port, dst_port, _ = candidates[index]
+            flow_features, protocol_features = extracted[index]
+            risk_score = float(scores[index])
+            anomaly_flags = scorer.flag_names(int(flags[index]))
+            
+            # Create UER from the features already extracted
+            self.uer_count += 1
+            if self.forward_uers:
+                coalesce_key = (
+                    pack_flow_key(src_ip, dst_ip, src_port, dst_port),
+                    agent.get_protocol_name(),
+                    tuple(anomaly_flags)
+                )
+                if self.coalescer.fold(coalesce_key, risk_score):
+                    if timer is not None:
+                        timer.lap('uer')
+                    continue
+            
+            uer = agent.build_uer(
+                parsed, flow_features, protocol_features, packet_data,
+                src_ip, dst_ip, src_port, dst_port,
+                risk_score, anomaly_flags
+            )
+            uer.metadata['sampling_rate'] = sampling_rate
+            if timer is not None:
+                timer.lap('uer')
+            
+            # Send to Cloud Platform once the coalescing window closes
+            if self.forward_uers:
+                self.coalescer.hold(coalesce_key, uer)
+            if timer is not None:
+                timer.lap('send')
+            uers.append(uer)
+        
+        return uers
+    
+    def _emit_uer(self, uer: UnifiedEventReport):
+        """Queue a high-risk UER for the next batch to the Cloud Platform"""
+        if self.uer_sink.submit(uer):
+            self.metrics.inc('uers_emitted', uer.protocol_info.protocol_type)
+            event_logger.info("Queued UER for high-risk event: %.2f", uer.edge_agent_risk_score)
     
-    def _detect_anomalies(self, parsed: dict, flow_features, protocol_features) -> List[str]:
-        """Detect anomalies in packet"""
-        flags = []
+    def replay(self, path: str, speed: str = "max", send: bool = False) -> ReplayReport:
+        """
+        Replay a pcap/pcapng file through the packet pipeline
+        
+        Args:
+            path: Capture file to replay
+            speed: "max" to process as fast as possible, "realtime" to honour
+                the capture timestamps
+            send: Forward high-risk UERs to the Cloud Platform instead of
+                only counting them; needs an agent built with ``uplink``
+        """
+        if speed not in ("max", "realtime"):
+            raise ValueError(f"Unknown replay speed: {speed}")
+        if send and self.sender is None:
+            raise ValueError("Sending replayed UERs needs an agent built with an uplink")
+        
+        report = ReplayReport(path, speed)
+        self.stage_timer = StageTimer()
+        self.forward_uers = send
+        uers_before = self.uer_count
+        first_ts = None
         
-        if flow_features.entropy > 7.5:
-            flags.append("high_entropy")
+        # Realtime pacing is per frame; max speed replays in capture-sized batches
+        batch_size = 1 if speed == "realtime" else 256
         
-        if flow_features.mean_inter_arrival_time < 10:
-            flags.append("rapid_packet_rate")
+        if send:
+            self.sender.start()
+        started = time.perf_counter()
+        with PcapReader(path) as reader:
+            for frames, linktype in reader.batches(batch_size):
+                if speed == "realtime":
+                    timestamp = frames[0][1]
+                    if first_ts is None:
+                        first_ts = timestamp
+                    delay = (timestamp - first_ts) - (time.perf_counter() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+                
+                report.packet_count += self.process_frames(frames, linktype)
+                report.frame_count += len(frames)
         
-        return flags
+        if send:
+            self.coalescer.flush()
+            self.sender.stop()
+        report.elapsed_s = time.perf_counter() - started
+        report.uer_count = self.uer_count - uers_before
+        report.stages = self.stage_timer.summary()
+        self.stage_timer = None
+        self.forward_uers = True
+        return report
     
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals"""
@@ -226,6 +640,17 @@ class EdgeAgent:
         """Stop the Edge Agent"""
         logger.info("Stopping Edge Agent...")
         self.running = False
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+        self.coalescer.flush()
+        if self.sender is not None:
+            self.sender.stop()
+        if self.spool is not None:
+            self.spool.close()
+        if self.connector is not None:
+            self.connector.close()
+        self.metrics.shutdown()
         logger.info("Edge Agent stopped successfully")
 
 
@@ -235,8 +660,28 @@ def main():
     
     parser = argparse.ArgumentParser(description="CoMIDF Edge Agent")
     parser.add_argument('--config', '-c', help='Path to configuration file')
+    parser.add_argument('--replay', metavar='CAPTURE',
+                        help='Replay a pcap/pcapng file offline and print a throughput report')
+    parser.add_argument('--speed', choices=['max', 'realtime'], default='max',
+                        help='Replay speed (default: max)')
+    parser.add_argument('--replay-send', action='store_true',
+                        help='Forward high-risk UERs to the Cloud Platform during replay')
     args = parser.parse_args()
     
+    if args.replay:
+        # An offline replay must not touch the cloud uplink or the live agent's spool
+        agent = EdgeAgent(config_path=args.config, uplink=args.replay_send)
+        try:
+            if args.replay_send:
+                if not agent.connector.authenticate(agent.config.jwt_secret):
+                    logger.error("Failed to authenticate with Cloud Platform")
+                    sys.exit(1)
+            report = agent.replay(args.replay, speed=args.speed, send=args.replay_send)
+            print(report.format())
+        finally:
+            agent.stop()
+        return
+    
     agent = EdgeAgent(config_path=args.config)
     agent.start()
 
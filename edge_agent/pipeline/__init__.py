@@ -0,0 +1,17 @@
+"""Edge packet pipeline package"""
+from edge_agent.pipeline.coalescer import UERCoalescer
+from edge_agent.pipeline.metrics import EdgeMetrics
+from edge_agent.pipeline.overload import OverloadController
+from edge_agent.pipeline.runtime import AsyncEdgeRuntime
+from edge_agent.pipeline.shm_ring import SharedMemoryRing
+from edge_agent.pipeline.sharded import ShardedPipeline, flow_shard
+
+__all__ = [
+    'AsyncEdgeRuntime',
+    'EdgeMetrics',
+    'OverloadController',
+    'SharedMemoryRing',
+    'ShardedPipeline',
+    'UERCoalescer',
+    'flow_shard'
+]
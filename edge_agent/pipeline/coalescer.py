@@ -0,0 +1,138 @@
+"""
+UER Coalescer - Folds repeated alerts on the same flow into one summarizing UER
+"""
+from typing import Callable, Dict, Hashable, Optional
+from collections import OrderedDict
+from datetime import datetime
+import time
+
+from shared.models.uer_schema import UnifiedEventReport
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class _HeldUER:
+    """First UER of a coalescing window and what was folded into it"""
+
+    __slots__ = ('uer', 'deadline', 'count', 'max_risk', 'last_seen')
+
+    def __init__(self, uer: UnifiedEventReport, deadline: float):
+        self.uer = uer
+        self.deadline = deadline
+        self.count = 1
+        self.max_risk = uer.edge_agent_risk_score
+        self.last_seen = uer.timestamp
+
+
+class UERCoalescer:
+    """
+    Coalesces high-risk events per (flow, protocol, anomaly flags) key
+
+    The first UER for a key is held for ``window_s`` seconds; later hits on
+    the same key only bump a counter, the maximum risk and the last-seen time,
+    so callers can skip building their UERs entirely (see :meth:`fold`). When
+    the window closes the held UER is emitted once, carrying the maximum risk
+    and ``coalesced_count``/``first_seen``/``last_seen`` metadata.
+
+    Windows open in arrival order, so held entries expire from the front of an
+    ordered dict and :meth:`flush_expired` is amortized O(1).
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[UnifiedEventReport], None],
+        window_s: float = 10.0,
+        max_entries: int = 10000
+    ):
+        self.emit = emit
+        self.window_s = window_s
+        self.max_entries = max_entries
+        self._held: 'OrderedDict[Hashable, _HeldUER]' = OrderedDict()
+
+        self.received_count = 0
+        self.emitted_count = 0
+
+    def __len__(self) -> int:
+        return len(self._held)
+
+    def fold(self, key: Hashable, risk_score: float, seen: Optional[datetime] = None) -> bool:
+        """
+        Fold a hit into an open window for ``key``
+
+        Returns:
+            True if the hit was absorbed and no UER needs to be built for it
+        """
+        held = self._held.get(key)
+        if held is None:
+            return False
+        if held.deadline <= time.monotonic():
+            self._release(key)
+            return False
+
+        self.received_count += 1
+        held.count += 1
+        if risk_score > held.max_risk:
+            held.max_risk = risk_score
+        held.last_seen = seen or datetime.now()
+        return True
+
+    def hold(self, key: Hashable, uer: UnifiedEventReport) -> None:
+        """Open a window for ``key`` with its first UER, or emit at once if disabled"""
+        self.received_count += 1
+        if self.window_s <= 0:
+            self._send(uer)
+            return
+
+        now = time.monotonic()
+        self.flush_expired(now)
+        if key in self._held:
+            self._release(key)
+        if len(self._held) >= self.max_entries:
+            self._release(next(iter(self._held)))
+        self._held[key] = _HeldUER(uer, now + self.window_s)
+
+    def flush_expired(self, now: Optional[float] = None) -> int:
+        """Emit every held UER whose window has closed"""
+        if now is None:
+            now = time.monotonic()
+        emitted = 0
+        while self._held:
+            key, held = next(iter(self._held.items()))
+            if held.deadline > now:
+                break
+            self._release(key)
+            emitted += 1
+        return emitted
+
+    def flush(self) -> int:
+        """Emit every held UER regardless of its window"""
+        emitted = len(self._held)
+        while self._held:
+            self._release(next(iter(self._held)))
+        return emitted
+
+    def stats(self) -> Dict[str, int]:
+        """Events received, UERs emitted and windows still open"""
+        return {
+            'received': self.received_count,
+            'emitted': self.emitted_count,
+            'held': len(self._held)
+        }
+
+    def _release(self, key: Hashable) -> None:
+        held = self._held.pop(key)
+        uer = held.uer
+        if held.count > 1:
+            uer.edge_agent_risk_score = held.max_risk
+            uer.metadata['coalesced_count'] = held.count
+            uer.metadata['first_seen'] = uer.timestamp.isoformat()
+            uer.metadata['last_seen'] = held.last_seen.isoformat()
+        self._send(uer)
+
+    def _send(self, uer: UnifiedEventReport) -> None:
+        self.emitted_count += 1
+        try:
+            self.emit(uer)
+        except Exception as e:
+            logger.error(f"Failed to emit coalesced UER {uer.event_id}: {e}")
@@ -0,0 +1,187 @@
+"""
+Edge Metrics - Per-stage counters, latency histograms and gauges for Prometheus
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from bisect import bisect_left
+import threading
+
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Per-protocol counters: name -> help text
+COUNTERS = {
+    'packets_parsed': "Packets a protocol agent parsed",
+    'parse_failures': "Packets a protocol agent could not parse",
+    'uers_emitted': "UERs queued for the Cloud Platform after coalescing",
+    'uers_sent': "UERs the Cloud Platform accepted"
+}
+
+# Latency histogram stages
+STAGES = ('parse', 'feature', 'score', 'send')
+
+# Seconds; parsing and scoring sit in the microsecond range, sends in milliseconds
+DEFAULT_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+_PREFIX = 'comidf_edge_'
+
+
+class _Shard:
+    """Counters and histograms written by one thread only"""
+
+    __slots__ = ('counters', 'histograms')
+
+    def __init__(self, bucket_count: int):
+        self.counters: Dict[Tuple[str, str], int] = {}
+        # stage -> [per-bucket counts (last is +Inf)..., sum]
+        self.histograms: Dict[str, List[float]] = {
+            stage: [0] * (bucket_count + 1) + [0.0] for stage in STAGES
+        }
+
+
+class EdgeMetrics:
+    """
+    Pipeline metrics that cost one dict update to record
+
+    Each recording thread writes to its own shard without locking; shards
+    are only summed when Prometheus scrapes. Shard worker processes ship
+    :meth:`snapshot` to the parent, which exports them through
+    :meth:`merge_remote` alongside its own shards. Gauges are callbacks
+    evaluated at scrape time, so the packet path never updates them.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()
+        self._remote: Dict[Any, Dict[str, Any]] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._server = None
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = _Shard(len(self.buckets))
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def inc(self, name: str, protocol: str, amount: int = 1) -> None:
+        """Add ``amount`` to a per-protocol counter"""
+        counters = self._shard().counters
+        key = (name, protocol)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, stage: str, seconds: float, count: int = 1) -> None:
+        """Record ``count`` events of ``seconds`` each in a stage histogram"""
+        histogram = self._shard().histograms[stage]
+        histogram[bisect_left(self.buckets, seconds)] += count
+        histogram[-1] += seconds * count
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], float]) -> None:
+        """Register a gauge read at scrape time"""
+        self._gauges[name] = (documentation, read)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters and histograms of every local thread, as plain picklable data"""
+        counters: Dict[Tuple[str, str], int] = {}
+        histograms: Dict[str, List[float]] = {
+            stage: [0] * (len(self.buckets) + 1) + [0.0] for stage in STAGES
+        }
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, value in list(shard.counters.items()):
+                counters[key] = counters.get(key, 0) + value
+            for stage, values in shard.histograms.items():
+                merged = histograms[stage]
+                for index, value in enumerate(values):
+                    merged[index] += value
+        return {'counters': counters, 'histograms': histograms}
+
+    def merge_remote(self, source: Any, snapshot: Dict[str, Any]) -> None:
+        """Export the latest cumulative snapshot from ``source`` (e.g. a shard worker)"""
+        self._remote[source] = snapshot
+
+    def _totals(self) -> Dict[str, Any]:
+        totals = self.snapshot()
+        for remote in list(self._remote.values()):
+            for key, value in remote['counters'].items():
+                totals['counters'][key] = totals['counters'].get(key, 0) + value
+            for stage, values in remote['histograms'].items():
+                merged = totals['histograms'][stage]
+                for index, value in enumerate(values):
+                    merged[index] += value
+        return totals
+
+    def collect(self) -> Iterator[Any]:
+        """Metric families for a ``prometheus_client`` registry"""
+        from prometheus_client.core import (
+            CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+        )
+
+        totals = self._totals()
+        for name, documentation in COUNTERS.items():
+            family = CounterMetricFamily(_PREFIX + name, documentation, labels=['protocol'])
+            for (counter, protocol), value in sorted(totals['counters'].items()):
+                if counter == name:
+                    family.add_metric([protocol], value)
+            yield family
+
+        family = HistogramMetricFamily(
+            _PREFIX + 'stage_latency_seconds', "Per-packet latency of each pipeline stage",
+            labels=['stage']
+        )
+        bounds = [repr(bound) for bound in self.buckets] + ['+Inf']
+        for stage, values in totals['histograms'].items():
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(bounds, values[:-1]):
+                cumulative += count
+                buckets.append((bound, cumulative))
+            family.add_metric([stage], buckets, values[-1])
+        yield family
+
+        for name, (documentation, read) in self._gauges.items():
+            try:
+                value = float(read())
+            except Exception as e:
+                logger.debug(f"Gauge {name} unavailable: {e}")
+                continue
+            yield GaugeMetricFamily(_PREFIX + name, documentation, value=value)
+
+    def serve(self, address: str, port: int) -> bool:
+        """
+        Expose ``/metrics`` on ``address:port`` from a background thread
+
+        Returns:
+            False if prometheus_client is missing or the port cannot be bound
+        """
+        try:
+            from prometheus_client import CollectorRegistry, start_http_server
+        except ImportError:
+            logger.warning("prometheus_client not available, metrics listener disabled")
+            return False
+
+        registry = CollectorRegistry(auto_describe=False)
+        registry.register(self)
+        try:
+            self._server = start_http_server(port, addr=address, registry=registry)
+        except OSError as e:
+            logger.error(f"Failed to start metrics listener on {address}:{port}: {e}")
+            return False
+        logger.info(f"Serving metrics on http://{address}:{port}/metrics")
+        return True
+
+    def shutdown(self) -> None:
+        """Stop the metrics listener"""
+        server = self._server
+        if isinstance(server, tuple):
+            server[0].shutdown()
+        self._server = None
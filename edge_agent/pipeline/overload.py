@@ -0,0 +1,126 @@
+"""
+Overload Controller - Flow-consistent sampling when the edge falls behind
+"""
+from typing import Dict, Iterable
+
+from edge_agent.fal.flow_table import flow_hash, pack_flow_key
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Levels up to this one only shed low-value protocols
+_LOW_VALUE_LEVELS = 3
+
+# Pressure below this fraction of the limits counts towards recovery
+_RECOVERY_PRESSURE = 0.5
+
+_HASH_SPACE = 1 << 32
+
+
+class OverloadController:
+    """
+    Degrades deterministically instead of letting latency grow unbounded
+
+    Each observation compares the backlog (packets waiting) with
+    ``max_backlog`` and the capture-to-done latency with ``latency_budget_s``.
+    Sustained pressure raises the shedding level one step at a time, and
+    ``recover_after`` calm observations lower it again.
+
+    Level ``n`` samples low-value protocols at ``2**-n``; beyond level 3 all
+    other protocols are sampled at ``2**-(n-3)``. Sampling is by flow hash, so
+    a flow is kept or dropped as a whole, and because rates are powers of two
+    the flows kept at a lower rate are a subset of those kept at a higher one.
+    """
+
+    def __init__(
+        self,
+        max_backlog: int,
+        latency_budget_s: float,
+        low_value_protocols: Iterable[str] = (),
+        max_level: int = 10,
+        recover_after: int = 20
+    ):
+        self.max_backlog = max(max_backlog, 1)
+        self.latency_budget_s = latency_budget_s
+        self.low_value_protocols = set(low_value_protocols)
+        self.max_level = max_level
+        self.recover_after = recover_after
+
+        self.level = 0
+        self.low_value_rate = 1.0
+        self.default_rate = 1.0
+        self._calm = 0
+
+        self.admitted_count = 0
+        self.shed_count: Dict[str, int] = {}
+
+    def observe(self, backlog: int, latency_s: float) -> int:
+        """
+        Record the queue depth and latency of one processed batch
+
+        Returns:
+            The shedding level after this observation
+        """
+        pressure = max(backlog / self.max_backlog, latency_s / self.latency_budget_s)
+        if pressure > 1.0:
+            self._calm = 0
+            if self.level < self.max_level:
+                self._set_level(self.level + 1, pressure)
+        elif pressure < _RECOVERY_PRESSURE and self.level > 0:
+            self._calm += 1
+            if self._calm >= self.recover_after:
+                self._calm = 0
+                self._set_level(self.level - 1, pressure)
+        else:
+            self._calm = 0
+        return self.level
+
+    def _set_level(self, level: int, pressure: float) -> None:
+        self.level = level
+        self.low_value_rate = 0.5 ** level
+        self.default_rate = 0.5 ** max(level - _LOW_VALUE_LEVELS, 0)
+        log = logger.warning if level > 0 else logger.info
+        log(
+            f"Overload level {level} (pressure {pressure:.2f}): sampling low-value "
+            f"protocols at {self.low_value_rate:g}, others at {self.default_rate:g}"
+        )
+
+    def sampling_rate(self, protocol: str) -> float:
+        """Fraction of flows of ``protocol`` currently processed"""
+        if protocol in self.low_value_protocols:
+            return self.low_value_rate
+        return self.default_rate
+
+    def admit(
+        self,
+        protocol: str,
+        src_ip: str,
+        dst_ip: str,
+        src_port: int,
+        dst_port: int,
+        ip_proto: int = 0
+    ) -> float:
+        """
+        Decide whether a packet's flow is sampled
+
+        Returns:
+            The sampling rate the packet was kept at, or 0.0 if it is shed
+        """
+        rate = self.sampling_rate(protocol)
+        if rate < 1.0:
+            key = pack_flow_key(src_ip, dst_ip, src_port, dst_port, ip_proto)
+            if (flow_hash(key) & (_HASH_SPACE - 1)) >= rate * _HASH_SPACE:
+                self.shed_count[protocol] = self.shed_count.get(protocol, 0) + 1
+                return 0.0
+        self.admitted_count += 1
+        return rate
+
+    def stats(self) -> Dict[str, object]:
+        """Current level, rates and shed counters"""
+        return {
+            'level': self.level,
+            'low_value_rate': self.low_value_rate,
+            'default_rate': self.default_rate,
+            'admitted': self.admitted_count,
+            'shed': dict(self.shed_count)
+        }
@@ -0,0 +1,174 @@
+"""
+Async Edge Runtime - asyncio event loop driving capture, processing and sending
+"""
+from typing import Any, Callable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import signal
+import time
+
+from edge_agent.secure_connector.async_sender import AsyncUERSender
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AsyncEdgeRuntime:
+    """
+    Runs an :class:`~edge_agent.main.EdgeAgent` on an asyncio event loop
+
+    The capture socket is watched with ``add_reader`` and drained only when
+    the kernel has a block ready, so there is no polling interval between a
+    packet arriving and it being processed. Decoding, parsing and scoring run
+    on a single pipeline thread, which also runs flow expiry and the
+    coalescer's window flushes, so agent state is only ever touched from one
+    thread while the loop stays free for the sender, timers and signals.
+    With ``worker_processes > 1`` the loop only decodes and dispatches to the
+    shard workers.
+
+    SIGTERM and SIGINT stop capture after the block in progress, flush the
+    coalescer and shard workers, then drain the UER sender before returning.
+    SIGHUP reloads the risk model file right away instead of at the next check.
+    """
+
+    def __init__(
+        self,
+        agent,
+        stats_interval_s: float = 60.0,
+        expiry_interval_s: float = 1.0,
+        drain_timeout_s: float = 5.0
+    ):
+        self.agent = agent
+        self.stats_interval_s = stats_interval_s
+        self.expiry_interval_s = expiry_interval_s
+        self.drain_timeout_s = drain_timeout_s
+
+        self.sender = AsyncUERSender(agent.sender, max_queue=agent.config.uer_queue_size)
+        self._pipeline_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="comidf-pipeline")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._ready: Optional[asyncio.Event] = None
+
+    def request_stop(self) -> None:
+        """Begin a graceful shutdown; safe to call from signal handlers"""
+        if self._stop is not None and not self._stop.is_set():
+            logger.info("Shutdown requested, draining Edge Agent...")
+            self._stop.set()
+            self._ready.set()
+
+    def _request_reload(self) -> None:
+        if self.agent.scorer_watcher is not None:
+            logger.info("Reloading risk model")
+            self._loop.run_in_executor(self._pipeline_thread, self.agent.reload_scorer, True)
+
+    async def _in_pipeline(self, func: Callable[..., Any], *args) -> Any:
+        return await self._loop.run_in_executor(self._pipeline_thread, func, *args)
+
+    async def run(self) -> None:
+        """Run until a shutdown signal or :meth:`request_stop`, then drain"""
+        agent = self.agent
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._ready = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            self._loop.add_signal_handler(signum, self.request_stop)
+        self._loop.add_signal_handler(signal.SIGHUP, self._request_reload)
+
+        agent.uer_sink = self.sender
+        agent.running = True
+        sender_task = asyncio.create_task(self.sender.run(), name="comidf-uer-sender")
+        periodic = [
+            asyncio.create_task(self._every(self.expiry_interval_s, self._expire), name="comidf-expiry"),
+            asyncio.create_task(self._every(self.stats_interval_s, self._log_stats), name="comidf-stats")
+        ]
+        if agent.scorer_watcher is not None:
+            periodic.append(asyncio.create_task(
+                self._every(agent.scorer_watcher.interval_s, agent.reload_scorer), name="comidf-model-reload"
+            ))
+
+        try:
+            await self._capture()
+        except Exception as e:
+            logger.error(f"Capture failed: {e}")
+        finally:
+            agent.running = False
+            for task in periodic:
+                task.cancel()
+            await asyncio.gather(*periodic, return_exceptions=True)
+
+            # In-flight work first, so its UERs make it into the final batches
+            await self._in_pipeline(self._flush_pipeline)
+            await self.sender.drain(self.drain_timeout_s)
+            sender_task.cancel()
+            await asyncio.gather(sender_task, return_exceptions=True)
+
+            for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+                self._loop.remove_signal_handler(signum)
+            self._pipeline_thread.shutdown(wait=True)
+            agent.uer_sink = agent.sender
+            agent.stop()
+
+    async def _capture(self) -> None:
+        """Process ready capture blocks until stopped"""
+        agent = self.agent
+        capture = agent.open_capture()
+        sharded = agent.start_pipeline()
+
+        with capture:
+            fd = capture.fileno()
+            while not self._stop.is_set():
+                self._loop.add_reader(fd, self._ready.set)
+                try:
+                    # The timeout only guards against a missed wakeup
+                    await asyncio.wait_for(self._ready.wait(), 1.0)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    self._loop.remove_reader(fd)
+                self._ready.clear()
+
+                # Frames are views into the ring, valid until the next block is requested
+                for frames in capture.batches(timeout_ms=0):
+                    if sharded:
+                        agent.process_frames(frames)
+                    else:
+                        await self._in_pipeline(self._process_block, frames, capture.backlog)
+                    if self._stop.is_set():
+                        break
+
+    def _process_block(self, frames: List[tuple], backlog: Callable[[], int]) -> None:
+        """Process one capture block; ``backlog`` counts the frames queued behind it in the ring"""
+        agent = self.agent
+        try:
+            agent.process_frames(frames)
+            if frames:
+                agent.overload.observe(backlog(), time.time() - frames[0][1])
+        except Exception as e:
+            logger.error(f"Error processing capture block: {e}")
+
+    async def _every(self, interval_s: float, job: Callable[[], None]) -> None:
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await self._in_pipeline(job)
+            except Exception as e:
+                logger.error(f"Periodic {job.__name__} failed: {e}")
+
+    def _expire(self) -> None:
+        """Close coalescing windows and idle flows even when no packets arrive"""
+        self.agent.coalescer.flush_expired()
+        self.agent.feature_aggregator.expire()
+
+    def _log_stats(self) -> None:
+        agent = self.agent
+        logger.info(
+            f"Processed {agent.packet_count} packets, {agent.uer_count} high-risk events; "
+            f"flows: {agent.feature_aggregator.stats()}; sender: {self.sender.stats()}"
+        )
+
+    def _flush_pipeline(self) -> None:
+        agent = self.agent
+        if agent.pipeline is not None:
+            agent.pipeline.stop()
+            agent.pipeline = None
+        agent.coalescer.flush()
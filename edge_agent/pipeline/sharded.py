@@ -0,0 +1,259 @@
+"""
+Sharded Pipeline - Spreads packet processing over worker processes by flow hash
+"""
+from typing import Any, Callable, Dict, List, Optional
+import multiprocessing
+import queue
+import threading
+import time
+
+from edge_agent.capture.packet import CapturedPacket
+from edge_agent.fal.flow_table import flow_hash, ip_to_int, pack_flow_key
+from edge_agent.pipeline.shm_ring import SharedMemoryRing
+from shared.config.constants import PROTOCOL_PORTS
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Worker idle backoff bounds (seconds)
+_IDLE_SLEEP_MIN = 0.0001
+_IDLE_SLEEP_MAX = 0.005
+
+# How often workers ship their metrics to the parent (seconds)
+_METRICS_INTERVAL = 1.0
+
+# DNS is sharded by client so per-client tunneling features see all its queries
+_DNS_PORTS = frozenset(port for _, port in PROTOCOL_PORTS.get('DNS', []))
+
+
+class _MetricsSnapshot:
+    """Cumulative metrics of one shard worker, sent over the UER queue"""
+
+    __slots__ = ('shard_index', 'data')
+
+    def __init__(self, shard_index: int, data: Dict[str, Any]):
+        self.shard_index = shard_index
+        self.data = data
+
+
+def flow_shard(src_ip: str, dst_ip: str, src_port: int, dst_port: int, shard_count: int) -> int:
+    """
+    Map a packet to a shard by its normalized flow key
+
+    Both directions of a flow produce the same packed key, and ``flow_hash`` is
+    stable across processes (unlike ``hash()`` on str), so a flow always lands
+    on one worker.
+    """
+    return flow_hash(pack_flow_key(src_ip, dst_ip, src_port, dst_port)) % shard_count
+
+
+def client_shard(client_ip: str, shard_count: int) -> int:
+    """Map a client address to a shard; every flow of the client lands on the same worker"""
+    return flow_hash(ip_to_int(client_ip)) % shard_count
+
+
+def _shard_worker(
+    shard_index: int,
+    config_data: Dict[str, Any],
+    ring_args: tuple,
+    uer_queue: multiprocessing.Queue,
+    stop_event: multiprocessing.Event
+) -> None:
+    """
+    Worker process: drain one ring through a private EdgeAgent pipeline
+
+    The worker agent has no uplink (connector, spool or sender) of its own;
+    its UERs go to the parent over ``uer_queue``.
+    """
+    # Imported here to avoid a circular import with edge_agent.main
+    from edge_agent.config.agent_config import AgentConfig
+    from edge_agent.main import EdgeAgent
+
+    class ShardAgent(EdgeAgent):
+        """EdgeAgent whose UERs go to the parent's merged sender"""
+
+        def _emit_uer(self, uer) -> None:
+            uer_queue.put(uer)
+
+    agent = ShardAgent(config=AgentConfig(**config_data), uplink=False)
+    ring = SharedMemoryRing(*ring_args)
+    idle_sleep = _IDLE_SLEEP_MIN
+    metrics_due = time.monotonic() + _METRICS_INTERVAL
+    logger.info(f"Shard worker {shard_index} started")
+
+    try:
+        while True:
+            processed = 0
+            backlog = len(ring)
+            for batch in ring.drain():
+                agent.process_packets(batch)
+                processed += len(batch)
+                agent.overload.observe(backlog, time.time() - batch[0].timestamp)
+            agent.coalescer.flush_expired()
+            agent.reload_scorer()
+            if time.monotonic() >= metrics_due:
+                uer_queue.put(_MetricsSnapshot(shard_index, agent.metrics.snapshot()))
+                metrics_due = time.monotonic() + _METRICS_INTERVAL
+
+            agent.packet_count += processed
+            if processed:
+                idle_sleep = _IDLE_SLEEP_MIN
+            elif stop_event.is_set():
+                break
+            else:
+                time.sleep(idle_sleep)
+                idle_sleep = min(idle_sleep * 2, _IDLE_SLEEP_MAX)
+    finally:
+        agent.coalescer.flush()
+        uer_queue.put(_MetricsSnapshot(shard_index, agent.metrics.snapshot()))
+        ring.close()
+        logger.info(f"Shard worker {shard_index} stopped after {agent.packet_count} packets")
+
+
+class ShardedPipeline:
+    """
+    Runs N EdgeAgent pipelines in worker processes
+
+    The capture process decodes frames and copies each packet into the
+    shared-memory ring of the worker that owns its flow; each worker keeps its
+    own protocol agents and a ``max_flows / worker_count`` slice of flow state.
+    DNS is sharded by client address instead, so each client's tunneling
+    sketches live whole on one worker. UERs from all workers are drained by a
+    single thread and passed to ``emit`` in the parent, which queues them on
+    the parent's batched sender. Workers periodically send their metrics
+    over the same queue; they are merged into the parent's ``metrics``.
+    """
+
+    def __init__(self, config, emit: Callable[[Any], None], worker_count: int,
+                 ring_slots: int = 4096, metrics=None):
+        if worker_count < 1:
+            raise ValueError("worker_count must be at least 1")
+
+        self.config = config
+        self.emit = emit
+        self.worker_count = worker_count
+        self.ring_slots = ring_slots
+        self.metrics = metrics
+
+        self._rings: List[SharedMemoryRing] = []
+        self._workers: List[multiprocessing.Process] = []
+        self._uer_queue: Optional[multiprocessing.Queue] = None
+        self._stop_event: Optional[multiprocessing.Event] = None
+        self._sender: Optional[threading.Thread] = None
+        self._sender_running = False
+
+        self.dispatched_count = 0
+        self.sent_count = 0
+
+    def worker_config(self) -> Dict[str, Any]:
+        """
+        Agent configuration for one worker
+
+        Each worker owns only its shard of the flows, so its flow table and
+        windows get an equal slice of ``max_flows``. The spool and metrics
+        endpoint belong to the parent alone.
+        """
+        config_data = self.config.dict()
+        config_data.update(
+            max_flows=max(self.config.max_flows // self.worker_count, 1),
+            spool_dir=None,
+            metrics_port=0,
+            worker_processes=1
+        )
+        return config_data
+
+    def start(self) -> None:
+        """Create the rings, fork the workers and start the merged sender"""
+        self._uer_queue = multiprocessing.Queue()
+        self._stop_event = multiprocessing.Event()
+        config_data = self.worker_config()
+
+        for index in range(self.worker_count):
+            ring = SharedMemoryRing(slot_count=self.ring_slots)
+            worker = multiprocessing.Process(
+                target=_shard_worker,
+                args=(index, config_data, ring.attach_args(), self._uer_queue, self._stop_event),
+                name=f"comidf-shard-{index}",
+                daemon=True
+            )
+            worker.start()
+            self._rings.append(ring)
+            self._workers.append(worker)
+
+        self._sender_running = True
+        self._sender = threading.Thread(target=self._send_loop, name="comidf-uer-sender", daemon=True)
+        self._sender.start()
+        logger.info(f"Started sharded pipeline with {self.worker_count} workers")
+
+    def dispatch(self, packet: CapturedPacket) -> bool:
+        """
+        Hand a decoded packet to the worker owning its flow
+
+        DNS packets go to the worker owning the client (the side not on a
+        DNS port), which still keeps each flow on one worker.
+
+        Returns:
+            False if the worker's ring was full and the packet was dropped
+        """
+        if packet.dst_port in _DNS_PORTS:
+            shard = client_shard(packet.src_ip, self.worker_count)
+        elif packet.src_port in _DNS_PORTS:
+            shard = client_shard(packet.dst_ip, self.worker_count)
+        else:
+            shard = flow_shard(
+                packet.src_ip, packet.dst_ip, packet.src_port, packet.dst_port, self.worker_count
+            )
+        self.dispatched_count += 1
+        return self._rings[shard].put(packet)
+
+    def _send_loop(self) -> None:
+        """Drain UERs from every worker into the parent's emit callback"""
+        while self._sender_running or not self._uer_queue.empty():
+            try:
+                uer = self._uer_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if isinstance(uer, _MetricsSnapshot):
+                if self.metrics is not None:
+                    self.metrics.merge_remote(uer.shard_index, uer.data)
+                continue
+            try:
+                self.emit(uer)
+                self.sent_count += 1
+            except Exception as e:
+                logger.error(f"Failed to send UER from shard: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Dispatch, drop and queue statistics per shard"""
+        return {
+            'dispatched': self.dispatched_count,
+            'sent': self.sent_count,
+            'shards': [
+                {'queued': len(ring), 'dropped': ring.dropped_count, 'truncated': ring.truncated_count}
+                for ring in self._rings
+            ]
+        }
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Let workers drain their rings, then stop the sender"""
+        if self._stop_event is None:
+            return
+
+        self._stop_event.set()
+        for worker in self._workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                logger.warning(f"{worker.name} did not exit, terminating")
+                worker.terminate()
+
+        self._sender_running = False
+        if self._sender is not None:
+            self._sender.join(timeout)
+
+        logger.info(f"Sharded pipeline stopped: {self.stats()}")
+        for ring in self._rings:
+            ring.close()
+
+        self._rings = []
+        self._workers = []
+        self._stop_event = None
@@ -0,0 +1,183 @@
+"""
+Shared Memory Ring - Single-producer/single-consumer packet ring between processes
+"""
+from typing import Iterator, List, Optional, Tuple
+from multiprocessing import shared_memory
+import socket
+import struct
+
+from edge_agent.capture.packet import CapturedPacket
+
+# Producer and consumer indexes live on separate cache lines
+_INDEX = struct.Struct('=Q')
+_HEAD_OFFSET = 0
+_TAIL_OFFSET = 64
+_HEADER_SIZE = 128
+
+# Per-slot commit word: the ring index of the packet in the slot, plus one
+_SLOT_SEQ = struct.Struct('=Q')
+
+# timestamp, src_port, dst_port, ip_proto, address family, payload length, src, dst
+_SLOT_HEADER = struct.Struct('=dHHBBH16s16s')
+
+
+class SharedMemoryRing:
+    """
+    Fixed-slot packet ring in a ``multiprocessing.shared_memory`` segment
+
+    One process calls :meth:`put`, one other process calls :meth:`drain`.
+    Each slot holds the packet metadata and up to ``slot_size`` bytes of
+    payload; the consumer reads payloads as views into the segment. The
+    producer publishes a slot by writing its commit word and then advancing
+    the head index, the consumer frees slots by advancing the tail index
+    after use.
+
+    Python has no memory barriers, so on weakly ordered CPUs (aarch64) the
+    consumer may see the head index move before the slot contents land.
+    The consumer therefore only takes slots whose commit word matches their
+    ring index and leaves the rest for the next drain.
+    """
+
+    def __init__(
+        self,
+        slot_count: int = 4096,
+        slot_size: int = 2048,
+        name: Optional[str] = None
+    ):
+        if slot_count & (slot_count - 1):
+            raise ValueError("slot_count must be a power of two")
+        overhead = _SLOT_SEQ.size + _SLOT_HEADER.size
+        if slot_size <= overhead:
+            raise ValueError(f"slot_size must exceed {overhead} bytes")
+
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.payload_capacity = slot_size - overhead
+        self._mask = slot_count - 1
+
+        size = _HEADER_SIZE + slot_count * slot_size
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._owner = True
+            self._shm.buf[:_HEADER_SIZE] = bytes(_HEADER_SIZE)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self._buf = self._shm.buf
+
+        self.dropped_count = 0
+        self.truncated_count = 0
+
+    @property
+    def name(self) -> str:
+        """Segment name used to attach from another process"""
+        return self._shm.name
+
+    def attach_args(self) -> Tuple[int, int, str]:
+        """Arguments for re-creating this ring in a child process"""
+        return self.slot_count, self.slot_size, self.name
+
+    def _head(self) -> int:
+        return _INDEX.unpack_from(self._buf, _HEAD_OFFSET)[0]
+
+    def _tail(self) -> int:
+        return _INDEX.unpack_from(self._buf, _TAIL_OFFSET)[0]
+
+    def __len__(self) -> int:
+        return self._head() - self._tail()
+
+    def put(self, packet: CapturedPacket) -> bool:
+        """
+        Copy a packet into the next free slot
+
+        Returns:
+            False if the ring is full and the packet was dropped
+        """
+        head = self._head()
+        if head - self._tail() >= self.slot_count:
+            self.dropped_count += 1
+            return False
+
+        if ':' in packet.src_ip:
+            family = 6
+            src = socket.inet_pton(socket.AF_INET6, packet.src_ip)
+            dst = socket.inet_pton(socket.AF_INET6, packet.dst_ip)
+        else:
+            family = 4
+            src = socket.inet_pton(socket.AF_INET, packet.src_ip)
+            dst = socket.inet_pton(socket.AF_INET, packet.dst_ip)
+
+        payload = packet.payload
+        length = len(payload)
+        if length > self.payload_capacity:
+            length = self.payload_capacity
+            self.truncated_count += 1
+
+        slot = _HEADER_SIZE + (head & self._mask) * self.slot_size
+        offset = slot + _SLOT_SEQ.size
+        _SLOT_HEADER.pack_into(
+            self._buf, offset,
+            packet.timestamp, packet.src_port, packet.dst_port,
+            packet.ip_proto, family, length, src, dst
+        )
+        data = offset + _SLOT_HEADER.size
+        self._buf[data:data + length] = payload[:length]
+
+        _SLOT_SEQ.pack_into(self._buf, slot, head + 1)
+        _INDEX.pack_into(self._buf, _HEAD_OFFSET, head + 1)
+        return True
+
+    def drain(self, max_items: int = 256) -> Iterator[List[CapturedPacket]]:
+        """
+        Yield the published packets as one batch of up to ``max_items``
+
+        Payloads are views into the segment; the slots are freed, and the
+        views released, when the consumer advances past the batch.
+        """
+        buf = self._buf
+        tail = self._tail()
+        end = min(self._head(), tail + max_items)
+        if tail == end:
+            return
+
+        batch: List[CapturedPacket] = []
+        for index in range(tail, end):
+            slot = _HEADER_SIZE + (index & self._mask) * self.slot_size
+            if _SLOT_SEQ.unpack_from(buf, slot)[0] != index + 1:
+                # Head index visible before the slot contents
+                end = index
+                break
+            offset = slot + _SLOT_SEQ.size
+            timestamp, src_port, dst_port, ip_proto, family, length, src, dst = (
+                _SLOT_HEADER.unpack_from(buf, offset)
+            )
+            if family == 6:
+                src_ip = socket.inet_ntop(socket.AF_INET6, src)
+                dst_ip = socket.inet_ntop(socket.AF_INET6, dst)
+            else:
+                src_ip = socket.inet_ntop(socket.AF_INET, src[:4])
+                dst_ip = socket.inet_ntop(socket.AF_INET, dst[:4])
+
+            data = offset + _SLOT_HEADER.size
+            batch.append(CapturedPacket(
+                buf[data:data + length], src_ip, dst_ip, src_port, dst_port, ip_proto, timestamp
+            ))
+        if not batch:
+            return
+
+        try:
+            yield batch
+        finally:
+            for packet in batch:
+                try:
+                    packet.payload.release()
+                except BufferError:
+                    pass
+            _INDEX.pack_into(buf, _TAIL_OFFSET, end)
+
+    def close(self) -> None:
+        """Detach from the segment, unlinking it if this side created it"""
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
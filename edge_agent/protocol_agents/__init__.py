@@ -4,12 +4,28 @@ from edge_agent.protocol_agents.mqtt_agent import MQTTAgent
 from edge_agent.protocol_agents.http_agent import HTTPAgent
 from edge_agent.protocol_agents.dns_agent import DNSAgent
 from edge_agent.protocol_agents.quic_agent import QUICAgent
+from edge_agent.protocol_agents.modbus_agent import ModbusTCPAgent
+from edge_agent.protocol_agents.coap_agent import CoAPAgent
+from edge_agent.protocol_agents.layout import Bits, Bytes, Field, Layout, Prefixed, VarInt
+from edge_agent.protocol_agents.layout_agent import LayoutAgent, layout_agent
+from edge_agent.protocol_agents.demux import ProtocolDemultiplexer
 
 __all__ = [
     'BaseProtocolAgent',
     'MQTTAgent',
     'HTTPAgent',
     'DNSAgent',
-    'QUICAgent'
+    'QUICAgent',
+    'ModbusTCPAgent',
+    'CoAPAgent',
+    'Layout',
+    'Field',
+    'Bits',
+    'Bytes',
+    'Prefixed',
+    'VarInt',
+    'LayoutAgent',
+    'layout_agent',
+    'ProtocolDemultiplexer'
 ]
 
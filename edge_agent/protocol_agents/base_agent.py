@@ -2,10 +2,14 @@
 Base Protocol Agent - Abstract class for all protocol agents
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Sequence, Union
+from datetime import datetime
 import struct
 import socket
+import uuid
 
+from edge_agent.fal.entropy import byte_entropy
+from shared.config.constants import MAX_PACKET_SAMPLE_SIZE
 from shared.models.uer_schema import (
     UnifiedEventReport, ProtocolInfo, FlowFeatures, ProtocolSpecificFeatures
 )
@@ -13,10 +17,18 @@ from shared.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Agents parse in place from any buffer; capture hands out memoryviews
+PacketData = Union[bytes, bytearray, memoryview]
+
 
 class BaseProtocolAgent(ABC):
     """Base class for all protocol-specific agents"""
     
+    # Agents keeping per-endpoint state set this and implement observe()
+    tracks_endpoints = False
+    # Agents whose message framing depends on the transport set this and implement unframe()
+    transport_framed = False
+    
     def __init__(self, agent_id: str, tenant_id: str, interface: str):
         self.agent_id = agent_id
         self.tenant_id = tenant_id
@@ -24,18 +36,75 @@ class BaseProtocolAgent(ABC):
         self.packet_count = 0
         
     @abstractmethod
-    def parse_packet(self, packet_data: bytes) -> Optional[Dict[str, Any]]:
+    def parse_packet(self, packet_data: PacketData) -> Optional[Dict[str, Any]]:
         """
         Parse raw packet data and extract protocol-specific features
         
         Args:
-            packet_data: Raw packet bytes
+            packet_data: Raw packet bytes or a memoryview into the capture
+                buffer; parsers read fields in place with ``unpack_from``
             
         Returns:
             Dict containing parsed features or None if parsing fails
         """
         pass
     
+    def _parse_unchecked(self, packet_data: PacketData) -> Optional[Dict[str, Any]]:
+        """
+        Parse a packet without exception handling
+        
+        Agents override this with their parser body so the batch path can run
+        it under a single try/except; the default defers to ``parse_packet``.
+        """
+        return self.parse_packet(packet_data)
+    
+    def parse_packets(self, batch: Sequence[PacketData]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Parse a batch of packets
+        
+        Args:
+            batch: Sequence of raw packet payloads (bytes or memoryview)
+            
+        Returns:
+            One parsed dict per payload, None where parsing failed
+        """
+        parse = self._parse_unchecked
+        results: List[Optional[Dict[str, Any]]] = []
+        failures = 0
+        packets = iter(batch)
+        
+        # The try block is only re-entered after a malformed packet
+        while True:
+            try:
+                for packet_data in packets:
+                    results.append(parse(packet_data))
+                break
+            except Exception:
+                results.append(None)
+                failures += 1
+        
+        if failures:
+            logger.debug("%s: %d/%d packets failed to parse", self.get_protocol_name(), failures, len(results))
+        self.packet_count += len(results)
+        return results
+    
+    def unframe(self, packet_data: PacketData, ip_proto: int) -> PacketData:
+        """
+        Strip transport-specific framing from an L4 payload
+        
+        Called before parsing for agents with ``transport_framed``.
+        """
+        return packet_data
+    
+    def observe(self, packet: Dict[str, Any], src_ip: str, dst_ip: str) -> None:
+        """
+        Update per-endpoint state with a parsed packet
+        
+        Called before feature extraction for agents with ``tracks_endpoints``,
+        which may add the endpoint's current features to ``packet``.
+        """
+        pass
+    
     @abstractmethod
     def extract_flow_features(
         self, 
@@ -55,43 +124,65 @@ class BaseProtocolAgent(ABC):
     
     def create_uer(
         self,
-        packet_data: bytes,
+        packet_data: PacketData,
         src_ip: str,
         dst_ip: str,
         src_port: int,
         dst_port: int,
         risk_score: float,
-        anomaly_flags: list
+        anomaly_flags: list,
+        sample_size: int = MAX_PACKET_SAMPLE_SIZE
     ) -> UnifiedEventReport:
-        """Create Unified Event Report from parsed packet"""
-        from datetime import datetime
-        import hashlib
+        """
+        Create Unified Event Report from raw packet data
         
+        Parses the packet and extracts its features; callers that already
+        hold the parse result should use :meth:`build_uer` instead.
+        """
         # Parse packet
         parsed = self.parse_packet(packet_data)
         if not parsed:
             raise ValueError("Failed to parse packet")
         
+        return self.build_uer(
+            parsed,
+            self.extract_flow_features(parsed, {}),
+            self.extract_protocol_features(parsed),
+            packet_data, src_ip, dst_ip, src_port, dst_port,
+            risk_score, anomaly_flags, sample_size
+        )
+    
+    def build_uer(
+        self,
+        parsed: Dict[str, Any],
+        flow_features: FlowFeatures,
+        protocol_features: ProtocolSpecificFeatures,
+        packet_data: PacketData,
+        src_ip: str,
+        dst_ip: str,
+        src_port: int,
+        dst_port: int,
+        risk_score: float,
+        anomaly_flags: list,
+        sample_size: int = MAX_PACKET_SAMPLE_SIZE
+    ) -> UnifiedEventReport:
+        """
+        Create Unified Event Report from an already parsed packet
+        
+        ``sample_size`` bytes of the payload are copied into
+        ``raw_packet_sample``; pass 0 to skip the copy entirely.
+        """
         # Get protocol info
+        version = parsed.get('version')
         protocol_info = ProtocolInfo(
             protocol_type=self.get_protocol_name(),
-            version=parsed.get('version'),
+            version=str(version) if version is not None else None,
             port=dst_port if dst_port < 65536 else src_port,
             is_encrypted=parsed.get('encrypted', False)
         )
         
-        # Extract flow features
-        flow_features = self.extract_flow_features(parsed, {})
-        
-        # Extract protocol features
-        protocol_features = self.extract_protocol_features(parsed)
-        
-        # Create UER
-        import uuid
-        event_id = str(uuid.uuid4())
-        
         return UnifiedEventReport(
-            event_id=event_id,
+            event_id=str(uuid.uuid4()),
             agent_id=self.agent_id,
             tenant_id=self.tenant_id,
             timestamp=datetime.now(),
@@ -104,7 +195,7 @@ class BaseProtocolAgent(ABC):
             protocol_features=protocol_features,
             edge_agent_risk_score=risk_score,
             edge_agent_anomaly_flags=anomaly_flags,
-            raw_packet_sample=packet_data[:1500] if len(packet_data) > 1500 else packet_data
+            raw_packet_sample=bytes(packet_data[:sample_size]) if sample_size > 0 else None
         )
     
     @abstractmethod
@@ -112,24 +203,7 @@ class BaseProtocolAgent(ABC):
         """Return protocol name"""
         pass
     
-    def calculate_entropy(self, data: bytes) -> float:
-        """Calculate Shannon entropy"""
-        if not data:
-            return 0.0
-        
-        entropy = 0.0
-        data_len = len(data)
-        
-        # Count byte frequencies
-        byte_counts = [0] * 256
-        for byte in data:
-            byte_counts[byte] += 1
-        
-        # Calculate entropy
-        for count in byte_counts:
-            if count > 0:
-                probability = count / data_len
-                entropy -= probability * (probability.bit_length() - 1)
-        
-        return entropy
+    def calculate_entropy(self, data: PacketData) -> float:
+        """Calculate Shannon entropy in bits per byte"""
+        return byte_entropy(data)
 
@@ -0,0 +1,130 @@
+"""
+CoAP Protocol Agent - Detects and analyzes CoAP traffic
+"""
+from typing import Any, Dict, List, Optional
+
+from edge_agent.protocol_agents.base_agent import PacketData
+from edge_agent.protocol_agents.layout import Bits, Bytes, Field, Layout
+from edge_agent.protocol_agents.layout_agent import LayoutAgent
+from shared.models.uer_schema import ProtocolSpecificFeatures
+
+# RFC 7252 fixed header and token
+COAP_LAYOUT = Layout(
+    Bits('B', ('version', 2, 1), ('message_type', 2), ('token_length', 4)),
+    Bits('B', ('code_class', 3), ('code_detail', 5)),
+    Field('message_id', 'H'),
+    Bytes('token', 'token_length')
+)
+
+MESSAGE_TYPES = ("CON", "NON", "ACK", "RST")
+
+METHODS = {1: "GET", 2: "POST", 3: "PUT", 4: "DELETE", 5: "FETCH", 6: "PATCH", 7: "iPATCH"}
+
+OPTION_URI_HOST = 3
+OPTION_OBSERVE = 6
+OPTION_URI_PATH = 11
+OPTION_CONTENT_FORMAT = 12
+OPTION_URI_QUERY = 15
+OPTION_BLOCK2 = 23
+OPTION_BLOCK1 = 27
+
+PAYLOAD_MARKER = 0xFF
+MAX_OPTIONS = 64
+
+
+def _extended(nibble: int, data: PacketData, pos: int) -> tuple:
+    """Option delta/length nibble with its extended bytes; returns (value, position)"""
+    if nibble < 13:
+        return nibble, pos
+    if nibble == 13:
+        return data[pos] + 13, pos + 1
+    if nibble == 14:
+        return ((data[pos] << 8) | data[pos + 1]) + 269, pos + 2
+    raise ValueError("Reserved option nibble 15")
+
+
+class CoAPAgent(LayoutAgent):
+    """CoAP protocol agent implementation"""
+
+    protocol_name = "CoAP"
+    layout = COAP_LAYOUT
+
+    def decode(self, fields: Dict[str, Any], packet_data: PacketData, end: int) -> Optional[Dict[str, Any]]:
+        """Decode the options and payload that follow the token"""
+        if fields['token_length'] > 8:
+            return None
+
+        code_class = fields['code_class']
+        code_detail = fields['code_detail']
+        fields['message_type'] = MESSAGE_TYPES[fields['message_type']]
+        fields['code'] = f"{code_class}.{code_detail:02d}"
+        fields['method'] = METHODS.get(code_detail) if code_class == 0 else None
+        fields['is_request'] = code_class == 0 and code_detail != 0
+        fields['encrypted'] = False
+
+        uri_path: List[str] = []
+        uri_query: List[str] = []
+        option_count = 0
+        option_number = 0
+        pos = end
+        data_len = len(packet_data)
+        while pos < data_len and packet_data[pos] != PAYLOAD_MARKER:
+            option_count += 1
+            if option_count > MAX_OPTIONS:
+                raise ValueError("Too many CoAP options")
+            header = packet_data[pos]
+            delta, pos = _extended(header >> 4, packet_data, pos + 1)
+            length, pos = _extended(header & 0x0F, packet_data, pos)
+            if pos + length > data_len:
+                raise ValueError("CoAP option runs past the end of the packet")
+            option_number += delta
+            value = packet_data[pos:pos + length]
+            pos += length
+
+            if option_number == OPTION_URI_PATH:
+                uri_path.append(str(value, 'utf-8', errors='replace'))
+            elif option_number == OPTION_URI_QUERY:
+                uri_query.append(str(value, 'utf-8', errors='replace'))
+            elif option_number == OPTION_URI_HOST:
+                fields['uri_host'] = str(value, 'utf-8', errors='replace')
+            elif option_number == OPTION_CONTENT_FORMAT:
+                fields['content_format'] = int.from_bytes(value, 'big')
+            elif option_number == OPTION_OBSERVE:
+                fields['observe'] = int.from_bytes(value, 'big')
+            elif option_number in (OPTION_BLOCK1, OPTION_BLOCK2):
+                fields['block_transfer'] = True
+
+        if pos < data_len:
+            # Skip the payload marker; a marker with no payload is malformed
+            pos += 1
+            if pos == data_len:
+                raise ValueError("CoAP payload marker without payload")
+        fields['uri_path'] = '/' + '/'.join(uri_path)
+        fields['uri_query_count'] = len(uri_query)
+        fields['option_count'] = option_count
+        fields['payload_length'] = data_len - pos
+        fields['token'] = fields['token'].hex()
+        return fields
+
+    def extract_protocol_features(
+        self,
+        packet: Dict[str, Any]
+    ) -> ProtocolSpecificFeatures:
+        """Extract CoAP-specific features"""
+        return ProtocolSpecificFeatures(
+            metadata={
+                'coap_type': packet.get('message_type'),
+                'coap_code': packet.get('code'),
+                'coap_method': packet.get('method'),
+                'message_id': packet.get('message_id'),
+                'token_length': packet.get('token_length'),
+                'uri_host': packet.get('uri_host'),
+                'uri_path': packet.get('uri_path'),
+                'uri_query_count': packet.get('uri_query_count', 0),
+                'content_format': packet.get('content_format'),
+                'observe': packet.get('observe'),
+                'block_transfer': packet.get('block_transfer', False),
+                'option_count': packet.get('option_count', 0),
+                'payload_length': packet.get('payload_length', 0)
+            }
+        )
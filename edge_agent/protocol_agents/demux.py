@@ -0,0 +1,278 @@
+"""
+Protocol Demultiplexer - Classifies L4 payloads to protocol agents before parsing
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import time
+
+from edge_agent.capture.packet import IPPROTO_TCP, IPPROTO_UDP
+from shared.config.constants import PROTOCOL_PORTS
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_TRANSPORTS = {'tcp': IPPROTO_TCP, 'udp': IPPROTO_UDP}
+
+# QUIC versions accepted in long headers (v1, v2, draft-29)
+_QUIC_VERSIONS = {0x00000001, 0x6B3343CF, 0xFF00001D}
+
+Validator = Callable[[memoryview], bool]
+
+# (ip_proto, server address, server port) a signature match was seen on
+LearnedKey = Tuple[int, str, int]
+
+
+def _is_mqtt_connect(payload) -> bool:
+    """CONNECT fixed header followed by the MQTT/MQIsdp protocol name"""
+    pos = 1
+    while pos < 5 and pos < len(payload) and payload[pos] & 0x80:
+        pos += 1
+    pos += 1
+    return (
+        payload[pos:pos + 6] == b'\x00\x04MQTT'
+        or payload[pos:pos + 8] == b'\x00\x06MQIsdp'
+    )
+
+
+def _is_quic_long_header(payload) -> bool:
+    """Long header with a known version"""
+    return len(payload) >= 7 and int.from_bytes(payload[1:5], 'big') in _QUIC_VERSIONS
+
+
+def _looks_like_dns(payload) -> bool:
+    """DNS header shape: standard opcode, zero Z bit, sane section counts"""
+    if len(payload) < 12:
+        return False
+    opcode = (payload[2] >> 3) & 0x0F
+    if opcode > 2 or payload[3] & 0x40:
+        return False
+    qdcount = (payload[4] << 8) | payload[5]
+    if qdcount != 1:
+        return False
+    is_response = payload[2] & 0x80
+    # Queries carry no answers; NS/AR counts stay small in practice
+    if not is_response and (payload[6] or payload[7]):
+        return False
+    return payload[8] == 0 and payload[10] == 0
+
+
+def _looks_like_modbus(payload) -> bool:
+    """MBAP header: protocol id 0 and a length that matches the segment"""
+    if len(payload) < 8 or payload[2] or payload[3]:
+        return False
+    length = (payload[4] << 8) | payload[5]
+    return 2 <= length <= 254 and length + 6 <= len(payload) and 0 < payload[7] & 0x7F < 100
+
+
+def _looks_like_coap(payload) -> bool:
+    """CoAP header: version 1, valid token length and a request or response code class"""
+    if len(payload) < 4 or payload[0] >> 6 != 1 or payload[0] & 0x0F > 8:
+        return False
+    return payload[1] >> 5 in (0, 2, 4, 5) and len(payload) >= 4 + (payload[0] & 0x0F)
+
+
+# (protocol, transport, leading bytes, validator, server port is destination)
+PROTOCOL_SIGNATURES: List[Tuple[str, str, bytes, Optional[Validator], bool]] = [
+    ("MQTT", "tcp", b'\x10', _is_mqtt_connect, True),
+    ("HTTP", "tcp", b'GET ', None, True),
+    ("HTTP", "tcp", b'POST ', None, True),
+    ("HTTP", "tcp", b'PUT ', None, True),
+    ("HTTP", "tcp", b'HEAD ', None, True),
+    ("HTTP", "tcp", b'DELETE ', None, True),
+    ("HTTP", "tcp", b'OPTIONS ', None, True),
+    ("HTTP", "tcp", b'PATCH ', None, True),
+    ("HTTP", "tcp", b'CONNECT ', None, True),
+    ("HTTP", "tcp", b'TRACE ', None, True),
+    ("HTTP", "tcp", b'HTTP/1.', None, False),
+    # TLS handshake record, SSL 3.0 - TLS 1.3 record versions
+    ("HTTP", "tcp", b'\x16\x03\x00', None, True),
+    ("HTTP", "tcp", b'\x16\x03\x01', None, True),
+    ("HTTP", "tcp", b'\x16\x03\x02', None, True),
+    ("HTTP", "tcp", b'\x16\x03\x03', None, True),
+    ("HTTP", "tcp", b'\x16\x03\x04', None, True),
+] + [
+    ("QUIC", "udp", bytes([first_byte]), _is_quic_long_header, True)
+    for first_byte in range(0xC0, 0x100)
+]
+
+# Structural checks tried when no prefix matches: (protocol, transport, validator)
+PROTOCOL_SHAPES: List[Tuple[str, str, Validator]] = [
+    ("DNS", "udp", _looks_like_dns),
+    ("Modbus", "tcp", _looks_like_modbus),
+    ("CoAP", "udp", _looks_like_coap),
+]
+
+
+class _TrieNode:
+    """Signature trie node keyed by payload byte"""
+
+    __slots__ = ('children', 'protocol', 'validator', 'server_is_dst')
+
+    def __init__(self):
+        self.children: Dict[int, '_TrieNode'] = {}
+        self.protocol: Optional[str] = None
+        self.validator: Optional[Validator] = None
+        self.server_is_dst = True
+
+
+class ProtocolDemultiplexer:
+    """
+    Maps an L4 payload to the name of the protocol agent that should parse it
+
+    Lookup order is the precomputed port table, then the first-bytes
+    signature trie, then servers learned from earlier signature matches and
+    finally cheap header-shape checks. A learned server is keyed by transport,
+    address and port, so a match on one host does not claim the port on every
+    other; it expires ``learned_ttl_s`` after its last signature match and
+    the least recently matched are evicted beyond ``learned_capacity``. It
+    only decides packets no signature recognizes, such as the continuation
+    segments of a stream whose first packet matched. Every step is bounded by
+    a constant, so classification is O(1) per packet; packets no enabled
+    agent can handle are rejected here.
+    """
+
+    def __init__(self, enabled_protocols, learned_ttl_s: float = 300.0, learned_capacity: int = 65536):
+        self.enabled_protocols = set(enabled_protocols)
+        self.learned_ttl_s = learned_ttl_s
+        self.learned_capacity = learned_capacity
+
+        self.port_table: Dict[int, List[Optional[str]]] = {}
+        self.learned: 'OrderedDict[LearnedKey, Tuple[str, float]]' = OrderedDict()
+        self._tries: Dict[int, _TrieNode] = {}
+        self._max_depth: Dict[int, int] = {}
+        self._shapes: Dict[int, List[Tuple[str, Validator]]] = {}
+        for ip_proto in _TRANSPORTS.values():
+            self.port_table[ip_proto] = [None] * 65536
+            self._tries[ip_proto] = _TrieNode()
+            self._max_depth[ip_proto] = 0
+            self._shapes[ip_proto] = []
+
+        for protocol in self.enabled_protocols:
+            for transport, port in PROTOCOL_PORTS.get(protocol, []):
+                self.port_table[_TRANSPORTS[transport]][port] = protocol
+
+        for protocol, transport, prefix, validator, server_is_dst in PROTOCOL_SIGNATURES:
+            if protocol in self.enabled_protocols:
+                self._add_signature(_TRANSPORTS[transport], prefix, protocol, validator, server_is_dst)
+
+        for protocol, transport, validator in PROTOCOL_SHAPES:
+            if protocol in self.enabled_protocols:
+                self._shapes[_TRANSPORTS[transport]].append((protocol, validator))
+
+        self.classified_count = 0
+        self.rejected_count = 0
+
+    def _add_signature(
+        self,
+        ip_proto: int,
+        prefix: bytes,
+        protocol: str,
+        validator: Optional[Validator],
+        server_is_dst: bool
+    ) -> None:
+        node = self._tries[ip_proto]
+        for byte in prefix:
+            node = node.children.setdefault(byte, _TrieNode())
+        node.protocol = protocol
+        node.validator = validator
+        node.server_is_dst = server_is_dst
+        self._max_depth[ip_proto] = max(self._max_depth[ip_proto], len(prefix))
+
+    def classify(
+        self,
+        payload,
+        src_port: int,
+        dst_port: int,
+        ip_proto: Optional[int] = None,
+        src_ip: Optional[str] = None,
+        dst_ip: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Return the protocol name for a payload, or None to reject it
+
+        Args:
+            payload: L4 payload (bytes or memoryview)
+            src_port: Source port
+            dst_port: Destination port
+            ip_proto: IPPROTO_TCP/IPPROTO_UDP; both are tried when None
+            src_ip: Source address; servers are only learned when both addresses are given
+            dst_ip: Destination address
+        """
+        if ip_proto is None:
+            for candidate in (IPPROTO_TCP, IPPROTO_UDP):
+                protocol = self.classify(payload, src_port, dst_port, candidate, src_ip, dst_ip)
+                if protocol is not None:
+                    return protocol
+            return None
+
+        ports = self.port_table.get(ip_proto)
+        if ports is None:
+            self.rejected_count += 1
+            return None
+
+        protocol = ports[dst_port] or ports[src_port]
+        if protocol is None:
+            protocol = self._match_signature(payload, src_port, dst_port, ip_proto, src_ip, dst_ip)
+
+        if protocol is None:
+            self.rejected_count += 1
+        else:
+            self.classified_count += 1
+        return protocol
+
+    def _match_signature(
+        self,
+        payload,
+        src_port: int,
+        dst_port: int,
+        ip_proto: int,
+        src_ip: Optional[str],
+        dst_ip: Optional[str]
+    ) -> Optional[str]:
+        """Walk the signature trie, falling back to learned servers and header-shape checks"""
+        node = self._tries[ip_proto]
+        match: Optional[_TrieNode] = None
+        for i in range(min(len(payload), self._max_depth[ip_proto])):
+            node = node.children.get(payload[i])
+            if node is None:
+                break
+            if node.protocol is not None and (node.validator is None or node.validator(payload)):
+                match = node
+
+        learn = src_ip is not None and dst_ip is not None
+        if match is not None:
+            if learn:
+                if match.server_is_dst:
+                    self._learn((ip_proto, dst_ip, dst_port), match.protocol)
+                else:
+                    self._learn((ip_proto, src_ip, src_port), match.protocol)
+            return match.protocol
+
+        if learn and self.learned:
+            protocol = (
+                self._learned_protocol((ip_proto, dst_ip, dst_port))
+                or self._learned_protocol((ip_proto, src_ip, src_port))
+            )
+            if protocol is not None:
+                return protocol
+
+        for protocol, validator in self._shapes[ip_proto]:
+            if validator(payload):
+                return protocol
+
+        return None
+
+    def _learn(self, key: LearnedKey, protocol: str) -> None:
+        self.learned[key] = (protocol, time.monotonic() + self.learned_ttl_s)
+        self.learned.move_to_end(key)
+        if len(self.learned) > self.learned_capacity:
+            self.learned.popitem(last=False)
+
+    def _learned_protocol(self, key: LearnedKey) -> Optional[str]:
+        entry = self.learned.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del self.learned[key]
+            return None
+        return entry[0]
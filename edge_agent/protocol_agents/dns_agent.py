@@ -1,71 +1,193 @@
 """
 DNS Protocol Agent - Detects and analyzes DNS traffic
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import socket
 import struct
 
-from edge_agent.protocol_agents.base_agent import BaseProtocolAgent
+from edge_agent.capture.packet import IPPROTO_TCP
+from edge_agent.fal.dns_tunnel import DNSTunnelTracker
+from edge_agent.protocol_agents.base_agent import BaseProtocolAgent, PacketData
+from edge_agent.protocol_agents.dns_names import (
+    SuffixCache, decode_name, label_entropy, split_registered_domain
+)
 from shared.models.uer_schema import FlowFeatures, ProtocolSpecificFeatures
 from shared.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+_DNS_HEADER = struct.Struct('!HHHHHH')
+_U16 = struct.Struct('!H')
+_QUESTION = struct.Struct('!HH')
+_RR_HEADER = struct.Struct('!HHIH')
+
+TYPE_A = 1
+TYPE_NS = 2
+TYPE_CNAME = 5
+TYPE_PTR = 12
+TYPE_MX = 15
+TYPE_TXT = 16
+TYPE_AAAA = 28
+
+# Answers decoded per response; the rest are only counted
+MAX_ANSWERS = 32
+# Answers copied into UER metadata
+MAX_REPORTED_ANSWERS = 8
+
+QUERY_TYPE_NAMES = {
+    1: 'A', 2: 'NS', 5: 'CNAME', 6: 'SOA', 10: 'NULL', 12: 'PTR', 15: 'MX', 16: 'TXT',
+    28: 'AAAA', 33: 'SRV', 43: 'DS', 64: 'SVCB', 65: 'HTTPS', 255: 'ANY', 257: 'CAA'
+}
+
 
 class DNSAgent(BaseProtocolAgent):
-    """DNS protocol agent implementation"""
+    """
+    DNS protocol agent implementation
+    
+    Decodes the question and answer records, following compression pointers,
+    and keeps per-client tunneling features (QNAME length, subdomain label
+    entropy, distinct names per registered domain, NXDOMAIN rate) in
+    fixed-memory sketches.
+    """
+    
+    tracks_endpoints = True
+    transport_framed = True
+    
+    def __init__(self, agent_id: str, tenant_id: str, interface: str):
+        super().__init__(agent_id, tenant_id, interface)
+        self.suffix_cache = SuffixCache()
+        self.tunnel_tracker = DNSTunnelTracker()
     
     def get_protocol_name(self) -> str:
         return "DNS"
     
-    def parse_packet(self, packet_data: bytes) -> Optional[Dict[str, Any]]:
+    def parse_packet(self, packet_data: PacketData) -> Optional[Dict[str, Any]]:
         """Parse DNS packet"""
         try:
-            if len(packet_data) < 12:
-                return None
-            
-            # Parse DNS header
-            header = struct.unpack('!HHHHHH', packet_data[:12])
-            transaction_id, flags, qdcount, ancount, nscount, arcount = header
-            
-            # Parse flags
-            qr = (flags >> 15) & 0x1  # Query/Response
-            opcode = (flags >> 11) & 0xF
-            aa = (flags >> 10) & 0x1
-            tc = (flags >> 9) & 0x1
-            rd = (flags >> 8) & 0x1
-            ra = (flags >> 7) & 0x1
-            rcode = flags & 0xF
-            
-            # Query types
-            query_type = None
-            question_type = 0
-            if qdcount > 0 and len(packet_data) > 12:
-                # Skip domain name (simplified)
-                pos = 12
-                while pos < len(packet_data) and packet_data[pos] != 0:
-                    pos += packet_data[pos] + 1
-                if pos + 4 < len(packet_data):
-                    question_type = struct.unpack('!H', packet_data[pos+1:pos+3])[0]
-            
-            return {
-                'transaction_id': transaction_id,
-                'is_response': qr == 1,
-                'opcode': opcode,
-                'response_code': rcode,
-                'question_count': qdcount,
-                'answer_count': ancount,
-                'question_type': question_type,
-                'flags': {
-                    'aa': aa,
-                    'tc': tc,
-                    'rd': rd,
-                    'ra': ra
-                }
-            }
+            return self._parse_unchecked(packet_data)
         except Exception as e:
-            logger.debug(f"Failed to parse DNS packet: {e}")
+            logger.debug("Failed to parse DNS packet: %s", e)
             return None
     
+    def unframe(self, packet_data: PacketData, ip_proto: int) -> PacketData:
+        """DNS over TCP prefixes each message with its length"""
+        data_len = len(packet_data)
+        if ip_proto == IPPROTO_TCP and data_len >= 14 and _U16.unpack_from(packet_data, 0)[0] == data_len - 2:
+            return packet_data[2:]
+        return packet_data
+    
+    def _parse_unchecked(self, packet_data: PacketData) -> Optional[Dict[str, Any]]:
+        """Parse DNS message, raising on malformed input"""
+        data_len = len(packet_data)
+        if data_len < 12:
+            return None
+        
+        # Parse DNS header
+        transaction_id, flags, qdcount, ancount, nscount, arcount = _DNS_HEADER.unpack_from(packet_data, 0)
+        
+        # Parse flags
+        qr = (flags >> 15) & 0x1  # Query/Response
+        opcode = (flags >> 11) & 0xF
+        aa = (flags >> 10) & 0x1
+        tc = (flags >> 9) & 0x1
+        rd = (flags >> 8) & 0x1
+        ra = (flags >> 7) & 0x1
+        rcode = flags & 0xF
+        
+        # Names decoded from this message, by offset, for compression pointers
+        offsets: Dict[int, str] = {}
+        cache = self.suffix_cache
+        
+        # Questions; only the first is reported, as resolvers only answer one
+        qname = None
+        question_type = 0
+        pos = 12
+        for index in range(qdcount):
+            name, pos = decode_name(packet_data, pos, offsets, cache)
+            qtype, _ = _QUESTION.unpack_from(packet_data, pos)
+            pos += 4
+            if index == 0:
+                qname, question_type = name, qtype
+        
+        answers = self._parse_answers(packet_data, pos, ancount, offsets) if qr and ancount else []
+        ttls = [answer['ttl'] for answer in answers]
+        
+        parsed = {
+            'transaction_id': transaction_id,
+            'is_response': qr == 1,
+            'opcode': opcode,
+            'response_code': rcode,
+            'question_count': qdcount,
+            'answer_count': ancount,
+            'authority_count': nscount,
+            'additional_count': arcount,
+            'question_type': question_type,
+            'qname': qname,
+            'answers': answers,
+            # Spread of answer TTLs; fast-flux and tunnel answers vary or stay near zero
+            'ttl_variance': _variance(ttls) if qr else None,
+            'min_ttl': min(ttls) if ttls else None,
+            'flags': {
+                'aa': aa,
+                'tc': tc,
+                'rd': rd,
+                'ra': ra
+            }
+        }
+        
+        if qname is not None:
+            registered_domain, subdomain = split_registered_domain(qname)
+            parsed['registered_domain'] = registered_domain
+            parsed['qname_length'] = len(qname)
+            parsed['subdomain_label_count'] = subdomain.count('.') + 1 if subdomain else 0
+            parsed['label_entropy'] = label_entropy(subdomain)
+        
+        return parsed
+    
+    def _parse_answers(self, packet_data: PacketData, pos: int, count: int,
+                       offsets: Dict[int, str]) -> List[Dict[str, Any]]:
+        """Decode up to MAX_ANSWERS answer records starting at ``pos``"""
+        cache = self.suffix_cache
+        data_len = len(packet_data)
+        answers = []
+        for _ in range(min(count, MAX_ANSWERS)):
+            name, pos = decode_name(packet_data, pos, offsets, cache)
+            rtype, rclass, ttl, rdlength = _RR_HEADER.unpack_from(packet_data, pos)
+            pos += _RR_HEADER.size
+            end = pos + rdlength
+            if end > data_len:
+                raise ValueError("DNS record data runs past the end of the message")
+            
+            if rtype == TYPE_A and rdlength == 4:
+                value = socket.inet_ntop(socket.AF_INET, bytes(packet_data[pos:end]))
+            elif rtype == TYPE_AAAA and rdlength == 16:
+                value = socket.inet_ntop(socket.AF_INET6, bytes(packet_data[pos:end]))
+            elif rtype in (TYPE_CNAME, TYPE_NS, TYPE_PTR):
+                value = decode_name(packet_data, pos, offsets, cache)[0]
+            elif rtype == TYPE_MX and rdlength > 2:
+                value = decode_name(packet_data, pos + 2, offsets, cache)[0]
+            elif rtype == TYPE_TXT:
+                # Character-string bytes; the usual downstream channel of a tunnel
+                value = rdlength - _txt_string_count(packet_data, pos, end)
+            else:
+                value = None
+            
+            answers.append({'name': name, 'type': rtype, 'ttl': ttl, 'data': value})
+            pos = end
+        return answers
+    
+    def observe(self, packet: Dict[str, Any], src_ip: str, dst_ip: str) -> None:
+        """Update the querying client's tunneling features and attach them to the packet"""
+        tracker = self.tunnel_tracker
+        registered_domain = packet.get('registered_domain')
+        if packet['is_response']:
+            packet['tunnel'] = tracker.response(dst_ip, registered_domain, packet['response_code'])
+        elif packet.get('qname') is not None:
+            packet['tunnel'] = tracker.query(
+                src_ip, registered_domain, packet['qname'],
+                packet['qname_length'], packet['label_entropy']
+            )
+    
     def extract_flow_features(
         self,
         packet: Dict[str, Any],
@@ -77,7 +199,7 @@ class DNSAgent(BaseProtocolAgent):
             byte_count=flow_stats.get('byte_count', 0),
             duration_ms=flow_stats.get('duration_ms', 0.0),
             mean_packet_length=flow_stats.get('mean_packet_length', len(packet.get('raw_data', b''))),
-            mean_inter_arrival_time=flow_stats.get('mean_iat', 0.0),
+            mean_inter_arrival_time=flow_stats.get('mean_inter_arrival_time', 0.0),
             entropy=flow_stats.get('entropy', 0.0),
             flow_direction=flow_stats.get('direction', 'bidirectional')
         )
@@ -87,23 +209,50 @@ class DNSAgent(BaseProtocolAgent):
         packet: Dict[str, Any]
     ) -> ProtocolSpecificFeatures:
         """Extract DNS-specific features"""
-        query_type_names = {
-            1: 'A', 2: 'NS', 5: 'CNAME', 15: 'MX', 16: 'TXT',
-            28: 'AAAA', 33: 'SRV', 43: 'DS', 257: 'CAA'
-        }
+        query_type = QUERY_TYPE_NAMES.get(packet.get('question_type', 0), 'UNKNOWN')
         
-        query_type = query_type_names.get(packet.get('question_type', 0), 'UNKNOWN')
+        metadata = {
+            'transaction_id': packet.get('transaction_id'),
+            'opcode': packet.get('opcode'),
+            'answer_count': packet.get('answer_count', 0),
+            'authoritative': packet.get('flags', {}).get('aa', False),
+            'truncated': packet.get('flags', {}).get('tc', False),
+            'qname': packet.get('qname'),
+            'registered_domain': packet.get('registered_domain'),
+            'qname_length': packet.get('qname_length', 0),
+            'subdomain_label_count': packet.get('subdomain_label_count', 0),
+            'label_entropy': packet.get('label_entropy', 0.0),
+            'min_ttl': packet.get('min_ttl'),
+            'answers': [
+                {'type': QUERY_TYPE_NAMES.get(answer['type'], answer['type']),
+                 'ttl': answer['ttl'], 'data': answer['data']}
+                for answer in packet.get('answers', ())[:MAX_REPORTED_ANSWERS]
+            ]
+        }
+        metadata.update(packet.get('tunnel', ()))
         
         return ProtocolSpecificFeatures(
             dns_query_type=query_type if not packet.get('is_response') else None,
             dns_response_code=packet.get('response_code') if packet.get('is_response') else None,
             dns_ttl_variance=packet.get('ttl_variance'),
-            metadata={
-                'transaction_id': packet.get('transaction_id'),
-                'opcode': packet.get('opcode'),
-                'answer_count': packet.get('answer_count', 0),
-                'authoritative': packet.get('flags', {}).get('aa', False),
-                'truncated': packet.get('flags', {}).get('tc', False)
-            }
+            metadata=metadata
         )
 
+
+def _variance(values: List[int]) -> float:
+    """Population variance, 0.0 for fewer than two values"""
+    if len(values) < 2:
+        return 0.0
+    mean = sum(values) / len(values)
+    return sum((value - mean) ** 2 for value in values) / len(values)
+
+
+def _txt_string_count(packet_data: PacketData, pos: int, end: int) -> int:
+    """Number of length-prefixed character-strings in TXT record data"""
+    count = 0
+    while pos < end:
+        pos += packet_data[pos] + 1
+        count += 1
+    if pos != end:
+        raise ValueError("Malformed TXT record")
+    return count
@@ -0,0 +1,154 @@
+"""
+DNS Names - Wire-format name decoding with compression pointers and a suffix cache
+"""
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+import math
+
+MAX_NAME_LENGTH = 253
+MAX_LABEL_LENGTH = 63
+
+# Second-level labels under two-letter ccTLDs that act as public suffixes (co.uk, com.au...)
+_SECOND_LEVEL_SUFFIXES = frozenset({
+    'ac', 'co', 'com', 'edu', 'gob', 'go', 'gov', 'mil', 'ne', 'net', 'or', 'org'
+})
+_REVERSE_ZONES = ('in-addr.arpa', 'ip6.arpa')
+
+
+class SuffixCache:
+    """
+    Recently decoded uncompressed label runs, keyed by their wire bytes
+
+    Resolvers, clients and answers repeat the same names; a hit turns the
+    label-by-label decode of a run into one dict lookup. Least recently
+    used runs are evicted beyond ``capacity``.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._runs: 'OrderedDict[bytes, str]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, wire: bytes) -> Optional[str]:
+        text = self._runs.get(wire)
+        if text is None:
+            self.misses += 1
+            return None
+        self._runs.move_to_end(wire)
+        self.hits += 1
+        return text
+
+    def put(self, wire: bytes, text: str) -> None:
+        self._runs[wire] = text
+        if len(self._runs) > self.capacity:
+            self._runs.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+
+def decode_name(
+    data,
+    pos: int,
+    offsets: Dict[int, str],
+    cache: Optional[SuffixCache] = None
+) -> Tuple[str, int]:
+    """
+    Decode a (possibly compressed) domain name starting at ``pos``
+
+    Names are lowercased and returned without the trailing dot; the root is
+    ``''``. ``offsets`` maps message offsets to names already decoded from
+    this message, so compression pointers back to them cost a lookup.
+    Pointers must point before the name that contains them, which rules out
+    loops. Raises ``ValueError``/``IndexError`` on malformed names.
+
+    Returns:
+        The name and the offset just past it in the message
+    """
+    start = pos
+    data_len = len(data)
+
+    # Uncompressed label run: lengths only, no decoding yet
+    run_end = pos
+    length = data[run_end]
+    while length and length < 0xC0:
+        if length > MAX_LABEL_LENGTH:
+            raise ValueError(f"Invalid DNS label length {length} at offset {run_end}")
+        run_end += length + 1
+        if run_end >= data_len:
+            raise ValueError("DNS name runs past the end of the message")
+        length = data[run_end]
+
+    text = ''
+    if run_end > start:
+        wire = bytes(data[start:run_end])
+        text = cache.get(wire) if cache is not None else None
+        if text is None:
+            labels = []
+            label_pos = 0
+            while label_pos < len(wire):
+                label_len = wire[label_pos]
+                labels.append(wire[label_pos + 1:label_pos + 1 + label_len].decode('latin-1'))
+                label_pos += label_len + 1
+            text = '.'.join(labels).lower()
+            if cache is not None:
+                cache.put(wire, text)
+
+    if length:
+        # Compression pointer to an earlier name or suffix
+        if run_end + 1 >= data_len:
+            raise ValueError("Truncated DNS compression pointer")
+        target = ((length & 0x3F) << 8) | data[run_end + 1]
+        if target >= start:
+            raise ValueError(f"DNS compression pointer at {run_end} does not point backwards")
+        suffix = offsets.get(target)
+        if suffix is None:
+            suffix = decode_name(data, target, offsets, cache)[0]
+        if suffix:
+            text = f"{text}.{suffix}" if text else suffix
+        end = run_end + 2
+    else:
+        end = run_end + 1
+
+    if len(text) > MAX_NAME_LENGTH:
+        raise ValueError(f"DNS name longer than {MAX_NAME_LENGTH} characters")
+    offsets[start] = text
+    return text, end
+
+
+def label_entropy(labels: str) -> float:
+    """
+    Shannon entropy of the characters of dot-separated labels, in bits per character
+
+    Names are short, so counting in Python beats the NumPy payload entropy.
+    """
+    counts = Counter(labels)
+    dots = counts.pop('.', 0)
+    total = len(labels) - dots
+    if not total:
+        return 0.0
+    return 0.0 - sum(count / total * math.log2(count / total) for count in counts.values())
+
+
+@lru_cache(maxsize=8192)
+def split_registered_domain(name: str) -> Tuple[str, str]:
+    """
+    Split a name into (registered domain, subdomain)
+
+    Approximates the public suffix list: the registered domain is the last
+    two labels, or three under ``<second-level>.<ccTLD>`` suffixes such as
+    ``co.uk``. Reverse lookups split below ``in-addr.arpa``/``ip6.arpa``.
+    """
+    for zone in _REVERSE_ZONES:
+        if name.endswith(zone):
+            return zone, name[:-len(zone) - 1] if len(name) > len(zone) else ''
+
+    labels = name.split('.')
+    keep = 2
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL_SUFFIXES:
+        keep = 3
+    if len(labels) <= keep:
+        return name, ''
+    return '.'.join(labels[-keep:]), '.'.join(labels[:-keep])
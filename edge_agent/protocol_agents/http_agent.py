@@ -4,12 +4,19 @@ HTTP/HTTPS Protocol Agent
 from typing import Dict, Any, Optional
 import re
 
-from edge_agent.protocol_agents.base_agent import BaseProtocolAgent
+from edge_agent.protocol_agents.base_agent import BaseProtocolAgent, PacketData
 from shared.models.uer_schema import FlowFeatures, ProtocolSpecificFeatures
 from shared.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Matched directly against the packet buffer; only the captured groups are copied
+_REQUEST_LINE = re.compile(rb'([A-Z]+) +([^ \r\n]+) +HTTP/(\d\.\d)\r?\n')
+_STATUS_LINE = re.compile(rb'HTTP/(\d\.\d) +(\d{3})\b')
+
+# TLS record content type 22 (handshake), record version 3.x
+_TLS_HANDSHAKE = 0x16
+
 
 class HTTPAgent(BaseProtocolAgent):
     """HTTP protocol agent implementation"""
@@ -17,50 +24,48 @@ class HTTPAgent(BaseProtocolAgent):
     def get_protocol_name(self) -> str:
         return "HTTP"
     
-    def parse_packet(self, packet_data: bytes) -> Optional[Dict[str, Any]]:
+    def parse_packet(self, packet_data: PacketData) -> Optional[Dict[str, Any]]:
         """Parse HTTP request/response"""
         try:
-            http_str = packet_data.decode('utf-8', errors='ignore')
-            lines = http_str.split('\r\n')
-            
-            if not lines:
-                return None
-            
-            # Parse first line (request or status line)
-            first_line = lines[0]
-            is_https = len(packet_data) > 5 and packet_data[:5] == b'\x16\x03\x01'
-            
-            # Try to detect request line (method + path)
-            request_match = re.match(r'^([A-Z]+)\s+(.+?)\s+HTTP/(\d\.\d)$', first_line)
-            if request_match:
-                method, path, version = request_match.groups()
-                return {
-                    'type': 'request',
-                    'method': method,
-                    'path': path,
-                    'version': version,
-                    'encrypted': is_https,
-                    'lines': lines[1:]
-                }
-            
-            # Try to detect status line (response)
-            status_match = re.match(r'^HTTP/(\d\.\d)\s+(\d+)\s+(.+)$', first_line)
-            if status_match:
-                version, status_code, reason = status_match.groups()
-                return {
-                    'type': 'response',
-                    'status_code': int(status_code),
-                    'reason': reason,
-                    'version': version,
-                    'encrypted': is_https,
-                    'lines': lines[1:]
-                }
-            
-            return None
+            return self._parse_unchecked(packet_data)
         except Exception as e:
-            logger.debug(f"Failed to parse HTTP packet: {e}")
+            logger.debug("Failed to parse HTTP packet: %s", e)
             return None
     
+    def _parse_unchecked(self, packet_data: PacketData) -> Optional[Dict[str, Any]]:
+        """Parse HTTP request/response, raising on malformed input"""
+        if len(packet_data) >= 5 and packet_data[0] == _TLS_HANDSHAKE and packet_data[1] == 0x03:
+            return {
+                'type': 'tls',
+                'version': f"3.{packet_data[2]}",
+                'encrypted': True
+            }
+        
+        # Try to detect request line (method + path)
+        request_match = _REQUEST_LINE.match(packet_data)
+        if request_match:
+            method, path, version = request_match.groups()
+            return {
+                'type': 'request',
+                'method': method.decode('ascii'),
+                'path': path.decode('utf-8', errors='ignore'),
+                'version': version.decode('ascii'),
+                'encrypted': False
+            }
+        
+        # Try to detect status line (response)
+        status_match = _STATUS_LINE.match(packet_data)
+        if status_match:
+            version, status_code = status_match.groups()
+            return {
+                'type': 'response',
+                'status_code': int(status_code),
+                'version': version.decode('ascii'),
+                'encrypted': False
+            }
+        
+        return None
+    
     def extract_flow_features(
         self,
         packet: Dict[str, Any],
@@ -72,7 +77,7 @@ class HTTPAgent(BaseProtocolAgent):
             byte_count=flow_stats.get('byte_count', 0),
             duration_ms=flow_stats.get('duration_ms', 0.0),
             mean_packet_length=flow_stats.get('mean_packet_length', 0.0),
-            mean_inter_arrival_time=flow_stats.get('mean_iat', 0.0),
+            mean_inter_arrival_time=flow_stats.get('mean_inter_arrival_time', 0.0),
             entropy=flow_stats.get('entropy', 0.0),
             flow_direction=flow_stats.get('direction', 'bidirectional')
         )
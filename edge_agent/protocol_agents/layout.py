@@ -0,0 +1,298 @@
+"""
+Packet Layouts - Declarative binary field layouts compiled into struct plans
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+import struct
+
+Fields = Dict[str, Any]
+Length = Union[int, str, Callable[[Fields], int], None]
+
+
+class Field:
+    """
+    Fixed-width field in ``struct`` notation (``'B'``, ``'H'``, ``'I'``, ``'Q'``,
+    signed variants, or ``'4s'``)
+
+    With ``expect`` the packet is rejected unless the field has that value.
+    """
+
+    def __init__(self, name: str, fmt: str, expect: Any = None):
+        self.name = name
+        self.fmt = fmt
+        self.expect = expect
+
+
+class Bits:
+    """
+    Fixed-width integer split into bit fields, most significant bits first
+
+    ``bits`` are ``(name, width)`` or ``(name, width, expected value)``
+    tuples; a ``None`` name skips reserved bits. Widths must add up to the
+    size of ``fmt``.
+    """
+
+    def __init__(self, fmt: str, *bits: Tuple):
+        self.fmt = fmt
+        self.bits = bits
+
+
+class Bytes:
+    """
+    Byte string whose length is a constant, an earlier field's value, a
+    function of the fields parsed so far, or None for the rest of the packet
+    """
+
+    def __init__(self, name: str, length: Length = None):
+        self.name = name
+        self.length = length
+
+
+class Prefixed:
+    """Byte string preceded by its length as a fixed-width integer (``'B'``, ``'H'``...)"""
+
+    def __init__(self, name: str, prefix: str = 'H'):
+        self.name = name
+        self.prefix = prefix
+
+
+class VarInt:
+    """
+    Variable-length integer
+
+    ``'leb128'``: 7 bits per byte, least significant group first, high bit
+    set on all but the last byte (MQTT remaining length, protobuf).
+    ``'quic'``: the two high bits of the first byte give a 1, 2, 4 or 8 byte
+    big-endian length (RFC 9000).
+    """
+
+    def __init__(self, name: str, encoding: str = 'leb128', max_bytes: int = 4):
+        if encoding not in ('leb128', 'quic'):
+            raise ValueError(f"Unknown varint encoding: {encoding}")
+        self.name = name
+        self.encoding = encoding
+        self.max_bytes = max_bytes
+
+
+LayoutField = Union[Field, Bits, Bytes, Prefixed, VarInt]
+
+# A compiled step reads from ``data`` at ``pos`` into ``fields`` and returns the new position
+Step = Callable[[Any, int, Fields], int]
+
+
+def _struct_step(byte_order: str, run: List[LayoutField]) -> Step:
+    """One ``unpack_from`` for a run of consecutive fixed-width fields"""
+    packer = struct.Struct(byte_order + ''.join(field.fmt for field in run))
+    size = packer.size
+    unpack_from = packer.unpack_from
+
+    if all(isinstance(field, Field) and field.expect is None for field in run):
+        names = [field.name for field in run]
+
+        def parse_plain(data, pos: int, fields: Fields) -> int:
+            fields.update(zip(names, unpack_from(data, pos)))
+            return pos + size
+        return parse_plain
+
+    # (name, expect) for whole fields, or (bit splits) for Bits
+    slots = []
+    for field in run:
+        if isinstance(field, Field):
+            slots.append((field.name, field.expect, None))
+            continue
+        total = struct.calcsize(byte_order + field.fmt) * 8
+        if sum(bit[1] for bit in field.bits) != total:
+            raise ValueError(f"Bit widths of {field.bits} do not add up to {total}")
+        splits = []
+        shift = total
+        for bit in field.bits:
+            name, width = bit[0], bit[1]
+            shift -= width
+            if name is not None:
+                splits.append((name, shift, (1 << width) - 1, bit[2] if len(bit) > 2 else None))
+        slots.append((None, None, splits))
+
+    def parse_checked(data, pos: int, fields: Fields) -> int:
+        for (name, expect, splits), value in zip(slots, unpack_from(data, pos)):
+            if splits is None:
+                if expect is not None and value != expect:
+                    raise ValueError(f"{name} is {value}, expected {expect}")
+                fields[name] = value
+                continue
+            for bit_name, shift, mask, bit_expect in splits:
+                bits = (value >> shift) & mask
+                if bit_expect is not None and bits != bit_expect:
+                    raise ValueError(f"{bit_name} is {bits}, expected {bit_expect}")
+                fields[bit_name] = bits
+        return pos + size
+    return parse_checked
+
+
+def _take(data, pos: int, length: int, name: str) -> Tuple[bytes, int]:
+    end = pos + length
+    if length < 0 or end > len(data):
+        raise ValueError(f"{name} needs {length} bytes at offset {pos}, packet has {len(data)}")
+    # Copied: capture buffers are only valid until the next block
+    return bytes(data[pos:end]), end
+
+
+def _bytes_step(field: Bytes) -> Step:
+    name = field.name
+    length = field.length
+
+    if length is None:
+        def parse_rest(data, pos: int, fields: Fields) -> int:
+            fields[name] = bytes(data[pos:])
+            return len(data)
+        return parse_rest
+
+    if isinstance(length, int):
+        def resolve(fields: Fields) -> int:
+            return length
+    elif isinstance(length, str):
+        def resolve(fields: Fields) -> int:
+            return fields[length]
+    else:
+        resolve = length
+
+    def parse_sized(data, pos: int, fields: Fields) -> int:
+        fields[name], pos = _take(data, pos, resolve(fields), name)
+        return pos
+    return parse_sized
+
+
+def _prefixed_step(byte_order: str, field: Prefixed) -> Step:
+    name = field.name
+    prefix = struct.Struct(byte_order + field.prefix)
+    size = prefix.size
+    unpack_from = prefix.unpack_from
+
+    def parse_prefixed(data, pos: int, fields: Fields) -> int:
+        length = unpack_from(data, pos)[0]
+        fields[name], pos = _take(data, pos + size, length, name)
+        return pos
+    return parse_prefixed
+
+
+def decode_leb128(data, pos: int, max_bytes: int = 4) -> Tuple[int, int]:
+    """Decode a base-128 varint at ``pos``; returns (value, position after it)"""
+    value = 0
+    shift = 0
+    for index in range(pos, min(pos + max_bytes, len(data))):
+        byte = data[index]
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, index + 1
+        shift += 7
+    raise ValueError(f"Unterminated varint at offset {pos}")
+
+
+def decode_quic_varint(data, pos: int) -> Tuple[int, int]:
+    """Decode an RFC 9000 variable-length integer at ``pos``"""
+    if pos >= len(data):
+        raise ValueError(f"Varint at offset {pos} is past the end of the packet")
+    length = 1 << (data[pos] >> 6)
+    if pos + length > len(data):
+        raise ValueError(f"Varint at offset {pos} is truncated")
+    return int.from_bytes(data[pos:pos + length], 'big') & ((1 << (8 * length - 2)) - 1), pos + length
+
+
+def _varint_step(field: VarInt) -> Step:
+    name = field.name
+    if field.encoding == 'quic':
+        def parse_quic(data, pos: int, fields: Fields) -> int:
+            fields[name], pos = decode_quic_varint(data, pos)
+            return pos
+        return parse_quic
+
+    max_bytes = field.max_bytes
+
+    def parse_leb128(data, pos: int, fields: Fields) -> int:
+        fields[name], pos = decode_leb128(data, pos, max_bytes)
+        return pos
+    return parse_leb128
+
+
+class Layout:
+    """
+    Binary message layout compiled once into a parsing plan
+
+    Consecutive fixed-width fields and bit fields are merged into a single
+    precompiled ``struct.Struct``, so a header of any number of fixed fields
+    costs one ``unpack_from``; variable fields (sized bytes, length-prefixed
+    bytes, varints) become their own steps. Parsing reads the buffer in place
+    (bytes or memoryview) and raises ``struct.error`` or ``ValueError`` on
+    truncated or unexpected input, leaving exception handling to the batch
+    parser.
+
+    Example (CoAP fixed header and token)::
+
+        Layout(
+            Bits('B', ('version', 2, 1), ('type', 2), ('token_length', 4)),
+            Field('code', 'B'),
+            Field('message_id', 'H'),
+            Bytes('token', 'token_length')
+        )
+    """
+
+    def __init__(self, *fields: LayoutField, byte_order: str = '!'):
+        self.fields = fields
+        self.byte_order = byte_order
+        self.steps: List[Step] = []
+        # Size of the leading fixed-width run; shorter packets cannot match
+        self.min_size = 0
+
+        run: List[LayoutField] = []
+        for field in fields:
+            if isinstance(field, (Field, Bits)):
+                run.append(field)
+                continue
+            self._flush(run)
+            run = []
+            if isinstance(field, Bytes):
+                self.steps.append(_bytes_step(field))
+            elif isinstance(field, Prefixed):
+                self.steps.append(_prefixed_step(byte_order, field))
+            elif isinstance(field, VarInt):
+                self.steps.append(_varint_step(field))
+            else:
+                raise TypeError(f"Not a layout field: {field!r}")
+        self._flush(run)
+
+    def _flush(self, run: List[LayoutField]) -> None:
+        if not run:
+            return
+        if not self.steps:
+            self.min_size = struct.calcsize(self.byte_order + ''.join(field.fmt for field in run))
+        self.steps.append(_struct_step(self.byte_order, run))
+
+    def parse(self, data, offset: int = 0, fields: Optional[Fields] = None) -> Tuple[Fields, int]:
+        """
+        Parse ``data`` from ``offset``
+
+        Returns:
+            The parsed fields (added to ``fields`` when given) and the offset
+            just past the layout
+        """
+        if fields is None:
+            fields = {}
+        pos = offset
+        for step in self.steps:
+            pos = step(data, pos, fields)
+        return fields, pos
+
+    def parse_exact(self, data, offset: int, end: int) -> Optional[Fields]:
+        """Parse fields that must end exactly at ``end``, or None if they do not"""
+        try:
+            fields, pos = self.parse(data, offset)
+        except (struct.error, ValueError):
+            return None
+        return fields if pos == end else None
+
+
+def first_match(layouts: Sequence[Layout], data, offset: int, end: int) -> Optional[Fields]:
+    """Fields of the first layout that spans exactly ``data[offset:end]``"""
+    for layout in layouts:
+        fields = layout.parse_exact(data, offset, end)
+        if fields is not None:
+            return fields
+    return None
@@ -0,0 +1,101 @@
+"""
+Layout Agent - Protocol agents generated from declarative packet layouts
+"""
+from typing import Any, Dict, Optional, Sequence, Type
+
+from edge_agent.protocol_agents.base_agent import BaseProtocolAgent, PacketData
+from edge_agent.protocol_agents.layout import Layout
+from shared.models.uer_schema import FlowFeatures, ProtocolSpecificFeatures
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LayoutAgent(BaseProtocolAgent):
+    """
+    Protocol agent whose parser is a compiled :class:`Layout`
+
+    Subclasses set ``protocol_name`` and ``layout`` (compiled when the class
+    is defined) and may override :meth:`decode` to derive fields from the
+    layout's output and the rest of the packet. ``metadata_fields`` lists the
+    parsed fields copied into the UER's protocol feature metadata.
+    """
+
+    protocol_name: str = ""
+    layout: Layout
+    metadata_fields: Sequence[str] = ()
+
+    def get_protocol_name(self) -> str:
+        return self.protocol_name
+
+    def parse_packet(self, packet_data: PacketData) -> Optional[Dict[str, Any]]:
+        """Parse packet with the agent's layout"""
+        try:
+            return self._parse_unchecked(packet_data)
+        except Exception as e:
+            logger.debug("Failed to parse %s packet: %s", self.protocol_name, e)
+            return None
+
+    def _parse_unchecked(self, packet_data: PacketData) -> Optional[Dict[str, Any]]:
+        """Parse packet with the agent's layout, raising on malformed input"""
+        if len(packet_data) < self.layout.min_size:
+            return None
+        fields, end = self.layout.parse(packet_data)
+        return self.decode(fields, packet_data, end)
+
+    def decode(self, fields: Dict[str, Any], packet_data: PacketData, end: int) -> Optional[Dict[str, Any]]:
+        """
+        Finish parsing after the layout
+
+        Args:
+            fields: Fields parsed by the layout
+            packet_data: The whole packet
+            end: Offset just past the layout
+        """
+        fields.setdefault('encrypted', False)
+        return fields
+
+    def extract_flow_features(
+        self,
+        packet: Dict[str, Any],
+        flow_stats: Dict[str, Any]
+    ) -> FlowFeatures:
+        """Extract flow features from the FAL snapshot"""
+        return FlowFeatures(
+            packet_count=flow_stats.get('packet_count', 1),
+            byte_count=flow_stats.get('byte_count', 0),
+            duration_ms=flow_stats.get('duration_ms', 0.0),
+            mean_packet_length=flow_stats.get('mean_packet_length', 0.0),
+            mean_inter_arrival_time=flow_stats.get('mean_inter_arrival_time', 0.0),
+            entropy=flow_stats.get('entropy', 0.0),
+            flow_direction=flow_stats.get('direction', 'bidirectional')
+        )
+
+    def extract_protocol_features(
+        self,
+        packet: Dict[str, Any]
+    ) -> ProtocolSpecificFeatures:
+        """Copy ``metadata_fields`` into protocol feature metadata"""
+        return ProtocolSpecificFeatures(
+            metadata={name: packet.get(name) for name in self.metadata_fields}
+        )
+
+
+def layout_agent(
+    protocol_name: str,
+    layout: Layout,
+    metadata_fields: Sequence[str] = ()
+) -> Type[LayoutAgent]:
+    """
+    Generate an agent class for a protocol fully described by its layout
+
+    Example::
+
+        AGENT_CLASSES["Foo"] = layout_agent("Foo", Layout(Field('kind', 'B'), ...), ['kind'])
+    """
+    return type(f"{protocol_name}Agent", (LayoutAgent,), {
+        'protocol_name': protocol_name,
+        'layout': layout,
+        'metadata_fields': tuple(metadata_fields),
+        '__doc__': f"{protocol_name} protocol agent generated from its packet layout"
+    })
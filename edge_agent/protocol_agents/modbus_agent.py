@@ -0,0 +1,132 @@
+"""
+Modbus/TCP Protocol Agent - Detects and analyzes Modbus/TCP traffic
+"""
+from typing import Any, Dict, Optional
+
+from edge_agent.protocol_agents.base_agent import PacketData
+from edge_agent.protocol_agents.layout import Bytes, Field, Layout, first_match
+from edge_agent.protocol_agents.layout_agent import LayoutAgent
+from shared.models.uer_schema import ProtocolSpecificFeatures
+
+# MBAP header and function code
+MBAP_LAYOUT = Layout(
+    Field('transaction_id', 'H'),
+    Field('protocol_id', 'H', expect=0),
+    Field('length', 'H'),
+    Field('unit_id', 'B'),
+    Field('function_code', 'B')
+)
+MBAP_SIZE = 7
+
+FUNCTION_NAMES = {
+    1: "READ_COILS",
+    2: "READ_DISCRETE_INPUTS",
+    3: "READ_HOLDING_REGISTERS",
+    4: "READ_INPUT_REGISTERS",
+    5: "WRITE_SINGLE_COIL",
+    6: "WRITE_SINGLE_REGISTER",
+    7: "READ_EXCEPTION_STATUS",
+    8: "DIAGNOSTICS",
+    11: "GET_COMM_EVENT_COUNTER",
+    12: "GET_COMM_EVENT_LOG",
+    15: "WRITE_MULTIPLE_COILS",
+    16: "WRITE_MULTIPLE_REGISTERS",
+    17: "REPORT_SERVER_ID",
+    20: "READ_FILE_RECORD",
+    21: "WRITE_FILE_RECORD",
+    22: "MASK_WRITE_REGISTER",
+    23: "READ_WRITE_MULTIPLE_REGISTERS",
+    24: "READ_FIFO_QUEUE",
+    43: "ENCAPSULATED_INTERFACE_TRANSPORT"
+}
+
+# Functions that change coil, register or file state on the device
+WRITE_FUNCTIONS = frozenset({5, 6, 15, 16, 21, 22, 23})
+
+_ADDRESS_QUANTITY = Layout(Field('starting_address', 'H'), Field('quantity', 'H'))
+_BYTE_COUNT_DATA = Layout(Field('byte_count', 'B'), Bytes('values', 'byte_count'))
+_WRITE_SINGLE = Layout(Field('starting_address', 'H'), Field('value', 'H'))
+_WRITE_MULTIPLE = Layout(
+    Field('starting_address', 'H'),
+    Field('quantity', 'H'),
+    Field('byte_count', 'B'),
+    Bytes('values', 'byte_count')
+)
+
+# Function code -> PDU data layouts; requests and responses share a function
+# code and are told apart by which layout spans the PDU exactly
+PDU_LAYOUTS = {
+    1: (_ADDRESS_QUANTITY, _BYTE_COUNT_DATA),
+    2: (_ADDRESS_QUANTITY, _BYTE_COUNT_DATA),
+    3: (_ADDRESS_QUANTITY, _BYTE_COUNT_DATA),
+    4: (_ADDRESS_QUANTITY, _BYTE_COUNT_DATA),
+    5: (_WRITE_SINGLE,),
+    6: (_WRITE_SINGLE,),
+    15: (_WRITE_MULTIPLE, _ADDRESS_QUANTITY),
+    16: (_WRITE_MULTIPLE, _ADDRESS_QUANTITY),
+    22: (Layout(Field('starting_address', 'H'), Field('and_mask', 'H'), Field('or_mask', 'H')),),
+    23: (
+        Layout(
+            Field('starting_address', 'H'),
+            Field('quantity', 'H'),
+            Field('write_address', 'H'),
+            Field('write_quantity', 'H'),
+            Field('byte_count', 'B'),
+            Bytes('values', 'byte_count')
+        ),
+        _BYTE_COUNT_DATA
+    )
+}
+
+_EXCEPTION = Layout(Field('exception_code', 'B'))
+
+
+class ModbusTCPAgent(LayoutAgent):
+    """Modbus/TCP protocol agent implementation"""
+
+    protocol_name = "Modbus"
+    layout = MBAP_LAYOUT
+
+    def decode(self, fields: Dict[str, Any], packet_data: PacketData, end: int) -> Optional[Dict[str, Any]]:
+        """Decode the function-specific PDU data after the MBAP header"""
+        # The MBAP length counts the unit id, function code and data
+        frame_end = MBAP_SIZE - 1 + fields['length']
+        if fields['length'] < 2 or frame_end > len(packet_data):
+            return None
+
+        function_code = fields['function_code']
+        is_exception = bool(function_code & 0x80)
+        function_code &= 0x7F
+        fields['function_code'] = function_code
+        fields['function_name'] = FUNCTION_NAMES.get(function_code, "UNKNOWN")
+        fields['is_exception'] = is_exception
+        fields['is_write'] = function_code in WRITE_FUNCTIONS
+        fields['pdu_length'] = fields['length'] - 1
+        fields['encrypted'] = False
+
+        layouts = (_EXCEPTION,) if is_exception else PDU_LAYOUTS.get(function_code, ())
+        pdu = first_match(layouts, packet_data, end, frame_end)
+        if pdu is not None:
+            pdu.pop('values', None)
+            fields.update(pdu)
+        return fields
+
+    def extract_protocol_features(
+        self,
+        packet: Dict[str, Any]
+    ) -> ProtocolSpecificFeatures:
+        """Extract Modbus-specific features"""
+        return ProtocolSpecificFeatures(
+            metadata={
+                'modbus_function_code': packet.get('function_code'),
+                'modbus_function': packet.get('function_name'),
+                'unit_id': packet.get('unit_id'),
+                'transaction_id': packet.get('transaction_id'),
+                'is_write': packet.get('is_write', False),
+                'is_exception': packet.get('is_exception', False),
+                'exception_code': packet.get('exception_code'),
+                'starting_address': packet.get('starting_address'),
+                'quantity': packet.get('quantity'),
+                'pdu_length': packet.get('pdu_length')
+            }
+        )
@@ -4,12 +4,16 @@ MQTT Protocol Agent - Detects and analyzes MQTT traffic
 from typing import Dict, Any, Optional
 import struct
 
-from edge_agent.protocol_agents.base_agent import BaseProtocolAgent
+from edge_agent.protocol_agents.base_agent import BaseProtocolAgent, PacketData
 from shared.models.uer_schema import FlowFeatures, ProtocolSpecificFeatures
 from shared.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+_U16 = struct.Struct('!H')
+
+MQTT_CONNECT = 1
+
 
 class MQTTPacket:
     """MQTT packet parser"""
@@ -23,9 +27,10 @@ class MQTTPacket:
     }
     
     @staticmethod
-    def parse_fixed_header(data: bytes) -> tuple:
+    def parse_fixed_header(data: PacketData) -> tuple:
         """Parse MQTT fixed header"""
-        if len(data) < 2:
+        data_len = len(data)
+        if data_len < 2:
             return None
         
         byte1 = data[0]
@@ -36,12 +41,12 @@ class MQTTPacket:
         multiplier = 1
         pos = 1
         
-        while pos < len(data) and (data[pos] & 0x80):
+        while pos < data_len and (data[pos] & 0x80):
             remaining_length += (data[pos] & 0x7F) * multiplier
             multiplier *= 128
             pos += 1
         
-        if pos < len(data):
+        if pos < data_len:
             remaining_length += (data[pos] & 0x7F) * multiplier
         else:
             return None
@@ -49,21 +54,32 @@ class MQTTPacket:
         return (message_type, flags, remaining_length, pos + 1)
     
     @staticmethod
-    def parse_variable_header(data: bytes, start_pos: int) -> Dict[str, Any]:
-        """Parse MQTT variable header based on message type"""
+    def parse_variable_header(
+        data: PacketData,
+        start_pos: int,
+        message_type: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Parse MQTT variable header based on message type
+        
+        The protocol name is only present in CONNECT; when ``message_type``
+        is given, other packet types are not decoded.
+        """
         if start_pos >= len(data):
             return {}
+        if message_type is not None and message_type != MQTT_CONNECT:
+            return {}
         
         result = {}
         pos = start_pos
         
         # Parse protocol name (for CONNECT)
         if len(data) - pos >= 2:
-            proto_len = struct.unpack('!H', data[pos:pos+2])[0]
+            proto_len = _U16.unpack_from(data, pos)[0]
             pos += 2
             
             if len(data) - pos >= proto_len:
-                proto_name = data[pos:pos+proto_len].decode('utf-8', errors='ignore')
+                proto_name = str(data[pos:pos+proto_len], 'utf-8', errors='ignore')
                 result['protocol_name'] = proto_name
                 pos += proto_len
         
@@ -76,35 +92,39 @@ class MQTTAgent(BaseProtocolAgent):
     def get_protocol_name(self) -> str:
         return "MQTT"
     
-    def parse_packet(self, packet_data: bytes) -> Optional[Dict[str, Any]]:
+    def parse_packet(self, packet_data: PacketData) -> Optional[Dict[str, Any]]:
         """Parse MQTT packet"""
         try:
-            header_info = MQTTPacket.parse_fixed_header(packet_data)
-            if not header_info:
-                return None
-            
-            message_type, flags, remaining_length, var_header_start = header_info
-            command_name = MQTTPacket.COMMAND_TYPES.get(message_type, "UNKNOWN")
-            
-            # Parse variable header if enough data
-            var_header = {}
-            if var_header_start < len(packet_data):
-                var_header = MQTTPacket.parse_variable_header(
-                    packet_data, var_header_start
-                )
-            
-            return {
-                'message_type': message_type,
-                'command_name': command_name,
-                'flags': flags,
-                'remaining_length': remaining_length,
-                'variable_header': var_header,
-                'version': var_header.get('protocol_name'),
-                'encrypted': False  # MQTT is plaintext unless wrapped in TLS
-            }
+            return self._parse_unchecked(packet_data)
         except Exception as e:
-            logger.debug(f"Failed to parse MQTT packet: {e}")
+            logger.debug("Failed to parse MQTT packet: %s", e)
+            return None
+    
+    def _parse_unchecked(self, packet_data: PacketData) -> Optional[Dict[str, Any]]:
+        """Parse MQTT packet, raising on malformed input"""
+        header_info = MQTTPacket.parse_fixed_header(packet_data)
+        if not header_info:
             return None
+        
+        message_type, flags, remaining_length, var_header_start = header_info
+        command_name = MQTTPacket.COMMAND_TYPES.get(message_type, "UNKNOWN")
+        
+        # Parse variable header if enough data
+        var_header = {}
+        if var_header_start < len(packet_data):
+            var_header = MQTTPacket.parse_variable_header(
+                packet_data, var_header_start, message_type
+            )
+        
+        return {
+            'message_type': message_type,
+            'command_name': command_name,
+            'flags': flags,
+            'remaining_length': remaining_length,
+            'variable_header': var_header,
+            'version': var_header.get('protocol_name'),
+            'encrypted': False  # MQTT is plaintext unless wrapped in TLS
+        }
     
     def extract_flow_features(
         self,
@@ -118,7 +138,7 @@ class MQTTAgent(BaseProtocolAgent):
             byte_count=flow_stats.get('byte_count', len(packet.get('raw_data', b''))),
             duration_ms=flow_stats.get('duration_ms', 0.0),
             mean_packet_length=flow_stats.get('mean_packet_length', 0.0),
-            mean_inter_arrival_time=flow_stats.get('mean_iat', 0.0),
+            mean_inter_arrival_time=flow_stats.get('mean_inter_arrival_time', 0.0),
             entropy=flow_stats.get('entropy', 0.0),
             flow_direction=flow_stats.get('direction', 'bidirectional')
         )
@@ -2,13 +2,16 @@
 QUIC Protocol Agent - Detects and analyzes QUIC traffic
 """
 from typing import Dict, Any, Optional
+import struct
 
-from edge_agent.protocol_agents.base_agent import BaseProtocolAgent
+from edge_agent.protocol_agents.base_agent import BaseProtocolAgent, PacketData
 from shared.models.uer_schema import FlowFeatures, ProtocolSpecificFeatures
 from shared.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+_U32 = struct.Struct('!I')
+
 
 class QUICAgent(BaseProtocolAgent):
     """QUIC protocol agent implementation"""
@@ -16,44 +19,45 @@ class QUICAgent(BaseProtocolAgent):
     def get_protocol_name(self) -> str:
         return "QUIC"
     
-    def parse_packet(self, packet_data: bytes) -> Optional[Dict[str, Any]]:
+    def parse_packet(self, packet_data: PacketData) -> Optional[Dict[str, Any]]:
         """Parse QUIC packet"""
         try:
-            if len(packet_data) < 1:
+            return self._parse_unchecked(packet_data)
+        except Exception as e:
+            logger.debug("Failed to parse QUIC packet: %s", e)
+            return None
+    
+    def _parse_unchecked(self, packet_data: PacketData) -> Optional[Dict[str, Any]]:
+        """Parse QUIC packet, raising on malformed input"""
+        if len(packet_data) < 1:
+            return None
+        
+        # QUIC header starts with first byte flags
+        first_byte = packet_data[0]
+        header_form = (first_byte >> 7) & 0x1  # Long or short header
+        
+        if header_form == 1:  # Long header
+            if len(packet_data) < 5:
                 return None
             
-            # QUIC header starts with first byte flags
-            first_byte = packet_data[0]
-            header_form = (first_byte >> 7) & 0x1  # Long or short header
+            # Parse long header
+            first_bit = (first_byte >> 6) & 0x1
+            fixed_bit = first_bit
+            packet_type = (first_byte >> 4) & 0x3
+            version = _U32.unpack_from(packet_data, 1)[0]
             
-            if header_form == 1:  # Long header
-                if len(packet_data) < 5:
-                    return None
-                
-                # Parse long header
-                first_bit = (first_byte >> 6) & 0x1
-                fixed_bit = first_bit
-                packet_type = (first_byte >> 4) & 0x3
-                version = None
-                
-                if len(packet_data) >= 5:
-                    version = int.from_bytes(packet_data[1:5], byteorder='big')
-                
-                return {
-                    'header_type': 'long',
-                    'packet_type': packet_type,
-                    'version': version,
-                    'fixed_bit': fixed_bit
-                }
-            else:  # Short header
-                return {
-                    'header_type': 'short',
-                    'key_phase': (first_byte >> 2) & 0x1,
-                    'packet_number_length': first_byte & 0x3
-                }
-        except Exception as e:
-            logger.debug(f"Failed to parse QUIC packet: {e}")
-            return None
+            return {
+                'header_type': 'long',
+                'packet_type': packet_type,
+                'version': version,
+                'fixed_bit': fixed_bit
+            }
+        else:  # Short header
+            return {
+                'header_type': 'short',
+                'key_phase': (first_byte >> 2) & 0x1,
+                'packet_number_length': first_byte & 0x3
+            }
     
     def extract_flow_features(
         self,
@@ -66,7 +70,7 @@ class QUICAgent(BaseProtocolAgent):
             byte_count=flow_stats.get('byte_count', 0),
             duration_ms=flow_stats.get('duration_ms', 0.0),
             mean_packet_length=flow_stats.get('mean_packet_length', 0.0),
-            mean_inter_arrival_time=flow_stats.get('mean_iat', 0.0),
+            mean_inter_arrival_time=flow_stats.get('mean_inter_arrival_time', 0.0),
             entropy=flow_stats.get('entropy', 0.0),
             flow_direction=flow_stats.get('direction', 'bidirectional')
         )
@@ -0,0 +1,19 @@
+"""Edge risk scoring package"""
+from edge_agent.scoring.loader import ScorerWatcher, load_scorer, scorer_from_dict
+from edge_agent.scoring.scorer import (
+    FEATURE_NAMES, AnomalyRules, LinearScorer, RiskScorer, RuleScorer,
+    TreeEnsembleScorer, feature_row
+)
+
+__all__ = [
+    'AnomalyRules',
+    'FEATURE_NAMES',
+    'LinearScorer',
+    'RiskScorer',
+    'RuleScorer',
+    'ScorerWatcher',
+    'TreeEnsembleScorer',
+    'feature_row',
+    'load_scorer',
+    'scorer_from_dict'
+]
@@ -0,0 +1,131 @@
+"""
+Scorer Loader - Serialized risk models and hot reload without a restart
+"""
+from typing import Any, Dict, Optional
+import json
+import os
+import time
+
+import numpy as np
+
+from edge_agent.scoring.scorer import (
+    FEATURE_INDEX, FEATURE_NAMES, AnomalyRules, LinearScorer, RiskScorer, TreeEnsembleScorer
+)
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _columns(model: Dict[str, Any]):
+    features = model.get('features')
+    if not features:
+        raise ValueError("Model does not list its features")
+    unknown = [name for name in features if name not in FEATURE_INDEX]
+    if unknown:
+        raise ValueError(f"Model uses unknown features: {', '.join(unknown)}")
+    return [FEATURE_INDEX[name] for name in features]
+
+
+def scorer_from_dict(model: Dict[str, Any]) -> RiskScorer:
+    """
+    Build a scorer from a deserialized model
+
+    ``type`` is ``"logistic"``, ``"linear"`` or ``"tree_ensemble"``, and
+    ``features`` names the matrix columns the model reads, in order.
+    Linear models carry ``weights``, ``bias`` and optional ``mean``/``scale``
+    for standardization; tree ensembles carry ``trees`` (node arrays indexing
+    into ``features``), ``base_score`` and ``output``. An optional
+    ``anomaly_rules`` list of ``{"flag", "feature", "op", "threshold"}``
+    replaces the default anomaly flags.
+    """
+    rules = model.get('anomaly_rules')
+    anomaly_rules = None
+    if rules is not None:
+        anomaly_rules = AnomalyRules([
+            (rule['flag'], rule['feature'], rule['op'], rule['threshold']) for rule in rules
+        ])
+
+    model_type = model.get('type')
+    if model_type in ('logistic', 'linear'):
+        return LinearScorer(
+            _columns(model),
+            model['weights'],
+            bias=model.get('bias', 0.0),
+            mean=model.get('mean'),
+            scale=model.get('scale'),
+            logistic=model_type == 'logistic',
+            anomaly_rules=anomaly_rules
+        )
+    if model_type == 'tree_ensemble':
+        return TreeEnsembleScorer(
+            model['trees'],
+            _columns(model),
+            base_score=model.get('base_score', 0.0),
+            output=model.get('output', 'logistic'),
+            anomaly_rules=anomaly_rules
+        )
+    raise ValueError(f"Unknown model type: {model_type}")
+
+
+def load_scorer(path: str) -> RiskScorer:
+    """
+    Load a JSON risk model from ``path``
+
+    The model scores an all-zero row before it is returned, so one that
+    would fail on every batch is rejected at load time.
+    """
+    with open(path, 'r') as f:
+        model = json.load(f)
+    try:
+        scorer = scorer_from_dict(model)
+        scorer.score(np.zeros((1, len(FEATURE_NAMES))))
+    except (AttributeError, KeyError, TypeError, IndexError) as e:
+        raise ValueError(f"Malformed model: {e!r}") from e
+    return scorer
+
+
+class ScorerWatcher:
+    """
+    Reloads a model file when it changes
+
+    :meth:`poll` stats the file at most every ``interval_s`` and returns a
+    freshly loaded scorer when its modification time or size changed. A
+    model that fails to load is logged and skipped, leaving the caller on
+    its current scorer until the file changes again. Model files should be
+    replaced by rename so a half-written file is never read.
+    """
+
+    def __init__(self, path: str, interval_s: float = 5.0):
+        self.path = path
+        self.interval_s = interval_s
+        self._signature = None
+        self._checked = 0.0
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def poll(self, force: bool = False) -> Optional[RiskScorer]:
+        """
+        Returns:
+            The reloaded scorer, or None if the model is unchanged or invalid
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < self.interval_s:
+            return None
+        self._checked = now
+
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return None
+        self._signature = signature
+        try:
+            scorer = load_scorer(self.path)
+        except Exception as e:
+            logger.error(f"Failed to load risk model {self.path}, keeping current scorer: {e}")
+            return None
+        logger.info(f"Loaded {scorer.name} risk model from {self.path}")
+        return scorer
@@ -0,0 +1,271 @@
+"""
+Risk Scorers - Batched risk scores and anomaly flags over feature matrices
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import abc
+
+import numpy as np
+
+# Column order of the feature matrix handed to every scorer
+FEATURE_NAMES = (
+    'packet_count',
+    'byte_count',
+    'duration_ms',
+    'mean_packet_length',
+    'packet_length_variance',
+    'mean_inter_arrival_time',
+    'entropy',
+    'window_packets',
+    'window_pps',
+    'window_bytes_per_s',
+    'window_mean_iat',
+    'window_iat_variance',
+    'window_entropy',
+    'recent_mean_iat',  # window mean IAT once the window has two packets, else the flow's
+    'payload_length',
+    'mqtt_publish_or_subscribe',
+    # Per-client DNS tunneling features, 0 for other protocols
+    'dns_qname_length',
+    'dns_client_mean_label_entropy',
+    'dns_distinct_subdomains',
+    'dns_client_nxdomain_rate'
+)
+FEATURE_INDEX = {name: index for index, name in enumerate(FEATURE_NAMES)}
+
+_FLOW_KEYS = FEATURE_NAMES[:7]
+_WINDOW_KEYS = FEATURE_NAMES[7:12]
+_NO_DNS_FEATURES = (0.0, 0.0, 0.0, 0.0)
+
+_COMPARISONS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal
+}
+
+
+def feature_row(flow_stats: Dict[str, Any], protocol_features, payload_length: int) -> List[float]:
+    """
+    One feature matrix row from a FAL flow snapshot and protocol features
+
+    Snapshots without sliding-window features fall back to the flow's own
+    entropy and inter-arrival time, as the rule scorer always did.
+    """
+    get = flow_stats.get
+    row = [float(get(key, 0.0)) for key in _FLOW_KEYS]
+    row.extend(float(get(key, 0.0)) for key in _WINDOW_KEYS)
+    row.append(float(get('window_entropy', row[6])))
+    row.append(float(get('window_mean_iat', 0.0)) if get('window_packets', 0) > 1 else row[5])
+    row.append(float(payload_length))
+    row.append(1.0 if protocol_features.mqtt_command_type in ('PUBLISH', 'SUBSCRIBE') else 0.0)
+    metadata = protocol_features.metadata
+    if 'distinct_subdomains' in metadata:
+        row.append(float(metadata['qname_length']))
+        row.append(metadata['client_mean_label_entropy'])
+        row.append(float(metadata['distinct_subdomains']))
+        row.append(metadata['client_nxdomain_rate'])
+    else:
+        row.extend(_NO_DNS_FEATURES)
+    return row
+
+
+class AnomalyRules:
+    """
+    Threshold rules evaluated column-wise into per-row flag bitmasks
+
+    Rule ``i`` sets bit ``i``; :meth:`names` turns a mask back into flag names.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, str, str, float]]):
+        self.flags: List[str] = []
+        self._checks = []
+        for flag, feature, op, threshold in rules:
+            if feature not in FEATURE_INDEX:
+                raise ValueError(f"Unknown feature in anomaly rule {flag}: {feature}")
+            if op not in _COMPARISONS:
+                raise ValueError(f"Unknown comparison in anomaly rule {flag}: {op}")
+            self.flags.append(flag)
+            self._checks.append((FEATURE_INDEX[feature], _COMPARISONS[op], float(threshold)))
+
+    def evaluate(self, features: np.ndarray) -> np.ndarray:
+        masks = np.zeros(len(features), dtype=np.uint32)
+        for bit, (column, compare, threshold) in enumerate(self._checks):
+            masks |= compare(features[:, column], threshold).astype(np.uint32) << bit
+        return masks
+
+    def names(self, mask: int) -> List[str]:
+        return [flag for bit, flag in enumerate(self.flags) if mask >> bit & 1]
+
+
+DEFAULT_ANOMALY_RULES = AnomalyRules([
+    ('high_entropy', 'window_entropy', '>', 7.5),
+    ('rapid_packet_rate', 'recent_mean_iat', '<', 10.0)
+])
+
+
+class RiskScorer(abc.ABC):
+    """
+    Scores a batch of feature rows in one call
+
+    ``features`` is a float matrix with one row per packet and the columns of
+    :data:`FEATURE_NAMES`. :meth:`score` returns the risk scores in [0, 1]
+    and the anomaly flag bitmasks, one per row.
+    """
+
+    name = "scorer"
+
+    def __init__(self, anomaly_rules: Optional[AnomalyRules] = None):
+        self.anomaly_rules = anomaly_rules or DEFAULT_ANOMALY_RULES
+
+    def score(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return self.risk(features), self.anomaly_rules.evaluate(features)
+
+    @abc.abstractmethod
+    def risk(self, features: np.ndarray) -> np.ndarray:
+        """Risk scores in [0, 1], one per row"""
+
+    def flag_names(self, mask: int) -> List[str]:
+        return self.anomaly_rules.names(mask)
+
+
+class RuleScorer(RiskScorer):
+    """The built-in hand-written rules, vectorized"""
+
+    name = "rules"
+
+    def risk(self, features: np.ndarray) -> np.ndarray:
+        score = 0.2 * features[:, FEATURE_INDEX['mqtt_publish_or_subscribe']]
+        # High entropy might indicate encryption or exfiltration
+        score += 0.3 * (features[:, FEATURE_INDEX['window_entropy']] > 7.0)
+        score += 0.2 * (features[:, FEATURE_INDEX['mean_packet_length']] > 1000)
+        return np.minimum(score, 1.0)
+
+
+class LinearScorer(RiskScorer):
+    """
+    Linear or logistic model over standardized features
+
+    ``risk = sigmoid(((x - mean) / scale) @ weights + bias)`` for logistic
+    models; linear models clip the raw value to [0, 1].
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[int],
+        weights: Sequence[float],
+        bias: float = 0.0,
+        mean: Optional[Sequence[float]] = None,
+        scale: Optional[Sequence[float]] = None,
+        logistic: bool = True,
+        anomaly_rules: Optional[AnomalyRules] = None
+    ):
+        super().__init__(anomaly_rules)
+        self.columns = np.asarray(columns, dtype=np.intp)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        if len(self.weights) != len(self.columns):
+            raise ValueError("Linear model needs one weight per feature")
+        self.bias = float(bias)
+        self.mean = np.asarray(mean if mean is not None else np.zeros(len(self.columns)), dtype=np.float64)
+        scale = np.asarray(scale if scale is not None else np.ones(len(self.columns)), dtype=np.float64)
+        if self.mean.shape != self.columns.shape or scale.shape != self.columns.shape:
+            raise ValueError("Linear model needs one mean and scale per feature")
+        self.inv_scale = 1.0 / np.where(scale == 0, 1.0, scale)
+        self.logistic = logistic
+        self.name = "logistic" if logistic else "linear"
+
+    def risk(self, features: np.ndarray) -> np.ndarray:
+        z = ((features[:, self.columns] - self.mean) * self.inv_scale) @ self.weights + self.bias
+        if self.logistic:
+            return 1.0 / (1.0 + np.exp(-z))
+        return np.clip(z, 0.0, 1.0)
+
+
+class TreeEnsembleScorer(RiskScorer):
+    """
+    Tree ensemble evaluated for all trees and rows at once
+
+    Trees are stored as padded node arrays (``feature``, ``threshold``,
+    ``left``, ``right``, ``value``; ``left < 0`` marks a leaf). A row goes
+    left when its value is ``<= threshold``. Every step advances all
+    (tree, row) pairs one level, so the cost is ``depth`` NumPy passes.
+    ``output`` is ``"mean"`` (random forest), or ``"logistic"``/``"sum"``
+    of ``base_score`` plus the leaf values (gradient boosting).
+    """
+
+    name = "tree_ensemble"
+
+    def __init__(
+        self,
+        trees: Sequence[Dict[str, Sequence[float]]],
+        columns: Sequence[int],
+        base_score: float = 0.0,
+        output: str = "logistic",
+        anomaly_rules: Optional[AnomalyRules] = None
+    ):
+        super().__init__(anomaly_rules)
+        if not trees:
+            raise ValueError("Tree ensemble needs at least one tree")
+        if output not in ("logistic", "sum", "mean"):
+            raise ValueError(f"Unknown tree ensemble output: {output}")
+
+        size = max(len(tree['threshold']) for tree in trees)
+        count = len(trees)
+        columns = np.asarray(columns, dtype=np.intp)
+        self.feature = np.zeros((count, size), dtype=np.intp)
+        self.threshold = np.zeros((count, size), dtype=np.float64)
+        self.left = np.full((count, size), -1, dtype=np.intp)
+        self.right = np.full((count, size), -1, dtype=np.intp)
+        self.value = np.zeros((count, size), dtype=np.float64)
+        for index, tree in enumerate(trees):
+            nodes = len(tree['threshold'])
+            if not all(len(tree[key]) == nodes for key in ('feature', 'left', 'right', 'value')):
+                raise ValueError(f"Tree {index} has node arrays of different lengths")
+            local = np.asarray(tree['feature'], dtype=np.intp)
+            if local.size and (local.min() < 0 or local.max() >= len(columns)):
+                raise ValueError(f"Tree {index} refers to a feature outside the model's feature list")
+            left = np.asarray(tree['left'], dtype=np.intp)
+            right = np.asarray(tree['right'], dtype=np.intp)
+            inner = left >= 0
+            if np.any(left[inner] >= nodes) or np.any((right[inner] < 0) | (right[inner] >= nodes)):
+                raise ValueError(f"Tree {index} links to a node outside the tree")
+            self.feature[index, :nodes] = columns[local]
+            self.threshold[index, :nodes] = tree['threshold']
+            self.left[index, :nodes] = left
+            self.right[index, :nodes] = right
+            self.value[index, :nodes] = tree['value']
+        self.depth = self._max_depth()
+        self.base_score = float(base_score)
+        self.output = output
+        self._trees = np.arange(count)[:, None]
+
+    def _max_depth(self) -> int:
+        """Longest root-to-leaf path, also rejecting cycles"""
+        depth = 0
+        for index in range(len(self.left)):
+            stack = [(0, 0)]
+            while stack:
+                node, level = stack.pop()
+                if level > self.left.shape[1]:
+                    raise ValueError(f"Tree {index} is not a tree (cycle in node links)")
+                depth = max(depth, level)
+                if self.left[index, node] >= 0:
+                    stack.append((self.left[index, node], level + 1))
+                    stack.append((self.right[index, node], level + 1))
+        return depth
+
+    def risk(self, features: np.ndarray) -> np.ndarray:
+        rows = np.arange(len(features))[None, :]
+        node = np.zeros((len(self.left), len(features)), dtype=np.intp)
+        trees = self._trees
+        for _ in range(self.depth):
+            left = self.left[trees, node]
+            go_left = features[rows, self.feature[trees, node]] <= self.threshold[trees, node]
+            node = np.where(left < 0, node, np.where(go_left, left, self.right[trees, node]))
+        leaves = self.value[trees, node]
+
+        if self.output == "mean":
+            return np.clip(leaves.mean(axis=0), 0.0, 1.0)
+        total = self.base_score + leaves.sum(axis=0)
+        if self.output == "logistic":
+            return 1.0 / (1.0 + np.exp(-total))
+        return np.clip(total, 0.0, 1.0)
@@ -1,5 +1,7 @@
 """Secure Connector package"""
 from edge_agent.secure_connector.connector import SecureConnector, ReverseProxyConnector
+from edge_agent.secure_connector.pool import TLSConnectionPool
+from edge_agent.secure_connector.sender import UERBatchSender
+from edge_agent.secure_connector.spool import UERSpool
 
-__all__ = ['SecureConnector', 'ReverseProxyConnector']
-
+__all__ = ['SecureConnector', 'ReverseProxyConnector', 'TLSConnectionPool', 'UERBatchSender', 'UERSpool']
@@ -0,0 +1,114 @@
+"""
+Async UER Sender - Batches UERs on the event loop for the asyncio edge runtime
+"""
+from typing import Any, Deque, Dict, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+from edge_agent.secure_connector.sender import UERBatchSender
+from shared.models.uer_schema import UnifiedEventReport
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AsyncUERSender:
+    """
+    Event-loop counterpart of the :class:`UERBatchSender` thread
+
+    :meth:`submit` may be called from any thread and never blocks: UERs go
+    onto a bounded deque and only the first UER after the sender went idle
+    wakes the event loop. The :meth:`run` task collects batches exactly like
+    the threaded sender (``batch_size`` or ``flush_interval_s``) and hands
+    each one to ``sender.send_now`` on a single I/O thread, so the pooled
+    keep-alive connections, TLS session resumption, spooling and rate-limited
+    spool replay of the threaded sender are reused unchanged.
+    """
+
+    def __init__(self, sender: UERBatchSender, max_queue: int = 10000):
+        self.sender = sender
+        self.max_queue = max(max_queue, 1)
+
+        self._pending: Deque[UnifiedEventReport] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._wake_scheduled = False
+        self._closing = False
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="comidf-uer-io")
+
+        self.dropped_count = 0
+
+    def submit(self, uer: UnifiedEventReport) -> bool:
+        """
+        Queue a UER for the next batch
+
+        Returns:
+            False if the queue was full and the UER was dropped
+        """
+        if len(self._pending) >= self.max_queue:
+            self.dropped_count += 1
+            if self.dropped_count == 1 or self.dropped_count % 1000 == 0:
+                logger.warning(f"UER send queue full, {self.dropped_count} UERs dropped")
+            return False
+        self._pending.append(uer)
+        if not self._wake_scheduled and self._loop is not None:
+            self._wake_scheduled = True
+            self._loop.call_soon_threadsafe(self._wake.set)
+        return True
+
+    async def run(self) -> None:
+        """Send batches until :meth:`drain` is called"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        flush_interval = self.sender.flush_interval_s
+        replay_interval = 0.1 if self.sender.spool is not None else None
+
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), replay_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            self._wake_scheduled = False
+
+            if self._pending and len(self._pending) < self.sender.batch_size and not self._closing:
+                await asyncio.sleep(flush_interval)
+            while self._pending:
+                await self._send(self._take_batch())
+            if self.sender.spool is not None and not self._closing:
+                await self._loop.run_in_executor(self._io, self.sender.replay_spool)
+
+    def _take_batch(self) -> List[UnifiedEventReport]:
+        pending = self._pending
+        return [pending.popleft() for _ in range(min(len(pending), self.sender.batch_size))]
+
+    async def _send(self, batch: List[UnifiedEventReport]) -> None:
+        await self._loop.run_in_executor(self._io, self.sender.send_now, batch)
+
+    async def drain(self, timeout: float = 5.0) -> None:
+        """Stop :meth:`run` and send everything still queued, within ``timeout``"""
+        self._closing = True
+        if self._wake is not None:
+            self._wake.set()
+
+        async def flush() -> None:
+            while self._pending:
+                await self._send(self._take_batch())
+
+        try:
+            await asyncio.wait_for(flush(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"UER sender did not drain within {timeout}s, {len(self._pending)} UERs left")
+        self._io.shutdown(wait=False)
+        logger.info(f"UER sender stopped: {self.stats()}")
+
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch sender statistics with this sender's queue depth and drops"""
+        stats = self.sender.stats()
+        stats['queue_depth'] = len(self._pending)
+        stats['dropped'] += self.dropped_count
+        return stats
@@ -2,18 +2,25 @@
 Secure Connector - Handles secure communication between Edge Agent and Cloud Platform
 """
 import ssl
-import socket
 import grpc
-from typing import Optional, Dict, Any
+import http.client
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+from urllib.parse import urlsplit
 import jwt
 from datetime import datetime, timedelta
 
+from edge_agent.secure_connector.pool import TLSConnectionPool
 from shared.models.uer_schema import UnifiedEventReport
+from shared.models.uer_wire import UER_PROTOBUF_CONTENT_TYPE, encode_uer_batch_checked
 from shared.utils.logger import get_logger
-from shared.config.constants import AgentStatus
+from shared.config.constants import AgentStatus, MAX_UER_SIZE_BYTES, UER_BATCH_PATH
 
 logger = get_logger(__name__)
 
+# Tokens are re-minted this long before they expire
+JWT_LIFETIME = timedelta(hours=24)
+JWT_REFRESH_MARGIN = timedelta(minutes=5)
+
 
 class SecureConnector:
     """Handles secure communication with Cloud Platform"""
@@ -25,8 +32,15 @@ class SecureConnector:
         cloud_endpoint: str,
         cert_path: Optional[str] = None,
         key_path: Optional[str] = None,
-        ca_cert_path: Optional[str] = None
+        ca_cert_path: Optional[str] = None,
+        cloud_port: int = 443,
+        wire_format: str = "protobuf",
+        max_uer_size: int = MAX_UER_SIZE_BYTES,
+        pool_size: int = 2
     ):
+        if wire_format not in ("protobuf", "json"):
+            raise ValueError(f"Unknown UER wire format: {wire_format}")
+
         self.agent_id = agent_id
         self.tenant_id = tenant_id
         self.cloud_endpoint = cloud_endpoint
@@ -35,21 +49,45 @@ class SecureConnector:
         self.ca_cert_path = ca_cert_path
         self.jwt_token: Optional[str] = None
         self.token_expiry: Optional[datetime] = None
+        self._jwt_secret: Optional[str] = None
+        self._auth_header: Optional[str] = None
         self.status = AgentStatus.REGISTERING
+        self.wire_format = wire_format
+        self.max_uer_size = max_uer_size
+        
+        endpoint = cloud_endpoint if '://' in cloud_endpoint else f"https://{cloud_endpoint}"
+        parts = urlsplit(endpoint)
+        self.cloud_host = parts.hostname
+        self.cloud_port = parts.port or cloud_port
+        
+        # Keep-alive mTLS connections that resume the cached TLS session
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self.pool_size = pool_size
+        self._pool: Optional[TLSConnectionPool] = None
+        self.last_send_retryable = True
         
     def authenticate(self, secret_key: str) -> bool:
         """
         Authenticate with Cloud Platform using JWT
+        
+        A token minted with the same secret is reused until it is about to
+        expire, so repeated calls do not re-sign it.
         """
+        if secret_key == self._jwt_secret and self._token_fresh():
+            self.status = AgentStatus.ACTIVE
+            return True
         try:
             # Generate JWT token
+            expiry = datetime.utcnow() + JWT_LIFETIME
             payload = {
                 'agent_id': self.agent_id,
                 'tenant_id': self.tenant_id,
-                'exp': datetime.utcnow() + timedelta(hours=24)
+                'exp': expiry
             }
             self.jwt_token = jwt.encode(payload, secret_key, algorithm='HS256')
-            self.token_expiry = datetime.utcnow() + timedelta(hours=24)
+            self.token_expiry = expiry
+            self._jwt_secret = secret_key
+            self._auth_header = f"Bearer {self.jwt_token}"
             self.status = AgentStatus.ACTIVE
             
             logger.info(f"Authenticated agent {self.agent_id} with tenant {self.tenant_id}")
@@ -65,31 +103,140 @@ class SecureConnector:
             return False
         return datetime.utcnow() < self.token_expiry
     
+    def _token_fresh(self) -> bool:
+        """Token valid for at least the refresh margin"""
+        return self.is_token_valid() and datetime.utcnow() + JWT_REFRESH_MARGIN < self.token_expiry
+    
+    def create_ssl_context(self) -> ssl.SSLContext:
+        """mTLS client context, built once and reused for every connection"""
+        if self._ssl_context is None:
+            context = ssl.create_default_context()
+            context.check_hostname = True
+            context.verify_mode = ssl.CERT_REQUIRED
+            
+            if self.ca_cert_path:
+                context.load_verify_locations(self.ca_cert_path)
+            
+            if self.cert_path and self.key_path:
+                context.load_cert_chain(self.cert_path, self.key_path)
+            self._ssl_context = context
+        return self._ssl_context
+    
+    @property
+    def pool(self) -> TLSConnectionPool:
+        """Connection pool to the Cloud Platform, created on first use"""
+        if self._pool is None:
+            self._pool = TLSConnectionPool(
+                self.cloud_host,
+                self.cloud_port,
+                self.create_ssl_context(),
+                size=self.pool_size
+            )
+        return self._pool
+    
+    def close(self) -> None:
+        """Close the pooled connections"""
+        if self._pool is not None:
+            self._pool.close()
+    
     def send_uer(self, uer: UnifiedEventReport) -> bool:
+        """Send a single Unified Event Report to Cloud Platform"""
+        return self.send_batch([uer])
+    
+    def send_batch(self, uers: Sequence[UnifiedEventReport]) -> bool:
         """
-        Send Unified Event Report to Cloud Platform
+        Send a batch of UERs in one request over the persistent connection
         
-        This would use gRPC or HTTPS with mTLS in production
+        Returns:
+            True if the Cloud Platform accepted the batch; False, and not
+            retryable, if every UER was too large to send
         """
-        if not self.is_token_valid():
-            logger.warning("JWT token expired, attempting to re-authenticate")
-            # In production, would re-authenticate here
-            self.authenticate("dummy_secret_for_demo")
-        
-        try:
-            # Serialize UER to JSON
-            uer_dict = uer.dict()
-            
-            # In production, this would use gRPC client or HTTPS with mTLS
-            # For now, log the UER
-            logger.info(f"Sending UER {uer.event_id} to {self.cloud_endpoint}")
-            logger.debug(f"UER data: {uer_dict}")
-            
-            # Simulate successful transmission
+        if not uers:
             return True
-        except Exception as e:
-            logger.error(f"Failed to send UER: {e}")
+        body, content_type, encoded = self.encode_batch(uers)
+        if not encoded:
+            self.last_send_retryable = False
             return False
+        return self.send_encoded(body, content_type, len(encoded))
+    
+    def send_encoded(self, body: bytes, content_type: str, count: int) -> bool:
+        """
+        Post an already encoded batch of ``count`` UERs
+        
+        The batch goes out on a pooled keep-alive connection; a connection
+        dropped by the peer is replaced once before the batch is reported as
+        failed. ``last_send_retryable`` tells whether a failed
+        batch is worth sending again later: connection errors, 5xx, 408 and
+        429 are, any other rejection is not.
+        
+        Returns:
+            True if the Cloud Platform accepted the batch
+        """
+        if not self._token_fresh():
+            if self._jwt_secret is None:
+                logger.error(f"Cannot send batch of {count} UERs: agent is not authenticated")
+                self.last_send_retryable = True
+                return False
+            self.authenticate(self._jwt_secret)
+        
+        headers = {
+            'Content-Type': content_type,
+            'Authorization': self._auth_header
+        }
+        
+        self.last_send_retryable = True
+        for attempt in range(2):
+            try:
+                connection = self.pool.acquire()
+            except OSError as e:
+                logger.error(f"Failed to send batch of {count} UERs: {e}")
+                return False
+            try:
+                connection.request('POST', UER_BATCH_PATH, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as e:
+                # A pooled connection the peer dropped gets one retry on a fresh one
+                self.pool.release(connection, reusable=False)
+                if attempt:
+                    logger.error(f"Failed to send batch of {count} UERs: {e}")
+                continue
+            self.pool.release(connection, reusable=not response.will_close)
+            if response.status >= 400:
+                self.last_send_retryable = response.status >= 500 or response.status in (408, 429)
+                logger.error(f"Cloud Platform rejected batch of {count} UERs: HTTP {response.status}")
+                return False
+            logger.debug("Sent batch of %d UERs to %s", count, self.cloud_endpoint)
+            return True
+        return False
+    
+    def encode_batch(
+        self,
+        uers: Sequence[UnifiedEventReport]
+    ) -> Tuple[bytes, str, List[UnifiedEventReport]]:
+        """
+        Request body and content type for a batch
+        
+        UERs over max_uer_size are not sent whole: protobuf drops their packet
+        sample first, and any still too large are skipped and logged.
+        
+        Returns:
+            The body, its content type and the UERs it holds
+        """
+        if self.wire_format == "protobuf":
+            body, encoded = encode_uer_batch_checked(uers, self.max_uer_size)
+            return body, UER_PROTOBUF_CONTENT_TYPE, encoded
+        
+        parts = []
+        encoded = []
+        for uer in uers:
+            data = uer.json().encode()
+            if len(data) > self.max_uer_size:
+                logger.warning(f"Skipping UER {uer.event_id}: {len(data)} bytes exceeds {self.max_uer_size}")
+                continue
+            parts.append(data)
+            encoded.append(uer)
+        return b'{"uers":[' + b','.join(parts) + b']}', 'application/json', encoded
     
     def get_credentials(self) -> Dict[str, Any]:
         """Get agent credentials for Cloud Platform registration"""
@@ -111,42 +258,16 @@ class ReverseProxyConnector(SecureConnector):
         self.proxy_host = None
     
     def connect_to_proxy(self) -> bool:
-        """Establish connection to Cloud Platform reverse proxy"""
+        """Open the first pooled connection to the Cloud Platform reverse proxy"""
         try:
-            # Parse endpoint to get proxy host
-            if '://' in self.cloud_endpoint:
-                protocol, endpoint = self.cloud_endpoint.split('://', 1)
-                if '/' in endpoint:
-                    endpoint = endpoint.split('/')[0]
-                self.proxy_host = endpoint
-            else:
-                self.proxy_host = self.cloud_endpoint
+            self.proxy_host = self.cloud_host
+            self.proxy_port = self.cloud_port
             
-            # Create SSL context for mTLS
-            context = ssl.create_default_context()
-            context.check_hostname = True
-            context.verify_mode = ssl.CERT_REQUIRED
-            
-            if self.ca_cert_path:
-                context.load_verify_locations(self.ca_cert_path)
-            
-            if self.cert_path and self.key_path:
-                context.load_cert_chain(self.cert_path, self.key_path)
-            
-            # Connect to proxy
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            wrapped_socket = context.wrap_socket(
-                sock,
-                server_hostname=self.proxy_host
-            )
-            
-            wrapped_socket.connect((self.proxy_host, self.proxy_port))
+            # Connect (TCP + mTLS handshake); the connection stays in the pool for sending
+            self.pool.warm()
             logger.info(f"Connected to proxy at {self.proxy_host}:{self.proxy_port}")
-            
-            wrapped_socket.close()
             return True
         except Exception as e:
             logger.error(f"Failed to connect to proxy: {e}")
             self.status = AgentStatus.ERROR
             return False
-
@@ -0,0 +1,211 @@
+"""
+TLS Connection Pool - Keep-alive mTLS connections that resume TLS sessions
+"""
+from typing import Any, Dict, List, Optional
+import http.client
+import random
+import select
+import socket
+import ssl
+import threading
+import time
+
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ResumingHTTPSConnection(http.client.HTTPSConnection):
+    """
+    HTTPS connection that offers a cached TLS session on connect
+
+    The pool hands every new connection the latest session (or TLS 1.3
+    ticket) seen on any connection to the same peer, so reconnects skip the
+    certificate exchange and key agreement of a full handshake.
+    """
+
+    def __init__(self, host: str, port: int, context: ssl.SSLContext,
+                 session: Optional[ssl.SSLSession] = None, timeout: float = 10):
+        super().__init__(host, port, timeout=timeout, context=context)
+        self._tls_context = context
+        self._tls_session = session
+        self.last_used = 0.0
+
+    def connect(self) -> None:
+        sock = socket.create_connection((self.host, self.port), self.timeout, self.source_address)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock = self._tls_context.wrap_socket(
+                sock, server_hostname=self.host, session=self._tls_session
+            )
+        except BaseException:
+            sock.close()
+            raise
+
+    @property
+    def tls_session(self) -> Optional[ssl.SSLSession]:
+        sock = self.sock
+        return sock.session if isinstance(sock, ssl.SSLSocket) else None
+
+    @property
+    def session_reused(self) -> bool:
+        sock = self.sock
+        return isinstance(sock, ssl.SSLSocket) and sock.session_reused
+
+    def is_healthy(self, idle_timeout_s: float) -> bool:
+        """
+        Whether an idle connection can take another request
+
+        A keep-alive socket that turned readable while idle was closed or
+        poisoned by the peer; one idle past ``idle_timeout_s`` has likely been
+        dropped by a middlebox and is not worth the failed write.
+        """
+        sock = self.sock
+        if sock is None:
+            return False
+        if time.monotonic() - self.last_used > idle_timeout_s:
+            return False
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+
+class TLSConnectionPool:
+    """
+    Bounded pool of keep-alive mTLS connections to one host
+
+    Idle connections are reused most recently used first and health-checked
+    before each reuse. New connections resume the last TLS session. After a
+    failed connect, no new connection is attempted until a jittered,
+    exponentially growing backoff has passed; :meth:`acquire` fails fast
+    with ``ConnectionError`` meanwhile, so callers can spool instead of
+    blocking on a dead link.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        context: ssl.SSLContext,
+        size: int = 2,
+        timeout_s: float = 10.0,
+        idle_timeout_s: float = 60.0,
+        backoff_s: float = 0.5,
+        max_backoff_s: float = 30.0
+    ):
+        self.host = host
+        self.port = port
+        self.context = context
+        self.size = max(size, 1)
+        self.timeout_s = timeout_s
+        self.idle_timeout_s = idle_timeout_s
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+
+        self._idle: List[ResumingHTTPSConnection] = []
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._session: Optional[ssl.SSLSession] = None
+        self._failures = 0
+        self._retry_at = 0.0
+
+        self.connect_count = 0
+        self.resumed_count = 0
+        self.reuse_count = 0
+        self.discarded_count = 0
+
+    def acquire(self) -> ResumingHTTPSConnection:
+        """Idle healthy connection, or a newly connected one when the pool has room"""
+        with self._cond:
+            while True:
+                while self._idle:
+                    connection = self._idle.pop()
+                    if connection.is_healthy(self.idle_timeout_s):
+                        self._in_use += 1
+                        self.reuse_count += 1
+                        return connection
+                    connection.close()
+                    self.discarded_count += 1
+                if self._in_use < self.size:
+                    self._in_use += 1
+                    break
+                self._cond.wait()
+
+        try:
+            return self._connect()
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def _connect(self) -> ResumingHTTPSConnection:
+        now = time.monotonic()
+        if now < self._retry_at:
+            raise ConnectionError(
+                f"{self.host}:{self.port} unreachable, next attempt in {self._retry_at - now:.1f}s"
+            )
+
+        connection = ResumingHTTPSConnection(
+            self.host, self.port, self.context, session=self._session, timeout=self.timeout_s
+        )
+        try:
+            connection.connect()
+        except (OSError, ssl.SSLError):
+            connection.close()
+            self._failures += 1
+            backoff = min(self.backoff_s * (2 ** (self._failures - 1)), self.max_backoff_s)
+            self._retry_at = time.monotonic() + random.uniform(backoff / 2, backoff)
+            raise
+
+        self._failures = 0
+        self._retry_at = 0.0
+        self.connect_count += 1
+        if connection.session_reused:
+            self.resumed_count += 1
+        connection.last_used = time.monotonic()
+        return connection
+
+    def release(self, connection: ResumingHTTPSConnection, reusable: bool = True) -> None:
+        """
+        Return a connection after a request
+
+        The connection's TLS session is kept for resumption. TLS 1.3 tickets
+        arrive after the handshake, so this is read once a response was seen.
+        """
+        if reusable and connection.sock is not None:
+            session = connection.tls_session
+            if session is not None:
+                self._session = session
+            connection.last_used = time.monotonic()
+        else:
+            connection.close()
+            connection = None
+        with self._cond:
+            self._in_use -= 1
+            if connection is not None:
+                self._idle.append(connection)
+            self._cond.notify()
+
+    def warm(self) -> None:
+        """Open one connection ahead of the first request"""
+        self.release(self.acquire())
+
+    def close(self) -> None:
+        """Close the idle connections"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'idle': len(self._idle),
+            'in_use': self._in_use,
+            'connects': self.connect_count,
+            'resumed': self.resumed_count,
+            'reused': self.reuse_count,
+            'discarded': self.discarded_count
+        }
@@ -0,0 +1,246 @@
+"""
+UER Batch Sender - Bounded queue drained in batches by a background thread
+"""
+from typing import Any, Dict, List, Optional
+import queue
+import threading
+import time
+
+from edge_agent.secure_connector.spool import UERSpool
+from shared.models.uer_schema import UnifiedEventReport
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class UERBatchSender:
+    """
+    Decouples UER emission from the network
+
+    :meth:`submit` only enqueues and never blocks: when the bounded queue is
+    full the UER is dropped and counted. A background thread collects up to
+    ``batch_size`` UERs, or whatever arrived within ``flush_interval_s`` of the
+    first one, and hands them to the connector in one request over its
+    persistent connection.
+
+    With a ``spool``, batches that fail with a retryable error are written to
+    disk instead of being dropped. Once a send succeeds again, spooled
+    batches are replayed oldest first from the same thread, limited to
+    ``replay_bytes_per_s`` so the backlog does not starve live traffic on a
+    recovering link. While the cloud stays unreachable, replay is retried
+    with exponential backoff up to ``max_retry_interval_s``.
+    """
+
+    def __init__(
+        self,
+        connector,
+        max_queue: int = 10000,
+        batch_size: int = 256,
+        flush_interval_s: float = 0.05,
+        spool: Optional[UERSpool] = None,
+        replay_bytes_per_s: int = 256 * 1024,
+        retry_interval_s: float = 1.0,
+        max_retry_interval_s: float = 60.0,
+        metrics=None
+    ):
+        self.connector = connector
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval_s = flush_interval_s
+
+        self._queue: 'queue.Queue[UnifiedEventReport]' = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        self.metrics = metrics
+        self.spool = spool
+        self.replay_bytes_per_s = max(replay_bytes_per_s, 1)
+        self.retry_interval_s = retry_interval_s
+        self.max_retry_interval_s = max_retry_interval_s
+        self._backoff_s = retry_interval_s
+        self._replay_not_before = 0.0
+        self._replay_tokens = float(self.replay_bytes_per_s)
+        self._replay_refilled = time.monotonic()
+
+        self.dropped_count = 0
+        self.failed_count = 0
+        self.batch_count = 0
+        self.batched_count = 0
+        self.sent_count = 0
+        self.last_batch_size = 0
+        self.last_send_latency_s = 0.0
+        self.max_send_latency_s = 0.0
+        self._total_send_latency_s = 0.0
+
+    def start(self) -> None:
+        """Start the background sender thread"""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="comidf-uer-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, uer: UnifiedEventReport) -> bool:
+        """
+        Queue a UER for the next batch
+
+        Returns:
+            False if the queue was full and the UER was dropped
+        """
+        try:
+            self._queue.put_nowait(uer)
+            return True
+        except queue.Full:
+            self.dropped_count += 1
+            if self.dropped_count == 1 or self.dropped_count % 1000 == 0:
+                logger.warning(f"UER send queue full, {self.dropped_count} UERs dropped")
+            return False
+
+    def _run(self) -> None:
+        while self._running or not self._queue.empty():
+            batch = self._collect()
+            if batch:
+                self.send_now(batch)
+            if self.spool is not None and self._running:
+                self.replay_spool()
+
+    def _collect(self) -> List[UnifiedEventReport]:
+        """Block for the first UER, then take more until the batch fills or the deadline passes"""
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval_s
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0 and self._running:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def send_now(self, batch: List[UnifiedEventReport]) -> None:
+        """
+        Send one batch on the calling thread, spooling it if that fails
+
+        Used by the sender thread, and by callers that batch UERs themselves
+        and must not send from more than one thread at a time.
+        """
+        started = time.perf_counter()
+        body = content_type = None
+        encoded = batch
+        try:
+            body, content_type, encoded = self.connector.encode_batch(batch)
+            # UERs too large to send even stripped are failures, not retries
+            self.failed_count += len(batch) - len(encoded)
+            if not encoded:
+                return
+            sent = self.connector.send_encoded(body, content_type, len(encoded))
+        except Exception as e:
+            logger.error(f"Failed to send batch of {len(batch)} UERs: {e}")
+            sent = False
+        latency = time.perf_counter() - started
+
+        self.batch_count += 1
+        self.batched_count += len(batch)
+        self.last_batch_size = len(batch)
+        self.last_send_latency_s = latency
+        self._total_send_latency_s += latency
+        if latency > self.max_send_latency_s:
+            self.max_send_latency_s = latency
+        if self.metrics is not None:
+            self.metrics.observe('send', latency)
+        if sent:
+            self.sent_count += len(encoded)
+            self._backoff_s = self.retry_interval_s
+            if self.metrics is not None:
+                for uer in encoded:
+                    self.metrics.inc('uers_sent', uer.protocol_info.protocol_type)
+            return
+
+        self._defer_replay()
+        if (self.spool is not None and body is not None
+                and self.connector.last_send_retryable):
+            try:
+                self.spool.append(body, content_type, len(encoded))
+                return
+            except OSError as e:
+                logger.error(f"Failed to spool batch of {len(encoded)} UERs: {e}")
+        self.failed_count += len(encoded)
+
+    def _defer_replay(self) -> None:
+        """Hold spool replay back after a failed send, doubling the wait each time"""
+        self._replay_not_before = time.monotonic() + self._backoff_s
+        self._backoff_s = min(self._backoff_s * 2, self.max_retry_interval_s)
+
+    def replay_spool(self) -> None:
+        """Send spooled batches while the rate limit allows; same threading rule as :meth:`send_now`"""
+        now = time.monotonic()
+        if now < self._replay_not_before:
+            return
+        self._replay_tokens = min(
+            self._replay_tokens + (now - self._replay_refilled) * self.replay_bytes_per_s,
+            float(self.replay_bytes_per_s)
+        )
+        self._replay_refilled = now
+
+        # A batch larger than one second's budget goes out once the bucket is full
+        while self._replay_tokens > 0:
+            record = self.spool.peek()
+            if record is None:
+                return
+            body, content_type, count = record
+            if len(body) > self._replay_tokens and self._replay_tokens < self.replay_bytes_per_s:
+                return
+            try:
+                sent = self.connector.send_encoded(body, content_type, count)
+            except Exception as e:
+                logger.error(f"Failed to replay spooled batch of {count} UERs: {e}")
+                sent = False
+            if not sent and self.connector.last_send_retryable:
+                self._defer_replay()
+                return
+            if not sent:
+                logger.warning(f"Cloud Platform rejected spooled batch of {count} UERs, discarding it")
+                self.failed_count += count
+            self.spool.ack()
+            if sent and self.metrics is not None:
+                self.metrics.inc('uers_sent', 'spooled', count)
+            self._replay_tokens -= len(body)
+            self._backoff_s = self.retry_interval_s
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Send whatever is still queued, then stop the thread"""
+        if self._thread is None:
+            return
+        self._running = False
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"UER sender did not drain within {timeout}s, {self._queue.qsize()} UERs left")
+        self._thread = None
+        logger.info(f"UER sender stopped: {self.stats()}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, batch size, send latency and spool counters"""
+        batches = self.batch_count
+        stats = {
+            'queue_depth': self._queue.qsize(),
+            'dropped': self.dropped_count,
+            'failed': self.failed_count,
+            'sent': self.sent_count,
+            'batches': batches,
+            'last_batch_size': self.last_batch_size,
+            'mean_batch_size': self.batched_count / batches if batches else 0.0,
+            'last_send_latency_ms': self.last_send_latency_s * 1000,
+            'mean_send_latency_ms': self._total_send_latency_s / batches * 1000 if batches else 0.0,
+            'max_send_latency_ms': self.max_send_latency_s * 1000
+        }
+        if self.spool is not None:
+            stats['spool'] = self.spool.stats()
+        return stats
@@ -0,0 +1,305 @@
+"""
+UER Spool - Disk-backed store-and-forward for batches the Cloud Platform did not accept
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+import fcntl
+import mmap
+import os
+import struct
+import zlib
+
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# magic, version, data end offset, running CRC32 of the data region, ack offset
+_SEGMENT_HEADER = struct.Struct('=4sHxxIII')
+_SEGMENT_MAGIC = b'UERS'
+_SEGMENT_VERSION = 1
+
+# body length, body CRC32, UER count, content type length
+_RECORD_HEADER = struct.Struct('=IIHH')
+
+_SEGMENT_SUFFIX = '.seg'
+_LOCK_FILE = '.lock'
+
+
+class _Segment:
+    """
+    One append-only, memory-mapped segment file
+
+    The header is rewritten in place after every append and ack, so a
+    reopened segment knows where its data ends, which records were already
+    delivered and the checksum its data region must match.
+    """
+
+    def __init__(self, path: Path, size: int, create: bool = False):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | (os.O_CREAT | os.O_EXCL if create else 0), 0o600)
+        try:
+            if create:
+                os.ftruncate(fd, size)
+            self.size = os.fstat(fd).st_size
+            self._map = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+
+        if create:
+            self.write_end = self.ack_offset = _SEGMENT_HEADER.size
+            self.data_crc = 0
+            self._write_header()
+        else:
+            self._load()
+
+    def _write_header(self) -> None:
+        _SEGMENT_HEADER.pack_into(
+            self._map, 0, _SEGMENT_MAGIC, _SEGMENT_VERSION,
+            self.write_end, self.data_crc, self.ack_offset
+        )
+
+    def _load(self) -> None:
+        """Read the header back and verify the segment checksum"""
+        if self.size < _SEGMENT_HEADER.size:
+            raise ValueError(f"{self.path.name}: truncated segment")
+        magic, version, write_end, data_crc, ack_offset = _SEGMENT_HEADER.unpack_from(self._map, 0)
+        if magic != _SEGMENT_MAGIC or version != _SEGMENT_VERSION:
+            raise ValueError(f"{self.path.name}: not a UER spool segment")
+
+        start = _SEGMENT_HEADER.size
+        write_end = min(max(write_end, start), self.size)
+        self.write_end = write_end
+        self.data_crc = data_crc
+        self.ack_offset = min(max(ack_offset, start), write_end)
+        if zlib.crc32(self._map[start:write_end]) != data_crc:
+            self._recover()
+
+    def _recover(self) -> None:
+        """Keep the records that pass their own checksum, drop the torn tail"""
+        offset = _SEGMENT_HEADER.size
+        crc = 0
+        while True:
+            record = self._read(offset)
+            if record is None:
+                break
+            end = record[0]
+            crc = zlib.crc32(self._map[offset:end], crc)
+            offset = end
+        logger.warning(
+            f"Spool segment {self.path.name} failed its checksum, "
+            f"kept {offset - _SEGMENT_HEADER.size} of {self.write_end - _SEGMENT_HEADER.size} bytes"
+        )
+        self.write_end = offset
+        self.data_crc = crc
+        self.ack_offset = min(self.ack_offset, offset)
+        self._write_header()
+
+    def _read(self, offset: int) -> Optional[Tuple[int, bytes, str, int]]:
+        """Record at ``offset`` as (end offset, body, content type, count), None if invalid"""
+        if offset + _RECORD_HEADER.size > self.write_end:
+            return None
+        length, crc, count, ctype_length = _RECORD_HEADER.unpack_from(self._map, offset)
+        start = offset + _RECORD_HEADER.size
+        end = start + ctype_length + length
+        if end > self.write_end:
+            return None
+        data = self._map[start:end]
+        if zlib.crc32(data) != crc:
+            return None
+        return end, data[ctype_length:], data[:ctype_length].decode(), count
+
+    def free(self) -> int:
+        return self.size - self.write_end
+
+    def append(self, body: bytes, content_type: str, count: int) -> None:
+        ctype = content_type.encode()
+        crc = zlib.crc32(body, zlib.crc32(ctype))
+        offset = self.write_end
+        header = _RECORD_HEADER.pack(len(body), crc, min(count, 0xFFFF), len(ctype))
+        end = offset + len(header) + len(ctype) + len(body)
+        self._map[offset:offset + len(header)] = header
+        self._map[offset + len(header):end - len(body)] = ctype
+        self._map[end - len(body):end] = body
+        self.data_crc = zlib.crc32(self._map[offset:end], self.data_crc)
+        self.write_end = end
+        self._write_header()
+
+    def peek(self) -> Optional[Tuple[int, bytes, str, int]]:
+        """Oldest undelivered record"""
+        return self._read(self.ack_offset)
+
+    def ack(self, end: int) -> None:
+        self.ack_offset = end
+        self._write_header()
+
+    def pending_count(self) -> int:
+        """UERs in records not yet delivered"""
+        count = 0
+        offset = self.ack_offset
+        while True:
+            record = self._read(offset)
+            if record is None:
+                return count
+            offset = record[0]
+            count += record[3]
+
+    @property
+    def drained(self) -> bool:
+        return self.ack_offset >= self.write_end
+
+    def close(self) -> None:
+        self._map.close()
+
+    def delete(self) -> None:
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class UERSpool:
+    """
+    Store-and-forward spool for encoded UER batches
+
+    Batches are appended as checksummed records to memory-mapped segment
+    files in ``directory``. Appends only copy into the mapping and never
+    fsync; the page cache writes the segments back, and the per-segment
+    checksum catches data torn by a crash on reopen. Records are delivered
+    oldest first and acknowledged only after the Cloud Platform accepted
+    them, so a crash between send and ack replays the record again
+    (at-least-once). When the spool would grow past ``max_bytes`` the oldest
+    segment is evicted, delivered or not.
+
+    The spool is not thread-safe; the batch sender is its only user. The
+    directory is held with an exclusive ``flock`` for the spool's lifetime,
+    so a second spool on the same directory fails with ``OSError`` instead
+    of deleting segments the first one is still writing.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        segment_bytes: int = 8 * 1024 * 1024
+    ):
+        page = mmap.PAGESIZE
+        self.directory = Path(directory)
+        self.segment_bytes = max(-(-segment_bytes // page) * page, page)
+        self.max_bytes = max(max_bytes, 2 * self.segment_bytes)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_fd = self._lock()
+
+        self.spooled_count = 0
+        self.replayed_count = 0
+        self.evicted_count = 0
+
+        self._segments: List[_Segment] = []
+        self._next_seq = 0
+        self._open_existing()
+
+    def _lock(self) -> int:
+        """Take the directory lock, or raise OSError if another spool holds it"""
+        fd = os.open(self.directory / _LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as e:
+            os.close(fd)
+            raise OSError(f"Spool directory {self.directory} is in use by another spool") from e
+        return fd
+
+    def _open_existing(self) -> None:
+        """Reopen segments left by a previous run, oldest first"""
+        for path in sorted(self.directory.glob(f'*{_SEGMENT_SUFFIX}')):
+            try:
+                seq = int(path.stem)
+                segment = _Segment(path, self.segment_bytes)
+            except (ValueError, OSError) as e:
+                logger.error(f"Discarding unreadable spool segment {path.name}: {e}")
+                path.unlink(missing_ok=True)
+                continue
+            self._next_seq = max(self._next_seq, seq + 1)
+            # Drained segments are deleted by peek() once replay passes them
+            self._segments.append(segment)
+        if self.pending():
+            logger.info(f"Spool holds {self.pending_count()} undelivered UERs from a previous run")
+
+    def _new_segment(self, min_size: int) -> _Segment:
+        page = mmap.PAGESIZE
+        size = max(self.segment_bytes, -(-(_SEGMENT_HEADER.size + min_size) // page) * page)
+        while self._segments and self.disk_bytes() + size > self.max_bytes:
+            self._evict_oldest()
+        path = self.directory / f'{self._next_seq:016d}{_SEGMENT_SUFFIX}'
+        self._next_seq += 1
+        segment = _Segment(path, size, create=True)
+        self._segments.append(segment)
+        return segment
+
+    def _evict_oldest(self) -> None:
+        segment = self._segments.pop(0)
+        lost = segment.pending_count()
+        if lost:
+            self.evicted_count += lost
+            logger.warning(f"Spool full, evicted {lost} undelivered UERs in {segment.path.name}")
+        segment.delete()
+
+    def append(self, body: bytes, content_type: str, count: int) -> None:
+        """Spool one encoded batch of ``count`` UERs"""
+        needed = _RECORD_HEADER.size + len(content_type.encode()) + len(body)
+        segment = self._segments[-1] if self._segments else None
+        if segment is None or segment.free() < needed:
+            segment = self._new_segment(needed)
+        segment.append(body, content_type, count)
+        self.spooled_count += count
+
+    def peek(self) -> Optional[Tuple[bytes, str, int]]:
+        """
+        Oldest undelivered batch as (body, content type, UER count)
+
+        Drained segments other than the one being written are deleted on the way.
+        """
+        while self._segments:
+            segment = self._segments[0]
+            record = segment.peek()
+            if record is not None:
+                return record[1], record[2], record[3]
+            if len(self._segments) == 1:
+                return None
+            self._segments.pop(0).delete()
+        return None
+
+    def ack(self) -> None:
+        """Mark the batch returned by :meth:`peek` as delivered"""
+        segment = self._segments[0]
+        record = segment.peek()
+        if record is not None:
+            segment.ack(record[0])
+            self.replayed_count += record[3]
+
+    def pending(self) -> bool:
+        return any(not segment.drained for segment in self._segments)
+
+    def pending_count(self) -> int:
+        return sum(segment.pending_count() for segment in self._segments)
+
+    def disk_bytes(self) -> int:
+        return sum(segment.size for segment in self._segments)
+
+    def close(self) -> None:
+        """Unmap all segments; undelivered records stay on disk for the next run"""
+        for segment in self._segments:
+            segment.close()
+        self._segments = []
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'segments': len(self._segments),
+            'disk_bytes': self.disk_bytes(),
+            'spooled': self.spooled_count,
+            'replayed': self.replayed_count,
+            'evicted': self.evicted_count
+        }
@@ -91,6 +91,7 @@ echo ""
 echo "Creating network configuration..."
 
 mkdir -p /etc/comidf
+mkdir -p /var/lib/comidf/spool
 
 cat > /etc/comidf/agent_net_config.yaml <<EOF
 mgmt_iface: $mgmt_iface
@@ -159,6 +160,10 @@ flow_cache_timeout: 600
 max_packet_buffer_size: 1000
 max_uer_size_bytes: 10240
 
+# Store-and-forward spool for cloud outages
+spool_dir: /var/lib/comidf/spool
+spool_max_bytes: 268435456
+
 # Debug mode
 debug_mode: false
 log_level: "INFO"
@@ -72,3 +72,16 @@ MAX_UER_SIZE_BYTES = 10 * 1024  # 10KB max UER size
 MAX_PACKET_SAMPLE_SIZE = 1500  # Standard MTU
 PACKET_BUFFER_SIZE = 1000  # Buffer size for packet capture
 
+# UER Gateway batch ingest endpoint (protobuf UERBatch, or JSON body {"uers": [...]})
+UER_BATCH_PATH = "/api/v1/uer/batch"
+
+# Well-known (transport, port) pairs served by each protocol agent
+PROTOCOL_PORTS = {
+    ProtocolType.MQTT.value: [("tcp", 1883), ("tcp", 8883)],
+    ProtocolType.HTTP.value: [("tcp", 80), ("tcp", 443), ("tcp", 8000), ("tcp", 8080), ("tcp", 8443)],
+    ProtocolType.DNS.value: [("udp", 53), ("tcp", 53), ("udp", 5353)],
+    ProtocolType.QUIC.value: [("udp", 443)],
+    ProtocolType.MODBUS.value: [("tcp", 502)],
+    ProtocolType.COAP.value: [("udp", 5683)],
+}
+
@@ -7,6 +7,14 @@ from shared.models.uer_schema import (
     ThreatIndicator,
     CloudProcessingResult
 )
+from shared.models.uer_wire import (
+    UER_PROTOBUF_CONTENT_TYPE,
+    UERTooLargeError,
+    encode_uer,
+    decode_uer,
+    encode_uer_batch,
+    decode_uer_batch
+)
 from shared.models.network_config import (
     CloudNetworkConfig,
     EdgeNetworkConfig
@@ -19,6 +27,12 @@ __all__ = [
     'ProtocolSpecificFeatures',
     'ThreatIndicator',
     'CloudProcessingResult',
+    'UER_PROTOBUF_CONTENT_TYPE',
+    'UERTooLargeError',
+    'encode_uer',
+    'decode_uer',
+    'encode_uer_batch',
+    'decode_uer_batch',
     'CloudNetworkConfig',
     'EdgeNetworkConfig'
 ]
@@ -0,0 +1,261 @@
+"""
+UER Wire Format - Protobuf encoding of Unified Event Reports and batch envelopes
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+
+from shared.config.constants import MAX_UER_SIZE_BYTES
+from shared.models.uer_schema import (
+    UnifiedEventReport,
+    ProtocolInfo,
+    FlowFeatures,
+    ProtocolSpecificFeatures
+)
+from shared.proto import uer_pb2
+from shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+UER_PROTOBUF_CONTENT_TYPE = "application/x-protobuf"
+
+_EPOCH = datetime(1970, 1, 1)
+
+_OPTIONAL_FEATURES = (
+    'mqtt_command_type', 'http_method', 'http_status_code', 'dns_query_type',
+    'dns_response_code', 'dns_ttl_variance', 'quic_version', 'initial_packet_count'
+)
+
+_FLOW_FEATURES = (
+    'packet_count', 'byte_count', 'duration_ms', 'mean_packet_length',
+    'mean_inter_arrival_time', 'entropy', 'flow_direction'
+)
+
+
+class UERTooLargeError(ValueError):
+    """Encoded UER exceeds the maximum UER size"""
+
+
+def _timestamp_us(timestamp: datetime) -> int:
+    """Microseconds since the epoch; naive datetimes are taken as UTC"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = timestamp - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _dump_metadata(metadata: Dict[str, Any]) -> str:
+    if not metadata:
+        return ''
+    return json.dumps(metadata, separators=(',', ':'), default=str)
+
+
+def _load_metadata(text: str) -> Dict[str, Any]:
+    return json.loads(text) if text else {}
+
+
+def _protocol_key(info: ProtocolInfo) -> Tuple[str, Optional[str], int, bool]:
+    return (info.protocol_type, info.version, info.port, info.is_encrypted)
+
+
+def _fill_protocol_info(message: uer_pb2.ProtocolInfo, info: ProtocolInfo) -> None:
+    message.protocol_type = info.protocol_type
+    if info.version is not None:
+        message.version = info.version
+    message.port = info.port
+    message.is_encrypted = info.is_encrypted
+
+
+def _protocol_info(message: uer_pb2.ProtocolInfo) -> ProtocolInfo:
+    return ProtocolInfo(
+        protocol_type=message.protocol_type,
+        version=message.version if message.HasField('version') else None,
+        port=message.port,
+        is_encrypted=message.is_encrypted
+    )
+
+
+def _fill_event(message: uer_pb2.UnifiedEventReport, uer: UnifiedEventReport) -> None:
+    """Copy everything but the envelope fields (agent, tenant, protocol info)"""
+    message.event_id = uer.event_id
+    message.timestamp_us = _timestamp_us(uer.timestamp)
+    message.source_ip = uer.source_ip
+    message.destination_ip = uer.destination_ip
+    message.source_port = uer.source_port
+    message.destination_port = uer.destination_port
+
+    flow = message.flow_features
+    for name in _FLOW_FEATURES:
+        setattr(flow, name, getattr(uer.flow_features, name))
+
+    features = message.protocol_features
+    for name in _OPTIONAL_FEATURES:
+        value = getattr(uer.protocol_features, name)
+        if value is not None:
+            setattr(features, name, value)
+    features.metadata_json = _dump_metadata(uer.protocol_features.metadata)
+
+    message.edge_agent_risk_score = uer.edge_agent_risk_score
+    message.edge_agent_anomaly_flags.extend(uer.edge_agent_anomaly_flags)
+    if uer.raw_packet_sample is not None:
+        message.raw_packet_sample = uer.raw_packet_sample
+    message.metadata_json = _dump_metadata(uer.metadata)
+
+
+def _check_size(message: uer_pb2.UnifiedEventReport, max_size: int) -> None:
+    """Drop the packet sample if the event is too large; raise if it still is"""
+    if message.ByteSize() <= max_size:
+        return
+    if message.HasField('raw_packet_sample'):
+        message.ClearField('raw_packet_sample')
+        if message.ByteSize() <= max_size:
+            return
+    raise UERTooLargeError(f"UER {message.event_id} is {message.ByteSize()} bytes encoded, limit is {max_size}")
+
+
+def uer_to_proto(uer: UnifiedEventReport) -> uer_pb2.UnifiedEventReport:
+    """Standalone protobuf message for one UER"""
+    message = uer_pb2.UnifiedEventReport()
+    message.agent_id = uer.agent_id
+    message.tenant_id = uer.tenant_id
+    _fill_protocol_info(message.protocol_info, uer.protocol_info)
+    _fill_event(message, uer)
+    return message
+
+
+def uer_from_proto(
+    message: uer_pb2.UnifiedEventReport,
+    envelope: Optional[uer_pb2.UERBatch] = None
+) -> UnifiedEventReport:
+    """
+    Pydantic UER from a protobuf message
+
+    Args:
+        message: Standalone UER, or an event of a batch
+        envelope: Batch the event came from; supplies agent, tenant and
+            protocol info the event leaves unset
+    """
+    if envelope is not None and not message.HasField('protocol_info'):
+        protocol_info = _protocol_info(envelope.protocols[message.protocol_ref])
+    else:
+        protocol_info = _protocol_info(message.protocol_info)
+
+    features = message.protocol_features
+    optional = {name: getattr(features, name) for name in _OPTIONAL_FEATURES if features.HasField(name)}
+
+    flow = message.flow_features
+    return UnifiedEventReport(
+        event_id=message.event_id,
+        agent_id=message.agent_id or (envelope.agent_id if envelope is not None else ''),
+        tenant_id=message.tenant_id or (envelope.tenant_id if envelope is not None else ''),
+        timestamp=_EPOCH + timedelta(microseconds=message.timestamp_us),
+        source_ip=message.source_ip,
+        destination_ip=message.destination_ip,
+        source_port=message.source_port,
+        destination_port=message.destination_port,
+        protocol_info=protocol_info,
+        flow_features=FlowFeatures(**{name: getattr(flow, name) for name in _FLOW_FEATURES}),
+        protocol_features=ProtocolSpecificFeatures(
+            metadata=_load_metadata(features.metadata_json), **optional
+        ),
+        edge_agent_risk_score=message.edge_agent_risk_score,
+        edge_agent_anomaly_flags=list(message.edge_agent_anomaly_flags),
+        raw_packet_sample=message.raw_packet_sample if message.HasField('raw_packet_sample') else None,
+        metadata=_load_metadata(message.metadata_json)
+    )
+
+
+def encode_uer(uer: UnifiedEventReport, max_size: int = MAX_UER_SIZE_BYTES) -> bytes:
+    """
+    Serialize one UER
+
+    Raises:
+        UERTooLargeError: if the UER exceeds ``max_size`` even without its packet sample
+    """
+    message = uer_to_proto(uer)
+    _check_size(message, max_size)
+    return message.SerializeToString()
+
+
+def decode_uer(data: bytes) -> UnifiedEventReport:
+    """Parse one serialized UER"""
+    return uer_from_proto(uer_pb2.UnifiedEventReport.FromString(data))
+
+
+def encode_uer_batch(uers: Sequence[UnifiedEventReport], max_uer_size: int = MAX_UER_SIZE_BYTES) -> bytes:
+    """
+    Serialize UERs into one ``UERBatch`` envelope
+
+    Agent and tenant IDs are sent once, and each distinct protocol info once
+    in a table the events refer to by index. UERs over ``max_uer_size`` lose
+    their packet sample; those still too large are skipped and logged.
+    """
+    return encode_uer_batch_checked(uers, max_uer_size)[0]
+
+
+def encode_uer_batch_checked(
+    uers: Sequence[UnifiedEventReport],
+    max_uer_size: int = MAX_UER_SIZE_BYTES
+) -> Tuple[bytes, List[UnifiedEventReport]]:
+    """
+    :func:`encode_uer_batch` that also returns the UERs the envelope holds
+
+    Returns:
+        The serialized batch and the UERs not skipped for their size, in order
+    """
+    batch = uer_pb2.UERBatch()
+    if not uers:
+        return batch.SerializeToString(), []
+
+    batch.agent_id = uers[0].agent_id
+    batch.tenant_id = uers[0].tenant_id
+    protocol_refs: Dict[Tuple[str, Optional[str], int, bool], int] = {}
+    encoded: List[UnifiedEventReport] = []
+
+    for uer in uers:
+        event = batch.events.add()
+        if uer.agent_id != batch.agent_id:
+            event.agent_id = uer.agent_id
+        if uer.tenant_id != batch.tenant_id:
+            event.tenant_id = uer.tenant_id
+
+        key = _protocol_key(uer.protocol_info)
+        ref = protocol_refs.get(key)
+        if ref is None:
+            ref = protocol_refs[key] = len(batch.protocols)
+            _fill_protocol_info(batch.protocols.add(), uer.protocol_info)
+        event.protocol_ref = ref
+
+        _fill_event(event, uer)
+        try:
+            _check_size(event, max_uer_size)
+        except UERTooLargeError as e:
+            logger.warning(f"Skipping UER: {e}")
+            del batch.events[-1]
+            continue
+        encoded.append(uer)
+
+    return batch.SerializeToString(), encoded
+
+
+def decode_uer_batch(data: bytes, max_uer_size: int = MAX_UER_SIZE_BYTES) -> List[UnifiedEventReport]:
+    """
+    Parse a ``UERBatch`` envelope
+
+    Raises:
+        UERTooLargeError: if any event exceeds ``max_uer_size``
+        ValueError: if an event refers to a protocol info the envelope lacks
+    """
+    batch = uer_pb2.UERBatch.FromString(data)
+    protocol_count = len(batch.protocols)
+    uers = []
+    for event in batch.events:
+        if event.ByteSize() > max_uer_size:
+            raise UERTooLargeError(f"UER {event.event_id} is {event.ByteSize()} bytes encoded, limit is {max_uer_size}")
+        if not event.HasField('protocol_info') and event.protocol_ref >= protocol_count:
+            raise ValueError(
+                f"UER {event.event_id} refers to protocol {event.protocol_ref}, "
+                f"batch has {protocol_count}"
+            )
+        uers.append(uer_from_proto(event, batch))
+    return uers
@@ -0,0 +1,4 @@
+"""Protobuf wire schemas (generated code, see the .proto files)"""
+from shared.proto import uer_pb2
+
+__all__ = ['uer_pb2']
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: uer.proto
+# Protobuf Python Version: 4.25.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\tuer.proto\x12\rcomidf.uer.v1\"k\n\x0cProtocolInfo\x12\x15\n\rprotocol_type\x18\x01 \x01(\t\x12\x14\n\x07version\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x0c\n\x04port\x18\x03 \x01(\r\x12\x14\n\x0cis_encrypted\x18\x04 \x01(\x08\x42\n\n\x08_version\"\xb3\x01\n\x0c\x46lowFeatures\x12\x14\n\x0cpacket_count\x18\x01 \x01(\x04\x12\x12\n\nbyte_count\x18\x02 \x01(\x04\x12\x13\n\x0b\x64uration_ms\x18\x03 \x01(\x01\x12\x1a\n\x12mean_packet_length\x18\x04 \x01(\x01\x12\x1f\n\x17mean_inter_arrival_time\x18\x05 \x01(\x01\x12\x0f\n\x07\x65ntropy\x18\x06 \x01(\x01\x12\x16\n\x0e\x66low_direction\x18\x07 \x01(\t\"\xc7\x03\n\x18ProtocolSpecificFeatures\x12\x1e\n\x11mqtt_command_type\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x18\n\x0bhttp_method\x18\x02 \x01(\tH\x01\x88\x01\x01\x12\x1d\n\x10http_status_code\x18\x03 \x01(\x05H\x02\x88\x01\x01\x12\x1b\n\x0e\x64ns_query_type\x18\x04 \x01(\tH\x03\x88\x01\x01\x12\x1e\n\x11\x64ns_response_code\x18\x05 \x01(\x05H\x04\x88\x01\x01\x12\x1d\n\x10\x64ns_ttl_variance\x18\x06 \x01(\x01H\x05\x88\x01\x01\x12\x19\n\x0cquic_version\x18\x07 \x01(\tH\x06\x88\x01\x01\x12!\n\x14initial_packet_count\x18\x08 \x01(\x05H\x07\x88\x01\x01\x12\x15\n\rmetadata_json\x18\t \x01(\tB\x14\n\x12_mqtt_command_typeB\x0e\n\x0c_http_methodB\x13\n\x11_http_status_codeB\x11\n\x0f_dns_query_typeB\x14\n\x12_dns_response_codeB\x13\n\x11_dns_ttl_varianceB\x0f\n\r_quic_versionB\x17\n\x15_initial_packet_count\"\x8b\x04\n\x12UnifiedEventReport\x12\x10\n\x08\x65vent_id\x18\x01 \x01(\t\x12\x10\n\x08\x61gent_id\x18\x02 \x01(\t\x12\x11\n\ttenant_id\x18\x03 \x01(\t\x12\x14\n\x0ctimestamp_us\x18\x04 \x01(\x12\x12\x11\n\tsource_ip\x18\x05 \x01(\t\x12\x16\n\x0e\x64\x65stination_ip\x18\x06 \x01(\t\x12\x13\n\x0bsource_port\x18\x07 \x01(\r\x12\x18\n\x10\x64\x65stination_port\x18\x08 \x01(\r\x12\x32\n\rprotocol_info\x18\t \x01(\x0b\x32\x1b.comidf.uer.v1.ProtocolInfo\x12\x32\n\rflow_features\x18\n \x01(\x0b\x32\x1b.comidf.uer.v1.FlowFeatures\x12\x42\n\x11protocol_features\x18\x0b \x01(\x0b\x32\'.comidf.uer.v1.ProtocolSpecificFeatures\x12\x1d\n\x15\x65\x64ge_agent_risk_score\x18\x0c \x01(\x01\x12 \n\x18\x65\x64ge_agent_anomaly_flags\x18\r \x03(\t\x12\x1e\n\x11raw_packet_sample\x18\x0e \x01(\x0cH\x00\x88\x01\x01\x12\x15\n\rmetadata_json\x18\x0f \x01(\t\x12\x14\n\x0cprotocol_ref\x18\x10 \x01(\rB\x14\n\x12_raw_packet_sample\"\x92\x01\n\x08UERBatch\x12\x10\n\x08\x61gent_id\x18\x01 \x01(\t\x12\x11\n\ttenant_id\x18\x02 \x01(\t\x12.\n\tprotocols\x18\x03 \x03(\x0b\x32\x1b.comidf.uer.v1.ProtocolInfo\x12\x31\n\x06\x65vents\x18\x04 \x03(\x0b\x32!.comidf.uer.v1.UnifiedEventReportb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'uer_pb2', _globals)
+if _descriptor._USE_C_DESCRIPTORS == False:
+  DESCRIPTOR._options = None
+  _globals['_PROTOCOLINFO']._serialized_start=28
+  _globals['_PROTOCOLINFO']._serialized_end=135
+  _globals['_FLOWFEATURES']._serialized_start=138
+  _globals['_FLOWFEATURES']._serialized_end=317
+  _globals['_PROTOCOLSPECIFICFEATURES']._serialized_start=320
+  _globals['_PROTOCOLSPECIFICFEATURES']._serialized_end=775
+  _globals['_UNIFIEDEVENTREPORT']._serialized_start=778
+  _globals['_UNIFIEDEVENTREPORT']._serialized_end=1301
+  _globals['_UERBATCH']._serialized_start=1304
+  _globals['_UERBATCH']._serialized_end=1450
+# @@protoc_insertion_point(module_scope)
@@ -1,5 +1,5 @@
 """Shared utilities package"""
-from shared.utils.logger import get_logger, CoMIDFLogger
+from shared.utils.logger import get_logger, get_event_logger, CoMIDFLogger, Lazy
 from shared.utils.network_utils import (
     get_network_interfaces,
     get_interface_ip,
@@ -8,7 +8,9 @@ from shared.utils.network_utils import (
 
 __all__ = [
     'get_logger',
+    'get_event_logger',
     'CoMIDFLogger',
+    'Lazy',
     'get_network_interfaces',
     'get_interface_ip',
     'validate_interface_exists'
@@ -1,19 +1,172 @@
 """
 Centralized logging for CoMIDF
 """
+import atexit
 import logging
 import logging.handlers
+import os
+import queue
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+
+class Lazy:
+    """
+    Defers an expensive log argument until the record is formatted
+
+    ``logger.debug("UER data: %s", Lazy(uer.dict))`` calls ``uer.dict()``
+    only if the record passes the level check and reaches a handler, and
+    then on the logging thread rather than the caller's. The callable must
+    not depend on state the caller goes on to mutate.
+    """
+
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func: Callable[..., Any], *args: Any):
+        self.func = func
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args))
+
+    def __repr__(self) -> str:
+        return repr(self.func(*self.args))
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket over the records of one logger
+
+    Passes ``rate_per_s`` records per second with bursts of up to ``burst``;
+    the next record that passes after a gap reports how many were dropped.
+    """
+
+    def __init__(self, rate_per_s: float, burst: int = 10):
+        super().__init__()
+        self.rate_per_s = rate_per_s
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+        self.suppressed_count = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._refilled) * self.rate_per_s, self.burst)
+            self._refilled = now
+            if self._tokens < 1:
+                self.suppressed_count += 1
+                return False
+            self._tokens -= 1
+            suppressed, self.suppressed_count = self.suppressed_count, 0
+        if suppressed:
+            _note_suppressed(record, suppressed)
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """Passes one record in every ``every``"""
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(every, 1)
+        self._seen = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        self._seen += 1
+        if self._seen < self.every:
+            return False
+        self._seen = 0
+        if self.every > 1:
+            _note_suppressed(record, self.every - 1)
+        return True
+
+
+def _note_suppressed(record: logging.LogRecord, count: int) -> None:
+    # Mapping args (``%(name)s`` messages) cannot take another positional
+    # argument; the count's digits are safe to put in the format string
+    if record.args and not isinstance(record.args, Mapping):
+        record.msg = f"{record.msg} (%d similar suppressed)"
+        record.args = tuple(record.args) + (count,)
+    else:
+        record.msg = f"{record.msg} ({count} similar suppressed)"
+
+
+# Arguments whose formatting can safely wait for the listener thread
+_DEFERRABLE_ARGS = (str, int, float, bool, bytes, type(None), Lazy)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records and never blocks
+
+    The stdlib QueueHandler formats the message on the calling thread. Here
+    records whose arguments are all immutable scalars or :class:`Lazy` are
+    left for the listener to format; any other argument (a dict, a UER) may
+    change before the listener gets to it, so those messages are formatted
+    on the caller. A full queue drops the record.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args:
+            values = args.values() if isinstance(args, Mapping) else args
+            if not all(isinstance(value, _DEFERRABLE_ARGS) for value in values):
+                record.msg = record.getMessage()
+                record.args = None
+            elif isinstance(args, Mapping):
+                # The mapping itself can still change; keep a snapshot
+                record.args = dict(args)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            CoMIDFLogger.dropped_count += 1
+
+
+class _RoutingHandler(logging.Handler):
+    """Listener-side handler that passes a record to its logger's own handlers"""
+
+    def __init__(self, routes: Dict[str, List[logging.Handler]]):
+        super().__init__()
+        self.routes = routes
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        for handler in self.routes.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
 
 
 class CoMIDFLogger:
-    """Unified logger for CoMIDF components"""
+    """
+    Unified logger for CoMIDF components
+    
+    With ``async_logging`` (the default) every logger gets a queue handler;
+    one listener thread per process formats records and writes them to the
+    logger's console and rotating file handlers, so the caller only pays for
+    the level check and an enqueue.
+    """
     
     _loggers: Dict[str, logging.Logger] = {}
     _log_dir = Path("/var/log/comidf")
     
+    async_logging = True
+    queue_size = 10000
+    dropped_count = 0
+    
+    _queue: Optional['queue.Queue[logging.LogRecord]'] = None
+    _listener: Optional[logging.handlers.QueueListener] = None
+    _queue_handlers: List[_DeferredQueueHandler] = []
+    _routes: Dict[str, List[logging.Handler]] = {}
+    _lock = threading.Lock()
+    
     @classmethod
     def setup_logger(
         cls,
@@ -41,11 +194,13 @@ class CoMIDFLogger:
             '[%(levelname)s] %(message)s'
         )
         
+        handlers: List[logging.Handler] = []
+        
         # Console handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(level)
         console_handler.setFormatter(simple_formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
         
         # File handler
         if log_file:
@@ -59,7 +214,14 @@ class CoMIDFLogger:
             )
             file_handler.setLevel(level)
             file_handler.setFormatter(detailed_formatter)
-            logger.addHandler(file_handler)
+            handlers.append(file_handler)
+        
+        if cls.async_logging:
+            cls._routes[name] = handlers
+            logger.addHandler(cls._queue_handler())
+        else:
+            for handler in handlers:
+                logger.addHandler(handler)
         
         cls._loggers[name] = logger
         return logger
@@ -70,6 +232,110 @@ class CoMIDFLogger:
         if name not in cls._loggers:
             return cls.setup_logger(name, log_file)
         return cls._loggers[name]
+    
+    @classmethod
+    def get_event_logger(
+        cls,
+        name: str,
+        log_file: Optional[str] = None,
+        rate_per_s: Optional[float] = 10.0,
+        burst: int = 20,
+        sample_every: int = 1
+    ) -> logging.Logger:
+        """
+        Logger for per-event messages (one line per packet, UER, request)
+        
+        A ``name.events`` child of the component logger, writing to the same
+        handlers, that keeps one record in every ``sample_every`` and at most
+        ``rate_per_s`` per second, so bursts of events cannot flood the log.
+        """
+        event_name = f"{name}.events"
+        if event_name in cls._loggers:
+            return cls._loggers[event_name]
+        
+        parent = cls.get_logger(name, log_file)
+        logger = logging.getLogger(event_name)
+        logger.setLevel(parent.level)
+        logger.handlers.clear()
+        logger.propagate = False
+        if cls.async_logging:
+            cls._routes[event_name] = cls._routes.get(name, [])
+            logger.addHandler(cls._queue_handler())
+        else:
+            for handler in parent.handlers:
+                logger.addHandler(handler)
+        if sample_every > 1:
+            logger.addFilter(SampleFilter(sample_every))
+        if rate_per_s is not None:
+            logger.addFilter(RateLimitFilter(rate_per_s, burst))
+        
+        cls._loggers[event_name] = logger
+        return logger
+    
+    @classmethod
+    def _queue_handler(cls) -> _DeferredQueueHandler:
+        """Queue handler bound to this process's listener, started on first use"""
+        with cls._lock:
+            if cls._listener is None:
+                cls._queue = queue.Queue(maxsize=cls.queue_size)
+                cls._listener = logging.handlers.QueueListener(cls._queue, _RoutingHandler(cls._routes))
+                cls._listener.start()
+            handler = _DeferredQueueHandler(cls._queue)
+            cls._queue_handlers.append(handler)
+            return handler
+    
+    @classmethod
+    def flush(cls) -> None:
+        """Write out every record queued so far"""
+        with cls._lock:
+            listener, old_queue = cls._listener, cls._queue
+            cls._listener = None
+        if listener is None:
+            return
+        # Later records go to a fresh queue and listener before the old one stops
+        if cls._queue_handlers:
+            cls._restart_listener()
+        listener.stop()
+        # Records a caller put on the old queue after the stop sentinel
+        while True:
+            try:
+                record = old_queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is not None:
+                listener.handle(record)
+        for handlers in cls._routes.values():
+            for handler in handlers:
+                handler.flush()
+    
+    @classmethod
+    def _restart_listener(cls) -> None:
+        with cls._lock:
+            cls._queue = queue.Queue(maxsize=cls.queue_size)
+            for handler in cls._queue_handlers:
+                handler.queue = cls._queue
+            cls._listener = logging.handlers.QueueListener(cls._queue, _RoutingHandler(cls._routes))
+            cls._listener.start()
+    
+    @classmethod
+    def _after_fork(cls) -> None:
+        """The listener thread does not survive fork; give the child its own"""
+        cls._lock = threading.Lock()
+        cls._listener = None
+        if cls._queue_handlers:
+            cls._restart_listener()
+
+
+def _stop_listener() -> None:
+    with CoMIDFLogger._lock:
+        listener, CoMIDFLogger._listener = CoMIDFLogger._listener, None
+    if listener is not None:
+        listener.stop()
+
+
+atexit.register(_stop_listener)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=CoMIDFLogger._after_fork)
 
 
 # Convenience function
@@ -77,3 +343,7 @@ def get_logger(name: str, log_file: Optional[str] = None) -> logging.Logger:
     """Get a logger instance"""
     return CoMIDFLogger.get_logger(name, log_file)
 
+
+def get_event_logger(name: str, log_file: Optional[str] = None, **limits) -> logging.Logger:
+    """Get a sampled, rate-limited logger for per-event messages"""
+    return CoMIDFLogger.get_event_logger(name, log_file, **limits)